@@ -1,13 +1,14 @@
 """Application Queue Manager for automated job applications."""
 
+import heapq
 import logging
-import time
+import math
 import threading
-from typing import List, Optional, Dict, Any, Callable
+from typing import Iterable, List, Optional, Dict, Any, Callable, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
-from queue import PriorityQueue
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import Job, JobStatus
@@ -15,6 +16,13 @@ from app.config import config
 
 logger = logging.getLogger(__name__)
 
+# Job columns add_job reads; selecting only these avoids hydrating full Job rows
+QUEUE_COLUMNS = (Job.id, Job.approved, Job.status, Job.relevance_score)
+# Rows fetched per round trip when queueing jobs from the database
+QUEUE_FETCH_BATCH = 500
+# Seconds to wait when rate limited with no application to time the wait by
+RATE_LIMIT_RECHECK_SECONDS = 60
+
 
 class ApplicationPriority(Enum):
     """Priority levels for application queue."""
@@ -50,7 +58,7 @@ class ApplicationQueueManager:
         self,
         db: Session,
         rate_limit_delay: float = 30.0,
-        max_applications_per_hour: int = 20,
+        max_applications_per_hour: Union[int, Dict[ApplicationPriority, int]] = 20,
         max_retries: int = 3,
         base_retry_delay: float = 60.0,
     ):
@@ -60,7 +68,10 @@ class ApplicationQueueManager:
         Args:
             db: Database session
             rate_limit_delay: Minimum seconds between applications
-            max_applications_per_hour: Maximum applications per hour
+            max_applications_per_hour: Maximum applications per hour, either one
+                shared cap or a cap per priority tier (each tier then has its own
+                hourly budget, so a low-priority backlog can't use up the
+                high-priority one; tiers left out get the smallest cap given)
             max_retries: Maximum retry attempts per job
             base_retry_delay: Base delay for exponential backoff (seconds)
         """
@@ -70,10 +81,13 @@ class ApplicationQueueManager:
         self.max_retries = max_retries
         self.base_retry_delay = base_retry_delay
 
-        self.queue: PriorityQueue = PriorityQueue()
-        self.applications_this_hour: List[datetime] = []
+        # Binary heap of QueuedApplication, guarded by _lock
+        self.queue: List[QueuedApplication] = []
+        # (applied at, priority value) for applications in the last hour
+        self.applications_this_hour: List[Tuple[datetime, int]] = []
         self.is_processing = False
         self.stop_requested = False
+        self._stop_event = threading.Event()  # wakes waits early on stop()
         self._lock = threading.Lock()
 
         # Callbacks
@@ -93,52 +107,70 @@ class ApplicationQueueManager:
         else:
             return ApplicationPriority.LOW
 
-    def add_job(self, job: Job) -> bool:
-        """
-        Add a job to the application queue.
-
-        Args:
-            job: Job to add
-
-        Returns:
-            True if added, False if job is invalid or already queued
-        """
+    def _make_entry(self, job: Job, priority: Optional[ApplicationPriority]) -> Optional[QueuedApplication]:
+        """Build the queue entry for a job, or None if it can't be queued."""
         if not job.approved:
             logger.warning(f"Job {job.id} not approved, skipping")
-            return False
+            return None
 
         if job.status == JobStatus.APPLICATION_COMPLETED:
             logger.info(f"Job {job.id} already applied, skipping")
-            return False
+            return None
 
-        priority = self.get_priority(job)
-        queued_app = QueuedApplication(
-            priority=priority.value,
+        return QueuedApplication(
+            priority=(priority or self.get_priority(job)).value,
             job_id=job.id,
             max_retries=self.max_retries,
         )
 
+    def add_job(self, job: Job, priority: Optional[ApplicationPriority] = None) -> bool:
+        """
+        Add a job to the application queue.
+
+        Args:
+            job: Job to add (or a row with the ``QUEUE_COLUMNS`` attributes)
+            priority: Queue priority (derived from the job's score if None)
+
+        Returns:
+            True if added, False if job is invalid or already queued
+        """
+        queued_app = self._make_entry(job, priority)
+        if queued_app is None:
+            return False
+
         with self._lock:
-            self.queue.put(queued_app)
+            heapq.heappush(self.queue, queued_app)
 
-        logger.info(f"Added job {job.id} to queue with priority {priority.name}")
+        logger.info(f"Added job {job.id} to queue with priority {ApplicationPriority(queued_app.priority).name}")
         return True
 
-    def add_jobs(self, jobs: List[Job]) -> int:
+    def add_jobs(self, jobs: Iterable[Job], priority: Optional[ApplicationPriority] = None) -> int:
         """
         Add multiple jobs to the queue.
 
+        Entries are built first and merged into the heap in one step, so the
+        lock is taken once rather than once per job.
+
         Args:
-            jobs: List of jobs to add
+            jobs: Jobs to add (consumed lazily, so a streamed result works)
+            priority: Queue priority for all of them (derived per job if None)
 
         Returns:
             Number of jobs added
         """
-        added = 0
+        entries = []
         for job in jobs:
-            if self.add_job(job):
-                added += 1
-        return added
+            queued_app = self._make_entry(job, priority)
+            if queued_app is not None:
+                entries.append(queued_app)
+                logger.debug(f"Queueing job {job.id} with priority {ApplicationPriority(queued_app.priority).name}")
+        if not entries:
+            return 0
+
+        with self._lock:
+            self.queue.extend(entries)
+            heapq.heapify(self.queue)
+        return len(entries)
 
     def add_approved_jobs(self) -> int:
         """
@@ -147,27 +179,84 @@ class ApplicationQueueManager:
         Returns:
             Number of jobs added
         """
-        pending_jobs = self.db.query(Job).filter(
-            Job.approved == True,
-            Job.status.notin_([
-                JobStatus.APPLICATION_COMPLETED,
-                JobStatus.APPLICATION_FAILED
-            ])
-        ).all()
+        pending_jobs = self.db.execute(
+            select(*QUEUE_COLUMNS).where(
+                Job.approved == True,
+                Job.status.notin_([
+                    JobStatus.APPLICATION_COMPLETED,
+                    JobStatus.APPLICATION_FAILED
+                ])
+            ),
+            execution_options={"yield_per": QUEUE_FETCH_BATCH},
+        )
 
         return self.add_jobs(pending_jobs)
 
-    def _can_apply_now(self) -> bool:
-        """Check if we can apply now based on rate limits."""
+    def _hourly_limit(self, priority: int) -> int:
+        """Hourly cap that applies to a priority tier."""
+        limits = self.max_applications_per_hour
+        if isinstance(limits, int):
+            return limits
+        return limits.get(ApplicationPriority(priority), min(limits.values()))
+
+    def _can_apply_now(self, priority: int) -> bool:
+        """Check if we can apply to a job of this priority now based on rate limits."""
         now = datetime.utcnow()
         hour_ago = now - timedelta(hours=1)
 
         # Clean up old timestamps
         self.applications_this_hour = [
-            ts for ts in self.applications_this_hour if ts > hour_ago
+            (ts, tier) for ts, tier in self.applications_this_hour if ts > hour_ago
         ]
 
-        return len(self.applications_this_hour) < self.max_applications_per_hour
+        if isinstance(self.max_applications_per_hour, int):
+            used = len(self.applications_this_hour)
+        else:
+            used = sum(1 for _, tier in self.applications_this_hour if tier == priority)
+        return used < self._hourly_limit(priority)
+
+    def _take_next(self) -> Optional[QueuedApplication]:
+        """
+        Pop the highest-priority application whose tier is under its hourly cap.
+
+        Must be called with ``self._lock`` held. Returns None if every queued
+        tier is at its cap.
+        """
+        heap = self.queue
+        if self._can_apply_now(heap[0].priority):
+            return heapq.heappop(heap)
+        if isinstance(self.max_applications_per_hour, int):
+            return None
+
+        # Head's tier is spent; serve the best entry from a tier with budget left
+        open_tiers = {tier.value for tier in ApplicationPriority if self._can_apply_now(tier.value)}
+        candidates = [app for app in heap if app.priority in open_tiers]
+        if not candidates:
+            return None
+        queued_app = min(candidates)
+        # Remove by identity: entries of the same priority compare equal
+        del heap[next(i for i, app in enumerate(heap) if app is queued_app)]
+        heapq.heapify(heap)
+        return queued_app
+
+    def _rate_limit_wait(self) -> int:
+        """
+        Seconds until the oldest application in the hourly window stops counting.
+
+        Waiting exactly that long (rather than re-checking on a fixed interval)
+        means a rate-limited queue wakes once per freed slot. With per-tier caps
+        the freed slot may belong to another tier, in which case the next check
+        just waits again.
+        """
+        if not self.applications_this_hour:
+            return RATE_LIMIT_RECHECK_SECONDS
+        oldest = min(ts for ts, _ in self.applications_this_hour)
+        remaining = (oldest + timedelta(hours=1) - datetime.utcnow()).total_seconds()
+        return max(1, math.ceil(remaining))
+
+    def _wait(self, seconds: float) -> None:
+        """Sleep for ``seconds``, returning early if stop() is called."""
+        self._stop_event.wait(seconds)
 
     def _get_retry_delay(self, retry_count: int) -> float:
         """Calculate exponential backoff delay."""
@@ -183,18 +272,14 @@ class ApplicationQueueManager:
         Returns:
             Result dictionary or None if queue is empty
         """
-        if self.queue.empty():
-            return None
-
-        if not self._can_apply_now():
-            wait_time = 60  # Wait a minute and try again
-            logger.info(f"Rate limit reached, waiting {wait_time}s")
-            return {"status": "rate_limited", "wait_time": wait_time}
-
         with self._lock:
-            if self.queue.empty():
+            if not self.queue:
                 return None
-            queued_app = self.queue.get()
+            queued_app = self._take_next()
+            if queued_app is None:
+                wait_time = self._rate_limit_wait()
+                logger.info(f"Rate limit reached, waiting {wait_time}s")
+                return {"status": "rate_limited", "wait_time": wait_time}
 
         # Get job from database
         job = self.db.query(Job).filter(Job.id == queued_app.job_id).first()
@@ -232,7 +317,7 @@ class ApplicationQueueManager:
                 job.application_error = None
                 self.db.commit()
 
-                self.applications_this_hour.append(datetime.utcnow())
+                self.applications_this_hour.append((datetime.utcnow(), queued_app.priority))
 
                 result["status"] = "success"
                 logger.info(f"Successfully applied to job {job.id}")
@@ -256,7 +341,7 @@ class ApplicationQueueManager:
                 retry_delay = self._get_retry_delay(queued_app.retry_count)
 
                 with self._lock:
-                    self.queue.put(queued_app)
+                    heapq.heappush(self.queue, queued_app)
 
                 job.status = JobStatus.SCORED  # Reset to allow retry
                 result["status"] = "retry_scheduled"
@@ -303,7 +388,7 @@ class ApplicationQueueManager:
                 logger.info("Stop requested, ending batch processing")
                 break
 
-            if self.queue.empty():
+            if not self.queue:
                 if self.on_queue_empty:
                     self.on_queue_empty()
                 break
@@ -314,11 +399,11 @@ class ApplicationQueueManager:
 
                 # Handle rate limiting
                 if result.get("status") == "rate_limited":
-                    time.sleep(result.get("wait_time", 60))
+                    self._wait(result.get("wait_time", RATE_LIMIT_RECHECK_SECONDS))
                 elif result.get("status") in ["success", "failed", "retry_scheduled"]:
                     if i < batch_size - 1:  # Don't wait after last application
                         logger.info(f"Waiting {delay}s before next application...")
-                        time.sleep(delay)
+                        self._wait(delay)
 
         return results
 
@@ -339,6 +424,7 @@ class ApplicationQueueManager:
         """
         self.is_processing = True
         self.stop_requested = False
+        self._stop_event.clear()
 
         summary = {
             "started_at": datetime.utcnow().isoformat(),
@@ -352,7 +438,7 @@ class ApplicationQueueManager:
         delay = delay_between if delay_between is not None else self.rate_limit_delay
 
         try:
-            while not self.queue.empty() and not self.stop_requested:
+            while self.queue and not self.stop_requested:
                 result = self.process_next(apply_func)
 
                 if result:
@@ -368,16 +454,16 @@ class ApplicationQueueManager:
 
                     # Rate limiting
                     if result.get("status") == "rate_limited":
-                        time.sleep(result.get("wait_time", 60))
+                        self._wait(result.get("wait_time", RATE_LIMIT_RECHECK_SECONDS))
                     elif result.get("status") in ["success", "failed", "retry_scheduled"]:
-                        if not self.queue.empty():
-                            time.sleep(delay)
+                        if self.queue:
+                            self._wait(delay)
 
         finally:
             self.is_processing = False
             summary["completed_at"] = datetime.utcnow().isoformat()
 
-        if self.on_queue_empty and self.queue.empty():
+        if self.on_queue_empty and not self.queue:
             self.on_queue_empty()
 
         return summary
@@ -385,21 +471,25 @@ class ApplicationQueueManager:
     def stop(self):
         """Request stop of processing."""
         self.stop_requested = True
+        self._stop_event.set()
         logger.info("Stop requested for application queue")
 
     def get_queue_status(self) -> Dict[str, Any]:
         """Get current queue status."""
         return {
-            "queue_size": self.queue.qsize(),
+            "queue_size": len(self.queue),
             "is_processing": self.is_processing,
             "applications_this_hour": len(self.applications_this_hour),
-            "max_per_hour": self.max_applications_per_hour,
+            "max_per_hour": (
+                self.max_applications_per_hour
+                if isinstance(self.max_applications_per_hour, int)
+                else {tier.name: cap for tier, cap in self.max_applications_per_hour.items()}
+            ),
             "rate_limit_delay": self.rate_limit_delay,
         }
 
     def clear(self):
         """Clear the queue."""
         with self._lock:
-            while not self.queue.empty():
-                self.queue.get()
+            self.queue.clear()
         logger.info("Application queue cleared")
@@ -5,6 +5,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, field_validator
@@ -14,11 +15,11 @@ import yaml
 from pathlib import Path
 
 from app.db import get_db, init_db
-from app.models import Run, Job, JobStatus, RunStatus, UserProfile, RateLimitRecord, Company
+from app.models import Run, Job, JobStatus, RunStatus, UserProfile, Company
 from app.orchestrator import PipelineOrchestrator
 from app.config import config
-from app.user_profile import get_user_profile, create_default_profile
-from app.services.rate_limiter import RateLimiter, rate_limit_dependency
+from app.user_profile import get_user_profile, create_default_profile, invalidate_profile_cache
+from app.services.rate_limiter import get_rate_limiter, rate_limit_dependency
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -331,9 +332,9 @@ async def health_check(db: Session = Depends(get_db)):
 async def create_run(
     request: RunRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
     _: bool = Depends(verify_api_key),
     __: bool = Depends(rate_limit_dependency("run_pipeline")),
+    db: Session = Depends(get_db),
 ):
     """Create and start a new pipeline run. Requires API key when enabled."""
     try:
@@ -865,9 +866,9 @@ async def apply_to_job(
     job_id: int,
     background_tasks: BackgroundTasks,
     dry_run: bool = False,
-    db: Session = Depends(get_db),
     _: bool = Depends(verify_api_key),
     __: bool = Depends(rate_limit_dependency("apply_to_job")),
+    db: Session = Depends(get_db),
 ):
     """Apply to a job (requires approval). Requires API key when enabled. Set dry_run=True to simulate."""
     job = db.query(Job).filter(Job.id == job_id).first()
@@ -1011,6 +1012,7 @@ async def update_profile(
     profile.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(profile)
+    invalidate_profile_cache(profile.id)
     
     return {
         "id": profile.id,
@@ -1203,6 +1205,7 @@ async def upload_resume(
 
         db.commit()
         db.refresh(profile)
+        invalidate_profile_cache(profile.id)
 
         return {
             "status": "success",
@@ -1508,9 +1511,9 @@ class LinkedInCredentials(BaseModel):
 async def validate_linkedin_credentials(
     credentials: LinkedInCredentials,
     request: Request,
-    db: Session = Depends(get_db),
     _: bool = Depends(verify_api_key),
     __: bool = Depends(rate_limit_dependency("validate_linkedin")),
+    db: Session = Depends(get_db),
 ):
     """Validate LinkedIn credentials by attempting to log in. Requires API key when enabled.
 
@@ -1966,12 +1969,9 @@ async def update_application_defaults(
 
 # Rate limit status endpoint
 @app.get("/rate-limit/status")
-async def get_rate_limit_status(
-    request: Request,
-    db: Session = Depends(get_db),
-):
+async def get_rate_limit_status(request: Request):
     """Get current rate limit status for the requesting client."""
-    limiter = RateLimiter(db)
+    limiter = get_rate_limiter()
     client_id = limiter._get_client_id(request)
     status = limiter.get_status(client_id)
 
@@ -1985,11 +1985,16 @@ async def get_rate_limit_status(
 @app.get("/metrics")
 async def get_metrics(db: Session = Depends(get_db)):
     """Get pipeline metrics."""
-    total_runs = db.query(Run).count()
-    total_jobs = db.query(Job).count()
-    approved_jobs = db.query(Job).filter(Job.approved == True).count()
-    applied_jobs = db.query(Job).filter(Job.status == JobStatus.APPLICATION_COMPLETED).count()
-    
+    # One scan of jobs for all three job counts instead of a COUNT per metric
+    total_runs = db.scalar(select(func.count()).select_from(Run))
+    total_jobs, approved_jobs, applied_jobs = db.execute(
+        select(
+            func.count(),
+            func.count().filter(Job.approved == True),
+            func.count().filter(Job.status == JobStatus.APPLICATION_COMPLETED),
+        ).select_from(Job)
+    ).one()
+
     return {
         "total_runs": total_runs,
         "total_jobs": total_jobs,
@@ -1,29 +1,43 @@
 """SQLAlchemy models for the job search pipeline database."""
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import hashlib
 import re
 from sqlalchemy import (
     Column, Integer, String, Float, Text, Boolean,
-    DateTime, ForeignKey, JSON, Enum as SQLEnum
+    DateTime, ForeignKey, Index, JSON, LargeBinary, Enum as SQLEnum
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
 
 
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
 def normalize_text(text: str) -> str:
     """Normalize text for consistent comparison."""
     if not text:
         return ""
     # Lowercase, remove extra whitespace, remove special chars
     text = text.lower().strip()
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\s+', ' ', text)
+    text = _SPECIAL_CHARS_RE.sub('', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     return text
 
 
+def normalize_text_batch(texts: List[str]) -> List[str]:
+    """Normalize many strings at once; same result as ``normalize_text`` on each."""
+    strip_special = _SPECIAL_CHARS_RE.sub
+    collapse_whitespace = _WHITESPACE_RE.sub
+    return [
+        collapse_whitespace(' ', strip_special('', text.lower().strip())) if text else ""
+        for text in texts
+    ]
+
+
 def compute_content_hash(title: str, company: str, location: str = "") -> str:
     """
     Compute a hash from normalized job content for deduplication.
@@ -84,6 +98,11 @@ class Job(Base):
     """Job listing model."""
     
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Application queueing filters on approved, ranges on score and excludes
+        # finished statuses; with id as the rowid this covers those reads
+        Index("ix_jobs_queueable", "approved", "relevance_score", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(Integer, ForeignKey("runs.id", ondelete="CASCADE"), nullable=True, index=True)
@@ -112,7 +131,7 @@ class Job(Base):
     
     # Status and workflow
     status = Column(SQLEnum(JobStatus), default=JobStatus.FOUND, index=True)
-    approved = Column(Boolean, default=False, index=True)
+    approved = Column(Boolean, default=False)  # indexed via ix_jobs_queueable
     rejection_reason = Column(Text, nullable=True)
     
     # Generated content
@@ -296,6 +315,10 @@ class Company(Base):
     workday_slug = Column(String(100), nullable=True)
     website = Column(String(500), nullable=True)
 
+    # RAG indexing state (hash of the text last embedded into the vector store)
+    indexed_text_hash = Column(String(64), nullable=True)
+    indexed_at = Column(DateTime, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -304,24 +327,43 @@ class Company(Base):
         return f"<Company(id={self.id}, name='{self.name}', industries={self.industries})>"
 
 
-class RateLimitRecord(Base):
-    """Rate limit tracking for API endpoints.
+class EmbeddingCacheEntry(Base):
+    """Cached embedding vector keyed by content hash and embedding model.
 
-    SQLite-backed rate limiting that persists across restarts.
+    Lets re-indexing skip the embedding call for text that has not changed.
     """
 
-    __tablename__ = "rate_limit_records"
+    __tablename__ = "embedding_cache"
 
-    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), primary_key=True)  # sha256 hex of the embedded text
+    model = Column(String(200), primary_key=True)
+    provider = Column(String(50), nullable=True)
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<EmbeddingCacheEntry(hash='{self.content_hash[:12]}', model='{self.model}')>"
+
+
+class RateLimitBucket(Base):
+    """Token bucket for one (client, endpoint) pair.
+
+    Each request refills and spends tokens in a single upsert, so storage is
+    one row per client and endpoint rather than one row per request.
+    """
+
+    __tablename__ = "rate_limit_buckets"
 
-    # Identifier for rate limiting (e.g., IP address, API key, or client_id)
-    client_id = Column(String(255), nullable=False, index=True)
+    client_id = Column(String(255), primary_key=True)
+    endpoint = Column(String(255), primary_key=True)
 
-    # Endpoint or resource being rate limited
-    endpoint = Column(String(255), nullable=False, index=True)
+    # Tokens left after the last request (refilled lazily on the next one)
+    tokens = Column(Float, nullable=False)
 
-    # Timestamp of the request
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Unix time (seconds) of the last refill
+    last_refill = Column(Float, nullable=False)
 
     def __repr__(self):
-        return f"<RateLimitRecord(client_id='{self.client_id}', endpoint='{self.endpoint}')>"
+        return f"<RateLimitBucket(client_id='{self.client_id}', endpoint='{self.endpoint}', tokens={self.tokens:.2f})>"
@@ -1,18 +1,20 @@
 """Advanced RAG system for production-grade retrieval-augmented generation."""
 
-from app.rag.vector_store import VectorStoreManager
+from app.rag.vector_store import VectorStoreManager, get_vector_store
 from app.rag.chunking import SemanticChunker, chunk_job_description
-from app.rag.retrieval import TwoStageRetriever, CrossEncoderReranker, RetrievalResult
+from app.rag.retrieval import TwoStageRetriever, CrossEncoderReranker, RetrievalResult, get_default_reranker
 from app.rag.hyde import HyDEQueryTransformer, QueryExpansion
 from app.rag.agent import RAGAgent, RAGState
 
 __all__ = [
     "VectorStoreManager",
+    "get_vector_store",
     "SemanticChunker",
     "chunk_job_description",
     "TwoStageRetriever",
     "CrossEncoderReranker",
     "RetrievalResult",
+    "get_default_reranker",
     "HyDEQueryTransformer",
     "QueryExpansion",
     "RAGAgent",
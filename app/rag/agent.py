@@ -1,20 +1,54 @@
 """LangGraph-based RAG agent with state management and self-correction cycles."""
 
+import asyncio
 import logging
-from typing import TypedDict, List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict, List, Dict, Any, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatOllama
+from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 
 from app.config import config
 from app.rag.vector_store import VectorStoreManager
 from app.rag.retrieval import TwoStageRetriever
-from app.rag.hyde import HyDEQueryTransformer
+from app.rag.hyde import HyDEQueryTransformer, get_shared_llm
 
 logger = logging.getLogger(__name__)
 
+# Static system preamble for answer generation. Kept byte-identical across calls
+# so providers that support prompt prefix caching can reuse it.
+ANSWER_SYSTEM = (
+    "You are a helpful assistant. Answer the user's question using only the "
+    "information provided in the context documents. If the context doesn't "
+    "contain enough information, say so explicitly. Be concise and accurate."
+)
+
+
+# Worker pools shared by every RAGAgent, keyed by (thread name prefix, max workers)
+_executors: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_shared_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """Get or create a thread pool shared across agents.
+
+    A RAGAgent is built per JobRAGService (so per pipeline run); sharing the
+    pools keeps their threads from piling up. Thread-safe implementation using
+    double-checked locking pattern.
+    """
+    key = (name, max_workers)
+    executor = _executors.get(key)
+    if executor is None:
+        with _executors_lock:
+            # Double-check after acquiring lock
+            executor = _executors.get(key)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _executors[key] = executor
+    return executor
+
 
 class RAGState(TypedDict):
     """State for the RAG agent."""
@@ -29,6 +63,7 @@ class RAGState(TypedDict):
     should_continue: bool
     relevance_ratio: float
     filter_metadata: Optional[Dict[str, Any]]
+    baseline_candidates: List[Tuple[Document, float]]
 
 
 class RAGAgent:
@@ -50,6 +85,7 @@ class RAGAgent:
         llm=None,
         max_iterations: int = 3,
         min_relevance_score: float = 0.7,
+        grader_max_workers: int = 8,
     ):
         """
         Initialize RAG agent.
@@ -61,13 +97,22 @@ class RAGAgent:
             llm: Optional LLM instance
             max_iterations: Maximum number of retrieval cycles
             min_relevance_score: Minimum score for documents to be considered relevant
+            grader_max_workers: Maximum concurrent LLM calls when grading documents
+                (keep within the provider's rate limit)
         """
         self.vector_store = vector_store
         self.retriever = retriever
-        self.hyde_transformer = hyde_transformer or HyDEQueryTransformer()
+        self.hyde_transformer = hyde_transformer or HyDEQueryTransformer(
+            embeddings=vector_store.embeddings if vector_store else None,
+        )
         self.max_iterations = max_iterations
         self.min_relevance_score = min_relevance_score
         
+        # Bounded pool for per-document grading; llm.invoke releases the GIL on HTTP I/O
+        self._grader_pool = _get_shared_executor("RAGGrader", max(1, grader_max_workers))
+        # Runs the raw-query vector search while the HyDE LLM call is in flight
+        self._search_pool = _get_shared_executor("RAGSearch", 2)
+        
         # Initialize LLM
         if llm is None:
             self._initialize_llm()
@@ -86,18 +131,7 @@ class RAGAgent:
             temperature = default_llm.get("temperature", 0.7)
             ollama_base_url = default_llm.get("ollama_base_url", "http://localhost:11434")
             
-            if provider.lower() == "ollama":
-                self.llm = ChatOllama(
-                    model=model,
-                    temperature=temperature,
-                    base_url=ollama_base_url,
-                )
-            else:
-                self.llm = ChatOpenAI(
-                    model=model,
-                    temperature=temperature,
-                    api_key=config.llm.api_key if config.llm.api_key else None,
-                )
+            self.llm = get_shared_llm(provider, model, temperature, ollama_base_url)
             
             logger.info(f"Initialized RAG Agent LLM: {provider}/{model}")
         except Exception as e:
@@ -135,16 +169,55 @@ class RAGAgent:
         
         return workflow.compile()
     
+    def _baseline_search(
+        self,
+        query: str,
+        filter_metadata: Optional[Dict[str, Any]],
+    ) -> List[Tuple[Document, float]]:
+        """Stage-1 vector search over the raw query, merged with the HyDE candidates later."""
+        if not self.retriever:
+            return []
+        try:
+            return self.retriever.vector_store.similarity_search(
+                query=query,
+                k=self.retriever.stage1_k,
+                filter=filter_metadata,
+            )
+        except Exception as e:
+            logger.warning(f"Baseline vector search failed: {e}")
+            return []
+    
+    def _hyde_active(self) -> bool:
+        """Whether transform_query will make an LLM call worth overlapping with."""
+        return bool(self.hyde_transformer.use_hyde and self.hyde_transformer.llm)
+    
     def _transform_query_node(self, state: RAGState) -> RAGState:
-        """Transform query using HyDE."""
+        """Transform query using HyDE, overlapped with a baseline search over the raw query."""
         query = state.get("query", "")
+        
+        # aquery() already ran both concurrently
+        if state.get("transformed_query"):
+            return state
+        
         logger.debug(f"Transforming query: {query}")
         
-        transformed_query = self.hyde_transformer.transform_query(query)
+        # Without HyDE the retrieval stage already searches the raw query
+        if not self._hyde_active():
+            transformed_query = self.hyde_transformer.transform_query(query)
+            baseline_candidates = []
+        else:
+            baseline_future = self._search_pool.submit(
+                self._baseline_search, query, state.get("filter_metadata"),
+            )
+            try:
+                transformed_query = self.hyde_transformer.transform_query(query)
+            finally:
+                baseline_candidates = baseline_future.result()
         
         return {
             **state,
             "transformed_query": transformed_query,
+            "baseline_candidates": baseline_candidates,
             "iterations": state.get("iterations", 0),
         }
     
@@ -161,6 +234,7 @@ class RAGAgent:
                 results = self.retriever.retrieve(
                     query=query,
                     filter=filter_metadata,
+                    extra_candidates=state.get("baseline_candidates"),
                 )
             elif self.vector_store:
                 results = self.vector_store.similarity_search(
@@ -198,6 +272,22 @@ class RAGAgent:
                 "iterations": state.get("iterations", 0) + 1,
             }
     
+    @staticmethod
+    def _build_grade_prompt(query: str, doc: Dict[str, Any]) -> str:
+        """Build the relevance-grading prompt for a single document."""
+        return f"""You are a document relevance grader. Given a user's question and a retrieved document, determine if the document is relevant.
+
+User Question: {query}
+
+Retrieved Document:
+{doc['content'][:1000]}
+
+Is this document relevant to answering the user's question? Respond with only:
+- "RELEVANT" if the document contains useful information
+- "NOT_RELEVANT" if the document is not useful
+
+Response:"""
+    
     def _grade_documents_node(self, state: RAGState) -> RAGState:
         """Grade documents for relevance using LLM."""
         query = state.get("query", "")
@@ -214,25 +304,17 @@ class RAGAgent:
         logger.debug(f"Grading {len(documents)} documents")
         
         try:
-            # Use LLM to grade each document
+            # Use LLM to grade each document concurrently
+            prompts = [self._build_grade_prompt(query, doc) for doc in documents]
+            responses = list(self._grader_pool.map(
+                lambda prompt: self.llm.invoke([HumanMessage(content=prompt)]),
+                prompts,
+            ))
+            
             graded_docs = []
             relevant_count = 0
             
-            for doc in documents:
-                grade_prompt = f"""You are a document relevance grader. Given a user's question and a retrieved document, determine if the document is relevant.
-
-User Question: {query}
-
-Retrieved Document:
-{doc['content'][:1000]}
-
-Is this document relevant to answering the user's question? Respond with only:
-- "RELEVANT" if the document contains useful information
-- "NOT_RELEVANT" if the document is not useful
-
-Response:"""
-                
-                response = self.llm.invoke([HumanMessage(content=grade_prompt)])
+            for doc, response in zip(documents, responses):
                 grade = response.content.strip().upper()
                 
                 is_relevant = "RELEVANT" in grade
@@ -323,9 +405,11 @@ Rewritten Query:"""
             
             logger.info(f"Query rewritten: {original_query} -> {rewritten_query}")
             
+            # Raw-query candidates already proved insufficient; search afresh
             return {
                 **state,
                 "transformed_query": rewritten_query,
+                "baseline_candidates": [],
             }
             
         except Exception as e:
@@ -347,29 +431,21 @@ Rewritten Query:"""
             if doc.get("is_relevant", True)  # Default to True if not graded
         ]
         
-        # Build context from relevant documents
-        context_parts = []
+        # Build context from relevant documents in a single join
+        buf = []
         for i, doc in enumerate(relevant_docs[:5], 1):  # Limit to top 5
-            content = doc.get("content", "")
-            context_parts.append(f"[Document {i}]\n{content}\n")
-        
-        context = "\n".join(context_parts)
+            buf.extend(("[Document ", str(i), "]\n", doc.get("content", ""), "\n\n"))
+        context = "".join(buf)
         
         logger.debug(f"Generating answer using {len(relevant_docs)} relevant documents")
         
         try:
-            answer_prompt = f"""You are a helpful assistant. Answer the user's question using only the information provided in the context documents.
-
-Context Documents:
-{context}
-
-User Question: {query}
-
-Answer the question based on the context. If the context doesn't contain enough information, say so explicitly. Be concise and accurate.
-
-Answer:"""
+            messages = [
+                SystemMessage(content=ANSWER_SYSTEM),
+                HumanMessage(content=f"Context Documents:\n{context}\nUser Question: {query}\n\nAnswer:"),
+            ]
             
-            response = self.llm.invoke([HumanMessage(content=answer_prompt)])
+            response = self.llm.invoke(messages)
             answer = response.content.strip()
             
             logger.info(f"Generated answer ({len(answer)} chars)")
@@ -388,27 +464,14 @@ Answer:"""
                 "answer": "Error generating answer. Please try again.",
             }
     
-    def query(
+    def _initial_state(
         self,
         query: str,
-        filter_metadata: Optional[Dict[str, Any]] = None,
-        max_iterations: Optional[int] = None,
-    ) -> Dict[str, Any]:
-        """
-        Execute RAG query with full workflow.
-        
-        Args:
-            query: User query
-            filter_metadata: Optional metadata filter for retrieval
-            max_iterations: Optional override for max iterations
-            
-        Returns:
-            Dictionary with answer, context, documents, and metadata
-        """
-        logger.info(f"Processing RAG query: {query}")
-        
-        # Initialize state
-        initial_state: RAGState = {
+        filter_metadata: Optional[Dict[str, Any]],
+        max_iterations: Optional[int],
+    ) -> RAGState:
+        """Build the graph's starting state for a query."""
+        return {
             "query": query,
             "transformed_query": "",
             "retrieved_documents": [],
@@ -420,9 +483,12 @@ Answer:"""
             "should_continue": True,
             "relevance_ratio": 0.0,
             "filter_metadata": filter_metadata,
+            "baseline_candidates": [],
         }
-        
-        # Run graph
+    
+    def _run_graph(self, initial_state: RAGState) -> Dict[str, Any]:
+        """Run the workflow and shape the final state into the query result."""
+        query = initial_state["query"]
         try:
             final_state = self.graph.invoke(initial_state)
             
@@ -445,3 +511,64 @@ Answer:"""
                 "iterations": 0,
                 "query": query,
             }
+    
+    def query(
+        self,
+        query: str,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        max_iterations: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute RAG query with full workflow.
+        
+        Args:
+            query: User query
+            filter_metadata: Optional metadata filter for retrieval
+            max_iterations: Optional override for max iterations
+            
+        Returns:
+            Dictionary with answer, context, documents, and metadata
+        """
+        logger.info(f"Processing RAG query: {query}")
+        return self._run_graph(self._initial_state(query, filter_metadata, max_iterations))
+    
+    async def aquery(
+        self,
+        query: str,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        max_iterations: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Execute RAG query from async code without blocking the event loop.
+        
+        When HyDE is active, its LLM call and the baseline vector search over
+        the raw query are gathered on the loop's executor; the rest of the
+        workflow then runs in the executor as well.
+        
+        Args:
+            query: User query
+            filter_metadata: Optional metadata filter for retrieval
+            max_iterations: Optional override for max iterations
+            
+        Returns:
+            Dictionary with answer, context, documents, and metadata
+        """
+        logger.info(f"Processing async RAG query: {query}")
+        loop = asyncio.get_running_loop()
+        initial_state = self._initial_state(query, filter_metadata, max_iterations)
+        
+        if not self._hyde_active():
+            return await loop.run_in_executor(None, self._run_graph, initial_state)
+        
+        try:
+            transformed_query, baseline_candidates = await asyncio.gather(
+                loop.run_in_executor(None, self.hyde_transformer.transform_query, query),
+                loop.run_in_executor(None, self._baseline_search, query, filter_metadata),
+            )
+            initial_state["transformed_query"] = transformed_query
+            initial_state["baseline_candidates"] = baseline_candidates
+        except Exception as e:
+            # The transform node retries HyDE inside the graph
+            logger.warning(f"Concurrent HyDE/baseline search failed, continuing sequentially: {e}")
+        
+        return await loop.run_in_executor(None, self._run_graph, initial_state)
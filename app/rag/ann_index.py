@@ -0,0 +1,285 @@
+"""Compressed approximate nearest neighbour index for stage-1 retrieval."""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # faiss is optional; searches go straight to ChromaDB instead
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Supported vector encodings: product quantization, bfloat16 scalars, 1-bit signs
+QUANTIZATIONS = ("pq", "bf16", "binary")
+
+# FAISS wants roughly this many training points per inverted list
+_TRAIN_POINTS_PER_LIST = 39
+# Product quantizer codebooks need at least 2**nbits training points
+_MIN_PQ_TRAIN_POINTS = 256
+
+
+def _binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """Pack the sign of each dimension into bits (dimension / 8 bytes per vector)."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+class ANNIndex:
+    """
+    FAISS index over the embeddings of a ChromaDB collection.
+
+    Vectors are stored compressed so the stage-1 scan moves far fewer bytes
+    than ChromaDB's full-precision vectors:
+
+    - ``pq``: ``IndexIVFPQ``, ``m`` codes of ``nbits`` each, ``nprobe`` lists scanned
+    - ``bf16``: ``IndexScalarQuantizer`` with bfloat16 components (half the bytes)
+    - ``binary``: ``IndexBinaryIVF`` over sign bits compared by Hamming distance
+      (1/32 of the bytes); callers should re-score candidates at full precision
+
+    ChromaDB stays the source of truth for documents and metadata. Vectors are
+    stored under integer labels (natively by the IVF indexes, through an
+    ``IndexIDMap2`` for ``bf16``), which a JSON sidecar maps back to
+    collection IDs, so re-added IDs replace their vector and deleted IDs can
+    be removed.
+    Vectors are L2-normalised and distances are reported as cosine distance to
+    match ChromaDB (lower is better); binary distances are the fraction of
+    differing bits, which orders candidates the same way.
+    """
+
+    def __init__(
+        self,
+        index_path: Path,
+        quantization: str = "bf16",
+        nlist: int = 256,
+        m: int = 32,
+        nbits: int = 8,
+        nprobe: int = 16,
+    ):
+        """
+        Initialize the index wrapper (nothing is built or loaded yet).
+
+        Args:
+            index_path: File the FAISS index is persisted to
+            quantization: Vector encoding, one of ``QUANTIZATIONS``
+            nlist: Number of inverted lists (``pq`` and ``binary``)
+            m: Number of product-quantizer sub-vectors (must divide the dimension)
+            nbits: Bits per sub-vector code (``pq``)
+            nprobe: Inverted lists scanned per query (``pq`` and ``binary``)
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+        self.index_path = Path(index_path)
+        self.ids_path = self.index_path.with_suffix(self.index_path.suffix + ".ids.json")
+        self.quantization = quantization
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self._index = None
+        self._ids: List[Optional[str]] = []  # collection ID per label, None once removed
+        self._labels: Dict[str, int] = {}  # collection ID -> current label
+        self._persisted = False  # whether the files on disk match the in-memory index
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether faiss is installed."""
+        return faiss is not None
+
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors in the index (0 when not built)."""
+        return self._index.ntotal if self._index is not None else 0
+
+    @property
+    def approximate_scores(self) -> bool:
+        """Whether distances are coarse enough that hits should be re-scored at FP32."""
+        return self.quantization == "binary"
+
+    def load(self) -> bool:
+        """
+        Load a previously persisted index.
+
+        Returns:
+            True if an index was loaded
+        """
+        if faiss is None or not self.index_path.exists() or not self.ids_path.exists():
+            return False
+        try:
+            if self.quantization == "binary":
+                index = faiss.read_index_binary(str(self.index_path))
+            else:
+                index = faiss.read_index(str(self.index_path))
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load FAISS index from {self.index_path}: {e}")
+            return False
+        if self.quantization == "bf16" and not isinstance(index, faiss.IndexIDMap2):
+            logger.info(f"FAISS index at {self.index_path} has no ID map; it will be rebuilt")
+            return False
+        if hasattr(index, "nprobe"):
+            index.nprobe = min(self.nprobe, index.nlist)
+        with self._lock:
+            self._index, self._ids, self._persisted = index, ids, True
+            self._labels = {doc_id: label for label, doc_id in enumerate(ids)}
+        logger.info(f"Loaded FAISS {self.quantization} index with {len(ids)} vectors from {self.index_path}")
+        return True
+
+    def _new_index(self, n: int, dim: int):
+        """Create an untrained index for ``n`` vectors of dimension ``dim``, or None if unsuitable."""
+        nlist = max(1, min(self.nlist, n // _TRAIN_POINTS_PER_LIST))
+        if self.quantization == "pq":
+            if n < _MIN_PQ_TRAIN_POINTS or dim % self.m != 0:
+                return None
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, self.m, self.nbits, faiss.METRIC_INNER_PRODUCT)
+        elif self.quantization == "binary":
+            if dim % 8 != 0:
+                return None
+            index = faiss.IndexBinaryIVF(faiss.IndexBinaryFlat(dim), dim, nlist)
+        else:
+            # QT_bf16 needs faiss >= 1.8; fp16 has the same footprint on older builds
+            qtype = getattr(faiss.ScalarQuantizer, "QT_bf16", faiss.ScalarQuantizer.QT_fp16)
+            # IVF indexes store labels themselves; a flat index needs a map to
+            # keep labels stable when rows are removed
+            index = faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT))
+        if hasattr(index, "nprobe"):
+            index.nprobe = min(self.nprobe, nlist)
+        return index
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalise float32 vectors in place and convert them to the index's input format."""
+        faiss.normalize_L2(vectors)
+        return _binary_codes(vectors) if self.quantization == "binary" else vectors
+
+    def build(self, ids: List[str], embeddings: np.ndarray) -> bool:
+        """
+        Train a new index on the given vectors, add them and persist it.
+
+        Args:
+            ids: Collection ID of each vector
+            embeddings: Float matrix of shape (len(ids), dimension)
+
+        Returns:
+            True if the index was built, False if the vectors don't suit it
+        """
+        if faiss is None:
+            return False
+
+        vectors = np.array(embeddings, dtype=np.float32)
+        n, dim = vectors.shape
+        index = self._new_index(n, dim)
+        if index is None:
+            logger.info(
+                f"Skipping FAISS {self.quantization} index build for {n} vectors of dimension {dim} "
+                f"(pq needs >= {_MIN_PQ_TRAIN_POINTS} vectors and dimension divisible by m={self.m}; "
+                f"binary needs dimension divisible by 8)"
+            )
+            return False
+
+        codes = self._encode(vectors)
+        index.train(codes)
+        index.add_with_ids(codes, np.arange(n, dtype=np.int64))
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.quantization == "binary":
+            faiss.write_index_binary(index, str(self.index_path))
+        else:
+            faiss.write_index(index, str(self.index_path))
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            json.dump(list(ids), f)
+
+        with self._lock:
+            self._index, self._ids, self._persisted = index, list(ids), True
+            self._labels = {doc_id: label for label, doc_id in enumerate(ids)}
+        logger.info(f"Built FAISS {self.quantization} index: {n} vectors of dimension {dim}")
+        return True
+
+    def add(self, ids: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Add or replace vectors in a built index using its existing training.
+        
+        An ID that is already indexed has its old vector removed first. The
+        changes are kept in memory until the next ``build``.
+        
+        Args:
+            ids: Collection ID of each vector
+            embeddings: Embedding vectors
+        """
+        if not ids:
+            return
+        # Within one call the last vector for an ID wins
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        if len(latest) < len(ids):
+            keep = sorted(latest.values())
+            ids = [ids[i] for i in keep]
+            embeddings = [embeddings[i] for i in keep]
+        codes = self._encode(np.array(embeddings, dtype=np.float32))
+        with self._lock:
+            if self._index is None:
+                return
+            self._remove_locked(ids)
+            labels = np.arange(len(self._ids), len(self._ids) + len(ids), dtype=np.int64)
+            self._index.add_with_ids(codes, labels)
+            self._ids.extend(ids)
+            self._labels.update(zip(ids, labels.tolist()))
+            self._mark_unpersisted()
+    
+    def remove(self, ids: List[str]) -> None:
+        """
+        Remove the vectors of the given collection IDs (unknown IDs are ignored).
+        
+        Args:
+            ids: Collection IDs to remove
+        """
+        with self._lock:
+            if self._index is not None and self._remove_locked(ids):
+                self._mark_unpersisted()
+    
+    def _remove_locked(self, ids: List[str]) -> int:
+        """Remove IDs from the index and the label maps; the caller holds the lock."""
+        labels = [self._labels.pop(doc_id) for doc_id in ids if doc_id in self._labels]
+        if not labels:
+            return 0
+        for label in labels:
+            self._ids[label] = None
+        return self._index.remove_ids(np.array(labels, dtype=np.int64))
+    
+    def _mark_unpersisted(self) -> None:
+        """Invalidate the files on disk once the in-memory index diverges from them."""
+        if self._persisted:
+            # Changes aren't written back, so make the next load() fail and the
+            # index get rebuilt from the collection instead of serving stale rows
+            self.ids_path.unlink(missing_ok=True)
+            self._persisted = False
+    
+    def search(self, query_embedding: List[float], k: int) -> List[Tuple[str, float]]:
+        """
+        Find the approximate nearest neighbours of a query vector.
+        
+        Args:
+            query_embedding: Query embedding
+            k: Number of neighbours to return
+            
+        Returns:
+            List of (collection ID, distance) tuples, nearest first
+        """
+        query = self._encode(np.array([query_embedding], dtype=np.float32))
+        with self._lock:
+            if self._index is None:
+                return []
+            distances, labels = self._index.search(query, k)
+            ids = [self._ids[label] if label >= 0 else None for label in labels[0]]
+        
+        if self.quantization == "binary":
+            distances = distances[0] / (query.shape[1] * 8)
+        else:
+            distances = 1.0 - distances[0]
+        
+        return [(doc_id, float(distance)) for doc_id, distance in zip(ids, distances) if doc_id is not None]
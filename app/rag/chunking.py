@@ -4,6 +4,7 @@ import logging
 from typing import List, Dict, Any, Optional
 import re
 import math
+import threading
 
 from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter, SentenceTransformersTokenTextSplitter
@@ -15,6 +16,33 @@ from app.config import config
 
 logger = logging.getLogger(__name__)
 
+# Metadata keys used to carry precomputed chunk vectors to the vector store.
+# They are stripped before metadata is persisted.
+CHUNK_VECTOR_KEY = "_vector"
+CHUNK_VECTOR_MODEL_KEY = "_vector_model"
+
+# Sentence embedding models shared by every SemanticChunker, keyed by model name
+_sentence_embedders: Dict[str, HuggingFaceEmbeddings] = {}
+_sentence_embedders_lock = threading.Lock()
+
+
+def _get_sentence_embedder(model_name: str) -> HuggingFaceEmbeddings:
+    """Get or create the shared sentence embedder for a model.
+
+    chunk_job_description builds a chunker per job, so loading the model in
+    each would dominate indexing. Thread-safe implementation using
+    double-checked locking pattern.
+    """
+    embedder = _sentence_embedders.get(model_name)
+    if embedder is None:
+        with _sentence_embedders_lock:
+            # Double-check after acquiring lock
+            embedder = _sentence_embedders.get(model_name)
+            if embedder is None:
+                embedder = HuggingFaceEmbeddings(model_name=model_name)
+                _sentence_embedders[model_name] = embedder
+    return embedder
+
 
 class SemanticChunker:
     """
@@ -28,6 +56,7 @@ class SemanticChunker:
         chunk_overlap: int = 50,
         similarity_threshold: float = 0.7,
         min_chunk_size: int = 100,
+        reuse_embeddings: Optional[bool] = None,
     ):
         """
         Initialize semantic chunker.
@@ -37,11 +66,19 @@ class SemanticChunker:
             chunk_overlap: Overlap between chunks in characters
             similarity_threshold: Minimum similarity between consecutive sentences (lower = more chunks)
             min_chunk_size: Minimum chunk size to keep
+            reuse_embeddings: Attach mean-pooled sentence embeddings to chunks so the
+                vector store can skip re-embedding them (defaults to config)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.similarity_threshold = similarity_threshold
         self.min_chunk_size = min_chunk_size
+        self.model_name: Optional[str] = None
+        
+        chunking_config = config.yaml_config.get("rag", {}).get("chunking", {})
+        if reuse_embeddings is None:
+            reuse_embeddings = chunking_config.get("reuse_sentence_embeddings", True)
+        self.reuse_embeddings = reuse_embeddings
         
         # Initialize embedding model for semantic analysis
         try:
@@ -50,12 +87,11 @@ class SemanticChunker:
             
             if embedding_provider == "huggingface":
                 model_name = embedding_config.get("model", "sentence-transformers/all-MiniLM-L6-v2")
-                self.embedder = HuggingFaceEmbeddings(model_name=model_name)
             else:
                 # Fallback to fast local model
-                self.embedder = HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2"
-                )
+                model_name = "sentence-transformers/all-MiniLM-L6-v2"
+            self.embedder = _get_sentence_embedder(model_name)
+            self.model_name = model_name
             logger.info(f"Semantic chunker initialized with threshold: {similarity_threshold}")
         except Exception as e:
             logger.warning(f"Could not initialize embedding model for semantic chunking: {e}")
@@ -88,6 +124,7 @@ class SemanticChunker:
             
             # Step 2: Compute embeddings for sentences
             sentence_embeddings = self.embedder.embed_documents(sentences)
+            embedding_matrix = np.asarray(sentence_embeddings, dtype=np.float32)
             
             # Step 3: Compute similarity between consecutive sentences
             similarities = []
@@ -128,6 +165,11 @@ class SemanticChunker:
                         "sentence_start": start,
                         "sentence_end": end,
                     })
+                    if self.reuse_embeddings:
+                        chunk_metadata[CHUNK_VECTOR_KEY] = self._pool_embeddings(
+                            embedding_matrix[start:end]
+                        )
+                        chunk_metadata[CHUNK_VECTOR_MODEL_KEY] = self.model_name
                     chunks.append(Document(page_content=chunk_text, metadata=chunk_metadata))
                 
                 i += 1
@@ -156,6 +198,15 @@ class SemanticChunker:
             logger.warning(f"Semantic chunking failed, falling back: {e}")
             return self._fallback_chunk(text, metadata)
     
+    @staticmethod
+    def _pool_embeddings(embeddings: np.ndarray) -> List[float]:
+        """Mean-pool sentence embeddings into a unit-length chunk vector."""
+        pooled = embeddings.mean(axis=0)
+        norm = np.linalg.norm(pooled)
+        if norm > 0:
+            pooled = pooled / norm
+        return pooled.tolist()
+    
     def _split_sentences(self, text: str) -> List[str]:
         """Split text into sentences."""
         # Use regex to split on sentence boundaries
@@ -172,10 +223,15 @@ class SemanticChunker:
             chunk_overlap=self.chunk_overlap,
         )
         sub_chunks = splitter.split_text(text)
+        # Sub-chunks no longer line up with the pooled sentence vector
+        base_metadata = {
+            key: value for key, value in metadata.items()
+            if key not in (CHUNK_VECTOR_KEY, CHUNK_VECTOR_MODEL_KEY)
+        }
         return [
             Document(
                 page_content=chunk,
-                metadata={**metadata, "sub_chunk_index": i}
+                metadata={**base_metadata, "sub_chunk_index": i}
             )
             for i, chunk in enumerate(sub_chunks)
         ]
@@ -1,15 +1,41 @@
 """Service layer for RAG operations with companies."""
 
+import functools
 import logging
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from sqlalchemy import bindparam, exists, func, update
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.db import engine
 from app.models import Company
-from app.rag import VectorStoreManager
-from langchain_core.documents import Document
+from app.rag import VectorStoreManager, get_vector_store
+from app.rag.embedding_cache import content_hash
 
 logger = logging.getLogger(__name__)
 
+# Rows per executemany round-trip when writing indexed hashes back
+HASH_WRITE_BATCH_SIZE = 500
+# Embedding calls kept in flight while indexing (API latency dominates)
+INDEX_MAX_WORKERS = 4
+
+_companies = Company.__table__
+_record_indexed_stmt = (
+    update(_companies)
+    .where(_companies.c.id == bindparam("cid"))
+    .values(indexed_text_hash=bindparam("h"), indexed_at=bindparam("ts"))
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _normalize_size(size: str) -> str:
+    """Normalize a size preference such as "Startup (1-50)" to "Startup"."""
+    return size.partition('(')[0].strip()
+
 
 class CompanyRAGService:
     """
@@ -35,119 +61,290 @@ class CompanyRAGService:
 
         # Initialize vector store if not provided
         if vector_store is None:
-            self.vector_store = VectorStoreManager(collection_name=collection_name)
+            self.vector_store = get_vector_store(collection_name)
         else:
             self.vector_store = vector_store
 
         logger.info("CompanyRAGService initialized")
 
-    def index_company(self, company: Company) -> bool:
+    def _build_record(self, company: Company) -> Tuple[str, str, Dict[str, Any]]:
         """
-        Index a company in the vector store.
+        Build the vector store ID, document text and metadata for a company.
 
         Args:
-            company: Company model to index
+            company: Company model to convert
 
         Returns:
-            True if successful, False otherwise
+            Tuple of (document ID, document text, metadata)
         """
-        try:
-            # Build rich text representation for embedding
-            text_parts = [
-                f"Company: {company.name}",
-            ]
-
-            if company.description:
-                text_parts.append(f"Description: {company.description}")
+        # Build rich text representation for embedding
+        parts = (
+            f"Company: {company.name}",
+            f"Description: {company.description}" if company.description else None,
+            f"Industries: {', '.join(company.industries)}" if company.industries else None,
+            f"Verticals: {', '.join(company.verticals)}" if company.verticals else None,
+            f"Company Size: {company.size}" if company.size else None,
+            f"Stage: {company.stage}" if company.stage else None,
+            f"Tech Stack: {', '.join(company.tech_stack)}" if company.tech_stack else None,
+            f"Headquarters: {company.headquarters}" if company.headquarters else None,
+        )
+        document_text = "\n".join(part for part in parts if part)
+
+        # Build metadata (ChromaDB only accepts scalar values, so lists are joined)
+        metadata = {
+            "company_id": company.id,
+            "company_name": company.name,
+            "industries": ", ".join(company.industries or []),
+            "verticals": ", ".join(company.verticals or []),
+            "size": company.size or "unknown",
+            "stage": company.stage or "unknown",
+            "tech_stack": ", ".join(company.tech_stack or []),
+            "headquarters": company.headquarters or "",
+        }
 
-            if company.industries:
-                text_parts.append(f"Industries: {', '.join(company.industries)}")
+        return f"company_{company.id}", document_text, metadata
 
-            if company.verticals:
-                text_parts.append(f"Verticals: {', '.join(company.verticals)}")
+    def _record_indexed(self, companies: List[Company], hashes: List[str]) -> None:
+        """
+        Persist the indexed text hash for companies just added to the vector store.
 
-            if company.size:
-                text_parts.append(f"Company Size: {company.size}")
+        Written as a Core executemany on its own connection so the caller's
+        session (possibly mid-way through a streaming query) is not committed.
+        The loaded instances are updated in place without being marked dirty.
 
-            if company.stage:
-                text_parts.append(f"Stage: {company.stage}")
+        Args:
+            companies: Companies that were indexed
+            hashes: Content hash of each company's document text
+        """
+        indexed_at = datetime.utcnow()
+        params = [
+            {"cid": company.id, "h": h, "ts": indexed_at}
+            for company, h in zip(companies, hashes)
+        ]
+        try:
+            with engine.begin() as conn:
+                for start in range(0, len(params), HASH_WRITE_BATCH_SIZE):
+                    conn.execute(_record_indexed_stmt, params[start:start + HASH_WRITE_BATCH_SIZE])
+        except Exception as e:
+            logger.warning(f"Failed to record indexed hashes for {len(params)} companies: {e}")
+            return
 
-            if company.tech_stack:
-                text_parts.append(f"Tech Stack: {', '.join(company.tech_stack)}")
+        for company, h in zip(companies, hashes):
+            set_committed_value(company, "indexed_text_hash", h)
+            set_committed_value(company, "indexed_at", indexed_at)
 
-            if company.headquarters:
-                text_parts.append(f"Headquarters: {company.headquarters}")
+    def index_company(self, company: Company, force: bool = False) -> bool:
+        """
+        Index a company in the vector store.
 
-            document_text = "\n".join(text_parts)
+        Args:
+            company: Company model to index
+            force: Re-index even if the document text is unchanged
 
-            # Build metadata
-            metadata = {
-                "company_id": company.id,
-                "company_name": company.name,
-                "industries": company.industries or [],
-                "verticals": company.verticals or [],
-                "size": company.size or "unknown",
-                "stage": company.stage or "unknown",
-                "tech_stack": company.tech_stack or [],
-                "headquarters": company.headquarters or "",
-            }
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            doc_id, text, metadata = self._build_record(company)
+            h = content_hash(text)
+            if not force and company.indexed_text_hash == h:
+                logger.debug("Company %s unchanged since last index, skipping", company.id)
+                return True
 
             # Add to vector store
-            doc_id = f"company_{company.id}"
-            self.vector_store.add_documents(
-                documents=[document_text],
+            self.vector_store.upsert_embeddings(
+                ids=[doc_id],
+                texts=[text],
                 metadatas=[metadata],
-                ids=[doc_id]
+                embeddings=self.vector_store.embeddings.embed_documents([text]),
             )
+            self._record_indexed([company], [h])
 
-            logger.info(f"Successfully indexed company: {company.name} (ID: {company.id})")
+            logger.info("Successfully indexed company: %s (ID: %s)", company.name, company.id)
             return True
 
         except Exception as e:
-            logger.error(f"Error indexing company {company.id}: {e}", exc_info=True)
+            # Tracebacks are only formatted when debugging; failures can be frequent during ingest
+            logger.error(
+                "Error indexing company %s: %s", company.id, e,
+                exc_info=logger.isEnabledFor(logging.DEBUG),
+            )
             return False
 
-    def index_companies(self, companies: List[Company]) -> Dict[str, Any]:
+    def index_companies(
+        self,
+        companies: List[Company],
+        batch_size: int = 256,
+        force: bool = False,
+        max_workers: int = INDEX_MAX_WORKERS,
+    ) -> Dict[str, Any]:
         """
         Index multiple companies in batch.
 
         Args:
             companies: List of Company models to index
+            batch_size: Number of companies per vector store call
+            force: Re-index companies whose document text is unchanged
+            max_workers: Embedding calls allowed in flight at once
+
+        Returns:
+            Dict with results: {total, success, failed, skipped, errors}
+        """
+        return self.index_companies_iter(
+            companies, batch_size=batch_size, force=force, max_workers=max_workers,
+        )
+
+    def _prepare_batch(
+        self,
+        batch: List[Company],
+        force: bool,
+        results: Dict[str, Any],
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]], List[str], List[Company]]:
+        """
+        Build the vector store columns for the companies in a batch that need indexing.
+
+        Unchanged and failing companies are counted in ``results`` and left out.
+
+        Returns:
+            Parallel lists of (IDs, texts, metadatas, content hashes, companies)
+        """
+        # Parallel columns handed to the collection as-is (no Document objects)
+        ids = []
+        texts = []
+        metadatas = []
+        hashes = []
+        indexed = []
+        for company in batch:
+            try:
+                doc_id, text, metadata = self._build_record(company)
+            except Exception as e:
+                results["failed"] += 1
+                results["errors"].append(f"Error indexing company {company.id}: {str(e)}")
+                continue
+            h = content_hash(text)
+            if not force and company.indexed_text_hash == h:
+                results["success"] += 1
+                results["skipped"] += 1
+                continue
+            ids.append(doc_id)
+            texts.append(text)
+            metadatas.append(metadata)
+            hashes.append(h)
+            indexed.append(company)
+        return ids, texts, metadatas, hashes, indexed
+
+    def _finish_batch(self, prepared: tuple, embeddings_future: Future, results: Dict[str, Any]) -> None:
+        """Upsert a batch once its embeddings are ready and record the indexed hashes."""
+        ids, texts, metadatas, hashes, indexed = prepared
+        try:
+            self.vector_store.upsert_embeddings(ids, texts, metadatas, embeddings_future.result())
+            results["success"] += len(ids)
+        except Exception as e:
+            logger.error(
+                "Error indexing batch of %d companies: %s", len(ids), e,
+                exc_info=logger.isEnabledFor(logging.DEBUG),
+            )
+            results["failed"] += len(ids)
+            results["errors"].extend(
+                f"Error indexing company {company.id}: {str(e)}"
+                for company in indexed
+            )
+            return
+
+        self._record_indexed(indexed, hashes)
+
+    def index_companies_iter(
+        self,
+        companies: Iterable[Company],
+        batch_size: int = 256,
+        force: bool = False,
+        max_workers: int = INDEX_MAX_WORKERS,
+    ) -> Dict[str, Any]:
+        """
+        Index companies from a lazily consumed iterable.
+
+        Documents are added to the vector store in slabs of ``batch_size`` so the
+        embedding model runs one call per slab instead of per company. Up to
+        ``max_workers`` slabs are embedded concurrently on worker threads while
+        the next slab is read; rows, upserts and hash writes stay on the calling
+        thread (which owns the session), in input order. At most ``max_workers``
+        slabs are held in memory at a time.
+
+        Companies whose document text hash matches ``indexed_text_hash`` are
+        skipped (and counted as successful) unless ``force`` is set.
+
+        Args:
+            companies: Iterable of Company models to index (e.g. a streaming query)
+            batch_size: Number of companies per vector store call
+            force: Re-index companies whose document text is unchanged
+            max_workers: Embedding calls allowed in flight at once
 
         Returns:
-            Dict with results: {total, success, failed, errors}
+            Dict with results: {total, success, failed, skipped, errors}
         """
         results = {
-            "total": len(companies),
+            "total": 0,
             "success": 0,
             "failed": 0,
+            "skipped": 0,
             "errors": []
         }
 
-        for company in companies:
-            try:
-                if self.index_company(company):
-                    results["success"] += 1
-                else:
-                    results["failed"] += 1
-                    results["errors"].append(f"Failed to index company {company.id}")
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append(f"Error indexing company {company.id}: {str(e)}")
+        embed_documents = self.vector_store.embeddings.embed_documents
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="CompanyEmbed") as pool:
+            iterator = iter(companies)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                results["total"] += len(batch)
+
+                prepared = self._prepare_batch(batch, force, results)
+                if not prepared[0]:
+                    continue
+
+                pending.append((prepared, pool.submit(embed_documents, prepared[1])))
+                if len(pending) >= max(1, max_workers):
+                    self._finish_batch(*pending.popleft(), results)
 
-        logger.info(f"Indexed {results['success']}/{results['total']} companies successfully")
+            while pending:
+                self._finish_batch(*pending.popleft(), results)
+
+        logger.info(
+            f"Indexed {results['success']}/{results['total']} companies successfully "
+            f"({results['skipped']} unchanged)"
+        )
         return results
 
-    def index_all_companies(self) -> Dict[str, Any]:
+    def index_all_companies(
+        self,
+        batch_size: int = 256,
+        force: bool = False,
+        max_workers: int = INDEX_MAX_WORKERS,
+    ) -> Dict[str, Any]:
         """
         Index all companies from the database.
 
+        Args:
+            batch_size: Number of companies per vector store call
+            force: Re-index companies whose document text is unchanged
+            max_workers: Embedding calls allowed in flight at once
+
         Returns:
-            Dict with results: {total, success, failed, errors}
+            Dict with results: {total, success, failed, skipped, errors}
         """
-        companies = self.db.query(Company).all()
-        logger.info(f"Found {len(companies)} companies to index")
-        return self.index_companies(companies)
+        total = self.db.query(func.count(Company.id)).scalar()
+        logger.info(f"Found {total} companies to index")
+
+        companies = (
+            self.db.query(Company)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        return self.index_companies_iter(
+            companies, batch_size=batch_size, force=force, max_workers=max_workers,
+        )
 
     def suggest_companies(
         self,
@@ -172,21 +369,13 @@ class CompanyRAGService:
         """
         try:
             # Build semantic query from preferences
-            query_parts = []
-
-            if industries and len(industries) > 0:
-                query_parts.append(f"Industries: {', '.join(industries)}")
-
-            if company_sizes and len(company_sizes) > 0:
-                # Normalize size strings (remove parentheses and numbers)
-                sizes = [s.split('(')[0].strip() if '(' in s else s for s in company_sizes]
-                query_parts.append(f"Company size: {', '.join(sizes)}")
-
-            if company_stages and len(company_stages) > 0:
-                query_parts.append(f"Company stage: {', '.join(company_stages)}")
-
-            if tech_stack and len(tech_stack) > 0:
-                query_parts.append(f"Technologies: {', '.join(tech_stack)}")
+            sections = (
+                ("Industries", industries),
+                ("Company size", company_sizes and [_normalize_size(s) for s in company_sizes]),
+                ("Company stage", company_stages),
+                ("Technologies", tech_stack),
+            )
+            query_parts = [f"{label}: {', '.join(values)}" for label, values in sections if values]
 
             if not query_parts:
                 logger.warning("No preferences provided for company suggestions")
@@ -196,20 +385,31 @@ class CompanyRAGService:
             logger.info(f"Generating company suggestions for query: {query}")
 
             # Perform similarity search
-            results = self.vector_store.similarity_search_with_score(
+            results = self.vector_store.similarity_search(
                 query=query,
                 k=k
             )
 
-            # Build suggestions list
+            # Fetch all matched companies in one query instead of one per result
+            company_ids = [
+                doc.metadata['company_id'] for doc, _ in results
+                if doc.metadata.get('company_id')
+            ]
+            companies_by_id = {}
+            if company_ids:
+                companies_by_id = {
+                    company.id: company
+                    for company in self.db.query(Company).options(load_only(
+                        Company.id, Company.name, Company.industries, Company.verticals,
+                        Company.size, Company.stage, Company.tech_stack,
+                        Company.description, Company.headquarters, Company.website,
+                    )).filter(Company.id.in_(company_ids)).all()
+                }
+
+            # Build suggestions list, preserving vector search order
             suggestions = []
             for doc, score in results:
-                company_id = doc.metadata.get('company_id')
-                if not company_id:
-                    continue
-
-                # Fetch full company data from database
-                company = self.db.query(Company).filter(Company.id == company_id).first()
+                company = companies_by_id.get(doc.metadata.get('company_id'))
                 if not company:
                     continue
 
@@ -268,19 +468,29 @@ class CompanyRAGService:
         """
         query = self.db.query(Company)
 
-        # Note: JSON contains filtering in SQLite is limited
-        # For better filtering, consider using raw SQL or filtering in Python
-
         if size:
             query = query.filter(Company.size == size)
 
         if stage:
             query = query.filter(Company.stage == stage)
 
+        industry_lower = industry.lower() if industry else None
+        filter_in_sql = bool(industry_lower) and self.db.get_bind().dialect.name == "sqlite"
+
+        if filter_in_sql:
+            # Match against the JSON array elements in SQLite before applying the limit
+            industry_values = func.json_each(Company.industries).table_valued("value")
+            query = query.filter(
+                exists().where(func.lower(industry_values.c.value) == industry_lower)
+            )
+
         companies = query.limit(limit).all()
 
-        # Filter by industry in Python (since JSON filtering is complex in SQLite)
-        if industry:
-            companies = [c for c in companies if c.industries and industry.lower() in [i.lower() for i in c.industries]]
+        # Other backends: filter by industry in Python
+        if industry_lower and not filter_in_sql:
+            companies = [
+                c for c in companies
+                if c.industries and any(i.lower() == industry_lower for i in c.industries)
+            ]
 
         return companies
@@ -0,0 +1,160 @@
+"""Content-hash embedding cache backed by the application database."""
+
+import functools
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.db import get_db_context
+from app.models import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Stay below SQLite's default bound-parameter limit when building IN (...) lists
+_LOOKUP_CHUNK_SIZE = 500
+# Recent query embeddings kept in process memory by CachingEmbeddings
+QUERY_CACHE_SIZE = 1024
+
+
+def content_hash(text: str) -> str:
+    """Compute the cache key for a piece of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors cached by (sha256(text), model).
+
+    Vectors are stored as float32 bytes in the ``embedding_cache`` table. Each
+    operation uses its own short-lived session so cache writes never commit
+    (or interfere with streaming queries on) the caller's session.
+    """
+
+    def __init__(self, model: str, provider: Optional[str] = None):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            model: Embedding model name (part of the cache key)
+            provider: Optional embedding provider name, stored for reference
+        """
+        self.model = model
+        self.provider = provider
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            hashes: Content hashes to look up
+
+        Returns:
+            Dict mapping each cached hash to its vector (misses are omitted)
+        """
+        unique = list(set(hashes))
+        found: Dict[str, List[float]] = {}
+        try:
+            with get_db_context() as db:
+                for start in range(0, len(unique), _LOOKUP_CHUNK_SIZE):
+                    rows = db.query(
+                        EmbeddingCacheEntry.content_hash,
+                        EmbeddingCacheEntry.vector,
+                    ).filter(
+                        EmbeddingCacheEntry.model == self.model,
+                        EmbeddingCacheEntry.content_hash.in_(unique[start:start + _LOOKUP_CHUNK_SIZE]),
+                    ).all()
+                    for row_hash, blob in rows:
+                        found[row_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        """
+        Store freshly computed vectors.
+
+        Args:
+            vectors: Dict mapping content hash to vector
+        """
+        if not vectors:
+            return
+        rows = []
+        for row_hash, vector in vectors.items():
+            array = np.asarray(vector, dtype=np.float32)
+            rows.append({
+                "content_hash": row_hash,
+                "model": self.model,
+                "provider": self.provider,
+                "dimensions": int(array.shape[0]),
+                "vector": array.tobytes(),
+            })
+        with get_db_context() as db:
+            try:
+                db.bulk_insert_mappings(EmbeddingCacheEntry, rows)
+                db.commit()
+            except Exception as e:
+                # Most likely a concurrent writer cached the same text first
+                logger.warning(f"Embedding cache write failed: {e}")
+                db.rollback()
+
+
+class CachingEmbeddings(Embeddings):
+    """
+    Embeddings adapter that only sends uncached text to the wrapped model.
+
+    Document vectors are looked up by content hash in an ``EmbeddingCache``;
+    misses are embedded in one batched call and written back. Query vectors
+    only go through an in-process LRU: asymmetric models embed queries and
+    documents differently, so they must not share persisted entries, and a
+    new query shouldn't cost a database write on the request path.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        provider: Optional[str] = None,
+        query_cache_size: int = QUERY_CACHE_SIZE,
+    ):
+        """
+        Initialize the caching adapter.
+
+        Args:
+            embeddings: Underlying embedding model
+            model: Embedding model name (part of the cache key)
+            provider: Optional embedding provider name, stored for reference
+            query_cache_size: Number of query embeddings kept in memory
+        """
+        self.embeddings = embeddings
+        self.cache = EmbeddingCache(model=model, provider=provider)
+        self._cached_query = functools.lru_cache(maxsize=query_cache_size)(self._embed_query_uncached)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for previously seen text."""
+        if not texts:
+            return []
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(hashes)
+
+        missing: Dict[str, str] = {}
+        for text, h in zip(texts, hashes):
+            if h not in vectors:
+                missing.setdefault(h, text)
+        if missing:
+            fresh = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), fresh))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        logger.debug("Embedding cache: %d/%d hits", len(texts) - len(missing), len(texts))
+        return [vectors[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the vector of a recent identical query."""
+        return list(self._cached_query(text))
+
+    def _embed_query_uncached(self, text: str) -> Tuple[float, ...]:
+        return tuple(self.embeddings.embed_query(text))
@@ -1,8 +1,15 @@
 """Hypothetical Document Embeddings (HyDE) for query transformation."""
 
+import asyncio
+import atexit
 import logging
-from typing import Optional, Dict, Any
+import shelve
+import threading
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Tuple
 
+import httpx
+import numpy as np
 from langchain_openai import ChatOpenAI
 from langchain_community.chat_models import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -11,6 +18,281 @@ from app.config import config
 
 logger = logging.getLogger(__name__)
 
+__all__ = [
+    "HyDEQueryTransformer",
+    "QueryExpansion",
+    "SemanticQueryCache",
+    "get_shared_llm",
+]
+
+# Static instructions are sent as a separate system message so the prefix is
+# byte-identical across calls and eligible for provider-side prompt caching.
+HYDE_SYSTEM_PROMPT = """You are an expert at understanding information needs. Given a user's question, generate a hypothetical document that would be an ideal answer to that question.
+
+The hypothetical document should:
+1. Contain the key information the user is seeking
+2. Use terminology and concepts relevant to the query
+3. Be written in a natural, document-like format
+4. Be concise (2-3 paragraphs, ~200-300 words)"""
+
+HYDE_QUERY_TEMPLATE = """User Question: {query}
+
+Generate the hypothetical ideal document that answers this question:"""
+
+EXPANSION_SYSTEM_PROMPT = """You are an expert at expanding job search queries with related terms, synonyms, and variations.
+
+Given a job search query, generate related terms that would help find relevant results. Include:
+1. Synonyms and alternative phrasings
+2. Related job titles (if applicable)
+3. Related skills and technologies (if applicable)
+4. Industry-specific terminology
+5. Common abbreviations or expansions"""
+
+EXPANSION_QUERY_TEMPLATE = """Original Query: {query}
+
+Generate 5-8 related terms or phrases (comma-separated, no explanations):"""
+
+# How long Ollama keeps a model (and its prompt KV cache) loaded between calls
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Shared chat model clients keyed by (provider, model, temperature, base_url)
+_llm_clients: Dict[Tuple[str, str, float, str], Any] = {}
+_llm_clients_lock = threading.Lock()
+
+# Keep-alive HTTP pools shared by every OpenAI chat client
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_llm(provider: str, model: str, temperature: float, ollama_base_url: str):
+    """Get or create a chat model client shared across RAG components.
+
+    Thread-safe implementation using double-checked locking pattern.
+    """
+    global _http_client, _http_async_client
+    key = (provider.lower(), model, temperature, ollama_base_url)
+    llm = _llm_clients.get(key)
+    if llm is None:
+        with _llm_clients_lock:
+            # Double-check after acquiring lock
+            llm = _llm_clients.get(key)
+            if llm is None:
+                if key[0] == "ollama":
+                    llm = ChatOllama(
+                        model=model,
+                        temperature=temperature,
+                        base_url=ollama_base_url,
+                        keep_alive=OLLAMA_KEEP_ALIVE,
+                    )
+                else:
+                    if _http_client is None:
+                        _http_client = httpx.Client(limits=_HTTP_LIMITS)
+                        _http_async_client = httpx.AsyncClient(limits=_HTTP_LIMITS)
+                    llm = ChatOpenAI(
+                        model=model,
+                        temperature=temperature,
+                        api_key=config.llm.api_key if config.llm.api_key else None,
+                        http_client=_http_client,
+                        http_async_client=_http_async_client,
+                    )
+                _llm_clients[key] = llm
+    return llm
+
+
+# Shelve files persisting HyDE documents, opened once per process and shared
+# by every transformer (None marks a path that failed to open)
+_persistent_caches: Dict[str, Any] = {}
+_persistent_caches_lock = threading.Lock()
+
+
+def _persistent_cache(cache_path: str):
+    """Open the shelve at ``cache_path`` on first use; the caller holds ``_persistent_caches_lock``."""
+    if cache_path not in _persistent_caches:
+        try:
+            _persistent_caches[cache_path] = shelve.open(cache_path)
+        except Exception as e:
+            logger.warning(f"Could not open HyDE cache at {cache_path}: {e}")
+            _persistent_caches[cache_path] = None
+    return _persistent_caches[cache_path]
+
+
+def _persistent_cache_get(cache_path: str, query: str) -> Optional[str]:
+    """Look up a persisted HyDE document."""
+    with _persistent_caches_lock:
+        cache = _persistent_cache(cache_path)
+        return cache.get(query) if cache is not None else None
+
+
+def _persistent_cache_put(cache_path: str, query: str, hyde_document: str) -> None:
+    """Persist a HyDE document."""
+    with _persistent_caches_lock:
+        cache = _persistent_cache(cache_path)
+        if cache is not None:
+            cache[query] = hyde_document
+            cache.sync()
+
+
+@atexit.register
+def _close_persistent_caches() -> None:
+    """Flush and close the shared shelve files at interpreter exit."""
+    with _persistent_caches_lock:
+        for cache in _persistent_caches.values():
+            if cache is not None:
+                cache.close()
+        _persistent_caches.clear()
+
+
+# Upper bound on concurrent LLM calls when transforming a batch of queries
+MAX_CONCURRENT_LLM_CALLS = 8
+
+
+def _run_concurrently(async_fn, sync_fn, queries: List[str]) -> List[str]:
+    """
+    Apply ``async_fn`` to all queries concurrently from synchronous code.
+    
+    Falls back to calling ``sync_fn`` sequentially when already inside a running
+    event loop, where callers should await the async variant instead.
+    """
+    if len(queries) <= 1:
+        return [sync_fn(query) for query in queries]
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(async_fn(queries))
+    return [sync_fn(query) for query in queries]
+
+
+def _batch_invoke(llm, message_lists: List[list]) -> List[Any]:
+    """
+    Send several prompts through the chat model's native ``batch`` API.
+    
+    LangChain dispatches the calls concurrently over the client's pooled
+    connections. Failed prompts come back as exception instances rather than
+    aborting the whole batch. Raises AttributeError for models without ``batch``.
+    """
+    return llm.batch(
+        message_lists,
+        config={"max_concurrency": MAX_CONCURRENT_LLM_CALLS},
+        return_exceptions=True,
+    )
+
+
+def _split_template(template: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a prompt template into (prefix, suffix) around its ``{query}`` field.
+    
+    Returns None when the template has anything other than exactly one
+    ``{query}`` placeholder (other fields, escaped braces), in which case it
+    must be rendered with ``str.format_map``.
+    """
+    prefix, sep, suffix = template.partition("{query}")
+    if not sep or any(c in prefix or c in suffix for c in "{}"):
+        return None
+    return prefix, suffix
+
+
+def _best_match(matrix: np.ndarray, vector: np.ndarray) -> Tuple[int, float]:
+    """Return (row index, cosine score) of the row most similar to a unit vector."""
+    scores = matrix @ vector
+    idx = int(np.argmax(scores))
+    return idx, float(scores[idx])
+
+
+async def _gather_bounded(fn, queries: List[str], max_concurrency: int) -> List[str]:
+    """Await ``fn`` for every query with at most ``max_concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run(query: str) -> str:
+        async with semaphore:
+            return await fn(query)
+    
+    return list(await asyncio.gather(*(run(query) for query in queries)))
+
+
+class SemanticQueryCache:
+    """
+    Bounded cache mapping query embeddings to previously generated values.
+    
+    Embeddings are bucketed with random-projection LSH (one sign bit per
+    hyperplane). A lookup probes the query's bucket plus every bucket one bit
+    away and returns the value of the most similar stored query when its cosine
+    similarity reaches the threshold. Oldest entries are evicted first.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        threshold: float = 0.95,
+        n_bits: int = 8,
+        seed: int = 0,
+    ):
+        """
+        Initialize semantic cache.
+        
+        Args:
+            max_entries: Maximum number of cached entries
+            threshold: Minimum cosine similarity for a cache hit
+            n_bits: Number of LSH hyperplanes (bucket key width, at most 64)
+            seed: Seed for the random hyperplanes
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.n_bits = n_bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None  # (n_bits, dim), created on first use
+        # bucket key -> (unit vectors matrix (n, dim), values)
+        self._buckets: Dict[int, Tuple[np.ndarray, List[str]]] = {}
+        self._order: deque = deque()  # bucket keys in insertion order
+    
+    def _normalize(self, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _bucket_key(self, vector: np.ndarray) -> int:
+        if self._planes is None:
+            self._planes = self._rng.standard_normal((self.n_bits, vector.shape[0])).astype(np.float32)
+        bits = np.packbits(self._planes @ vector > 0, bitorder="little")
+        return int.from_bytes(bits.tobytes(), "little")
+    
+    def get(self, embedding: List[float]) -> Optional[str]:
+        """Return the cached value for the most similar stored query, if any."""
+        if not self._buckets:
+            return None
+        vector = self._normalize(embedding)
+        key = self._bucket_key(vector)
+        
+        best_score = self.threshold
+        best_value = None
+        for probe in [key] + [key ^ (1 << bit) for bit in range(self.n_bits)]:
+            bucket = self._buckets.get(probe)
+            if bucket is None:
+                continue
+            matrix, values = bucket
+            idx, score = _best_match(matrix, vector)
+            if score >= best_score:
+                best_score = score
+                best_value = values[idx]
+        return best_value
+    
+    def put(self, embedding: List[float], value: str) -> None:
+        """Store a value under a query embedding."""
+        vector = self._normalize(embedding)
+        key = self._bucket_key(vector)
+        
+        matrix, values = self._buckets.get(key, (np.empty((0, vector.shape[0]), dtype=np.float32), []))
+        self._buckets[key] = (np.ascontiguousarray(np.vstack([matrix, vector])), values + [value])
+        self._order.append(key)
+        
+        while len(self._order) > self.max_entries:
+            oldest = self._order.popleft()
+            matrix, values = self._buckets[oldest]
+            if len(values) <= 1:
+                del self._buckets[oldest]
+            else:
+                self._buckets[oldest] = (matrix[1:], values[1:])
+
 
 class HyDEQueryTransformer:
     """
@@ -24,6 +306,10 @@ class HyDEQueryTransformer:
         llm=None,
         use_hyde: bool = True,
         hyde_template: Optional[str] = None,
+        embeddings=None,
+        cache_size: int = 1024,
+        semantic_cache_threshold: float = 0.95,
+        cache_path: Optional[str] = None,
     ):
         """
         Initialize HyDE query transformer.
@@ -32,10 +318,34 @@ class HyDEQueryTransformer:
             llm: Optional LLM instance (will be initialized if not provided)
             use_hyde: Whether to enable HyDE transformation
             hyde_template: Optional custom prompt template
+            embeddings: Optional embeddings model enabling the semantic cache tier
+            cache_size: Maximum entries in the exact and semantic caches
+            semantic_cache_threshold: Minimum cosine similarity for a semantic cache hit
+            cache_path: Optional shelve file persisting generated documents across
+                restarts (defaults to rag.hyde.cache_path in config)
         """
         self.use_hyde = use_hyde
         self.hyde_template = hyde_template or self._default_template()
+        # Custom templates are sent as a single message; the default one is split
+        self._system_prompt = HYDE_SYSTEM_PROMPT if hyde_template is None else None
+        self._query_template = HYDE_QUERY_TEMPLATE if hyde_template is None else self.hyde_template
+        self._template_parts = _split_template(self._query_template)
         self.llm = llm
+        self.embeddings = embeddings
+        
+        # Exact-match tier (LRU, guarded by _cache_lock); failures are never cached
+        self._cache_size = cache_size
+        self._exact_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._semantic_cache = SemanticQueryCache(
+            max_entries=cache_size,
+            threshold=semantic_cache_threshold,
+        )
+        self._cache_lock = threading.Lock()
+        
+        if cache_path is None:
+            cache_path = config.yaml_config.get("rag", {}).get("hyde", {}).get("cache_path")
+        # The shelve itself is opened on first use and shared process-wide
+        self._cache_path = cache_path or None
         
         if self.llm is None and self.use_hyde:
             self._initialize_llm()
@@ -49,18 +359,7 @@ class HyDEQueryTransformer:
             temperature = default_llm.get("temperature", 0.7)
             ollama_base_url = default_llm.get("ollama_base_url", "http://localhost:11434")
             
-            if provider.lower() == "ollama":
-                self.llm = ChatOllama(
-                    model=model,
-                    temperature=temperature,
-                    base_url=ollama_base_url,
-                )
-            else:
-                self.llm = ChatOpenAI(
-                    model=model,
-                    temperature=temperature,
-                    api_key=config.llm.api_key if config.llm.api_key else None,
-                )
+            self.llm = get_shared_llm(provider, model, temperature, ollama_base_url)
             
             logger.info(f"Initialized HyDE LLM: {provider}/{model}")
         except Exception as e:
@@ -69,17 +368,7 @@ class HyDEQueryTransformer:
     
     def _default_template(self) -> str:
         """Default prompt template for HyDE generation."""
-        return """You are an expert at understanding information needs. Given a user's question, generate a hypothetical document that would be an ideal answer to that question.
-
-The hypothetical document should:
-1. Contain the key information the user is seeking
-2. Use terminology and concepts relevant to the query
-3. Be written in a natural, document-like format
-4. Be concise (2-3 paragraphs, ~200-300 words)
-
-User Question: {query}
-
-Generate the hypothetical ideal document that answers this question:"""
+        return f"{HYDE_SYSTEM_PROMPT}\n\n{HYDE_QUERY_TEMPLATE}"
     
     def transform_query(self, query: str) -> str:
         """
@@ -96,22 +385,124 @@ Generate the hypothetical ideal document that answers this question:"""
             return query
         
         try:
-            # Generate hypothetical document
-            prompt = self.hyde_template.format(query=query)
-            
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            hyde_document = response.content.strip()
-            
-            logger.debug(f"HyDE transformation: {len(query)} chars -> {len(hyde_document)} chars")
-            logger.debug(f"HyDE document preview: {hyde_document[:200]}...")
-            
-            # Use the hypothetical document as the search query
-            return hyde_document
-            
+            return self._cached_transform(query)
         except Exception as e:
             logger.warning(f"HyDE transformation failed: {e}, using original query")
             return query
     
+    def _cached_transform(self, query: str) -> str:
+        """Resolve a query through the exact-match cache, generating on a miss."""
+        hyde_document = self._exact_get(query)
+        if hyde_document is None:
+            hyde_document = self._transform_uncached(query)
+            self._exact_put(query, hyde_document)
+        return hyde_document
+    
+    def _exact_get(self, query: str) -> Optional[str]:
+        """Look a query up in the exact-match cache."""
+        with self._cache_lock:
+            hyde_document = self._exact_cache.get(query)
+            if hyde_document is not None:
+                self._exact_cache.move_to_end(query)
+            return hyde_document
+    
+    def _exact_put(self, query: str, hyde_document: str) -> None:
+        """Remember a resolved query in the exact-match cache."""
+        with self._cache_lock:
+            self._exact_cache[query] = hyde_document
+            self._exact_cache.move_to_end(query)
+            if len(self._exact_cache) > self._cache_size:
+                self._exact_cache.popitem(last=False)
+    
+    def _transform_uncached(self, query: str) -> str:
+        """Resolve a query that missed the exact-match cache."""
+        cached, query_embedding = self._lookup(query)
+        if cached is not None:
+            return cached
+        
+        hyde_document = self._generate(query)
+        self._store(query, query_embedding, hyde_document)
+        return hyde_document
+    
+    def _lookup(self, query: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Check the persistent and semantic caches, returning (hit, query embedding)."""
+        if self._cache_path is not None:
+            cached = _persistent_cache_get(self._cache_path, query)
+            if cached is not None:
+                return cached, None
+        
+        if self.embeddings is None:
+            return None, None
+        try:
+            query_embedding = self.embeddings.embed_query(query)
+            with self._cache_lock:
+                cached = self._semantic_cache.get(query_embedding)
+            if cached is not None:
+                logger.debug("HyDE semantic cache hit")
+            return cached, query_embedding
+        except Exception as e:
+            logger.debug("HyDE semantic cache lookup failed: %s", e)
+            return None, None
+    
+    def _store(self, query: str, query_embedding: Optional[List[float]], hyde_document: str) -> None:
+        """Record a freshly generated document in the semantic and persistent caches."""
+        if query_embedding is not None:
+            with self._cache_lock:
+                self._semantic_cache.put(query_embedding, hyde_document)
+        if self._cache_path is not None:
+            _persistent_cache_put(self._cache_path, query, hyde_document)
+    
+    def _build_messages(self, query: str) -> list:
+        """Build chat messages with the static instructions as a cacheable prefix."""
+        messages = [SystemMessage(content=self._system_prompt)] if self._system_prompt else []
+        if self._template_parts is not None:
+            prompt = self._template_parts[0] + query + self._template_parts[1]
+        else:
+            prompt = self._query_template.format_map({"query": query})
+        messages.append(HumanMessage(content=prompt))
+        return messages
+    
+    def _generate(self, query: str) -> str:
+        """Generate the hypothetical document with the LLM."""
+        response = self.llm.invoke(self._build_messages(query))
+        hyde_document = response.content.strip()
+        
+        logger.debug("HyDE transformation: %d chars -> %d chars", len(query), len(hyde_document))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("HyDE document preview: %s...", hyde_document[:200])
+        
+        # Use the hypothetical document as the search query
+        return hyde_document
+    
+    async def atransform_query(self, query: str) -> str:
+        """
+        Transform query using HyDE without blocking the event loop.
+        
+        Args:
+            query: Original user query
+            
+        Returns:
+            Transformed query (hypothetical document or original if HyDE fails)
+        """
+        return await asyncio.to_thread(self.transform_query, query)
+    
+    async def atransform_queries(
+        self,
+        queries: list[str],
+        max_concurrency: int = MAX_CONCURRENT_LLM_CALLS,
+    ) -> list[str]:
+        """
+        Transform multiple queries concurrently.
+        
+        Args:
+            queries: List of original queries
+            max_concurrency: Maximum number of LLM calls in flight
+            
+        Returns:
+            List of transformed queries (same order as input)
+        """
+        return await _gather_bounded(self.atransform_query, queries, max_concurrency)
+    
     def transform_queries(self, queries: list[str]) -> list[str]:
         """
         Transform multiple queries using HyDE.
@@ -122,7 +513,40 @@ Generate the hypothetical ideal document that answers this question:"""
         Returns:
             List of transformed queries
         """
-        return [self.transform_query(query) for query in queries]
+        if not self.use_hyde or not self.llm or len(queries) <= 1:
+            return [self.transform_query(query) for query in queries]
+        
+        results: Dict[str, str] = {}
+        misses: Dict[str, Optional[List[float]]] = {}
+        for query in dict.fromkeys(queries):
+            cached = self._exact_get(query)
+            if cached is not None:
+                results[query] = cached
+                continue
+            cached, query_embedding = self._lookup(query)
+            if cached is not None:
+                self._exact_put(query, cached)
+                results[query] = cached
+            else:
+                misses[query] = query_embedding
+        
+        if misses:
+            try:
+                responses = _batch_invoke(self.llm, [self._build_messages(q) for q in misses])
+            except AttributeError:
+                return _run_concurrently(self.atransform_queries, self.transform_query, queries)
+            
+            for (query, query_embedding), response in zip(misses.items(), responses):
+                if isinstance(response, Exception):
+                    logger.warning(f"HyDE transformation failed: {response}, using original query")
+                    results[query] = query
+                    continue
+                hyde_document = response.content.strip()
+                self._store(query, query_embedding, hyde_document)
+                self._exact_put(query, hyde_document)
+                results[query] = hyde_document
+        
+        return [results[query] for query in queries]
 
 
 class QueryExpansion:
@@ -142,6 +566,12 @@ class QueryExpansion:
         """
         self.expand_terms = expand_terms
         self.expansion_template = expansion_template or self._default_expansion_template()
+        # Custom templates are sent as a single message; the default one is split
+        self._system_prompt = EXPANSION_SYSTEM_PROMPT if expansion_template is None else None
+        self._query_template = (
+            EXPANSION_QUERY_TEMPLATE if expansion_template is None else self.expansion_template
+        )
+        self._template_parts = _split_template(self._query_template)
         self.llm = llm
 
         if self.llm is None and self.expand_terms:
@@ -156,18 +586,7 @@ class QueryExpansion:
             temperature = default_llm.get("temperature", 0.3)  # Lower temp for more focused expansions
             ollama_base_url = default_llm.get("ollama_base_url", "http://localhost:11434")
 
-            if provider.lower() == "ollama":
-                self.llm = ChatOllama(
-                    model=model,
-                    temperature=temperature,
-                    base_url=ollama_base_url,
-                )
-            else:
-                self.llm = ChatOpenAI(
-                    model=model,
-                    temperature=temperature,
-                    api_key=config.llm.api_key if config.llm.api_key else None,
-                )
+            self.llm = get_shared_llm(provider, model, temperature, ollama_base_url)
 
             logger.info(f"Initialized Query Expansion LLM: {provider}/{model}")
         except Exception as e:
@@ -176,18 +595,17 @@ class QueryExpansion:
 
     def _default_expansion_template(self) -> str:
         """Default prompt template for query expansion."""
-        return """You are an expert at expanding job search queries with related terms, synonyms, and variations.
-
-Given a job search query, generate related terms that would help find relevant results. Include:
-1. Synonyms and alternative phrasings
-2. Related job titles (if applicable)
-3. Related skills and technologies (if applicable)
-4. Industry-specific terminology
-5. Common abbreviations or expansions
-
-Original Query: {query}
-
-Generate 5-8 related terms or phrases (comma-separated, no explanations):"""
+        return f"{EXPANSION_SYSTEM_PROMPT}\n\n{EXPANSION_QUERY_TEMPLATE}"
+
+    def _build_messages(self, query: str) -> list:
+        """Build chat messages with the static instructions as a cacheable prefix."""
+        messages = [SystemMessage(content=self._system_prompt)] if self._system_prompt else []
+        if self._template_parts is not None:
+            prompt = self._template_parts[0] + query + self._template_parts[1]
+        else:
+            prompt = self._query_template.format_map({"query": query})
+        messages.append(HumanMessage(content=prompt))
+        return messages
 
     def expand_query(self, query: str) -> str:
         """
@@ -205,16 +623,14 @@ Generate 5-8 related terms or phrases (comma-separated, no explanations):"""
 
         try:
             # Generate related terms
-            prompt = self.expansion_template.format(query=query)
-
-            response = self.llm.invoke([HumanMessage(content=prompt)])
+            response = self.llm.invoke(self._build_messages(query))
             related_terms = response.content.strip()
 
             # Combine original query with related terms
             expanded_query = f"{query} {related_terms}"
 
-            logger.debug(f"Query expansion: '{query}' -> added {len(related_terms)} chars of related terms")
-            logger.debug(f"Expanded query: {expanded_query}")
+            logger.debug("Query expansion: '%s' -> added %d chars of related terms", query, len(related_terms))
+            logger.debug("Expanded query: %s", expanded_query)
 
             return expanded_query
 
@@ -222,6 +638,35 @@ Generate 5-8 related terms or phrases (comma-separated, no explanations):"""
             logger.warning(f"Query expansion failed: {e}, using original query")
             return query
 
+    async def aexpand_query(self, query: str) -> str:
+        """
+        Expand query without blocking the event loop.
+
+        Args:
+            query: Original query
+
+        Returns:
+            Expanded query with original + related terms
+        """
+        return await asyncio.to_thread(self.expand_query, query)
+
+    async def aexpand_queries(
+        self,
+        queries: list[str],
+        max_concurrency: int = MAX_CONCURRENT_LLM_CALLS,
+    ) -> list[str]:
+        """
+        Expand multiple queries concurrently.
+
+        Args:
+            queries: List of original queries
+            max_concurrency: Maximum number of LLM calls in flight
+
+        Returns:
+            List of expanded queries (same order as input)
+        """
+        return await _gather_bounded(self.aexpand_query, queries, max_concurrency)
+
     def expand_queries(self, queries: list[str]) -> list[str]:
         """
         Expand multiple queries.
@@ -232,4 +677,20 @@ Generate 5-8 related terms or phrases (comma-separated, no explanations):"""
         Returns:
             List of expanded queries
         """
-        return [self.expand_query(query) for query in queries]
+        if not self.expand_terms or not self.llm or len(queries) <= 1:
+            return [self.expand_query(query) for query in queries]
+
+        unique = list(dict.fromkeys(queries))
+        try:
+            responses = _batch_invoke(self.llm, [self._build_messages(q) for q in unique])
+        except AttributeError:
+            return _run_concurrently(self.aexpand_queries, self.expand_query, queries)
+
+        expanded: Dict[str, str] = {}
+        for query, response in zip(unique, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"Query expansion failed: {response}, using original query")
+                expanded[query] = query
+            else:
+                expanded[query] = f"{query} {response.content.strip()}"
+        return [expanded[query] for query in queries]
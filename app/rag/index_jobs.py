@@ -1,8 +1,11 @@
 """Utility script to index job descriptions into the vector store."""
 
+import asyncio
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -16,6 +19,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Chunks coalesced into a single vector store write
+WRITE_BATCH_SIZE = 512
+# Rows fetched per round trip while streaming jobs from the database
+FETCH_BATCH_SIZE = 100
+
+
+async def index_jobs_async(
+    rag_service: JobRAGService,
+    limit: Optional[int] = None,
+    job_ids: Optional[List[int]] = None,
+    workers: int = 4,
+    batch_size: int = WRITE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Index jobs with a pipelined producer/worker/writer layout.
+    
+    A producer streams jobs from the database, ``workers`` chunk and embed them
+    concurrently, and a single writer coalesces chunks into vector store batches,
+    so database reads, embedding and writes overlap instead of running serially.
+    Blocking calls run on a thread pool via ``run_in_executor``; every stage is
+    a task on the event loop, so cancellation (e.g. Ctrl-C) or a failing stage
+    stops the whole pipeline.
+    
+    Args:
+        rag_service: JobRAGService whose session and vector store are used
+        limit: Optional limit on number of jobs to index
+        job_ids: Optional list of specific job IDs to index
+        workers: Number of concurrent chunking workers
+        batch_size: Number of chunks per vector store write
+        
+    Returns:
+        Dictionary with indexing results
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers + 2, thread_name_prefix="index-jobs")
+    job_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 4)
+    doc_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 4)
+    results = {
+        "total": 0,
+        "success": 0,
+        "failed": 0,
+        "errors": [],
+    }
+    
+    async def produce():
+        """Stream jobs from the database, fetching each row on an executor thread."""
+        query = rag_service.jobs_to_index(limit=limit, job_ids=job_ids)
+        rows = iter(query.yield_per(FETCH_BATCH_SIZE))
+        while (job := await loop.run_in_executor(executor, next, rows, None)) is not None:
+            await job_queue.put(job)
+        for _ in range(workers):
+            await job_queue.put(None)
+    
+    async def chunk_worker():
+        while True:
+            job = await job_queue.get()
+            if job is None:
+                break
+            results["total"] += 1
+            try:
+                chunks, ids = await loop.run_in_executor(executor, rag_service.chunk_job, job)
+            except Exception as e:
+                results["failed"] += 1
+                results["errors"].append({"job_id": job.id, "error": str(e)})
+                continue
+            if not chunks:
+                results["failed"] += 1
+                continue
+            await doc_queue.put((job.id, chunks, ids))
+        await doc_queue.put(None)
+    
+    async def writer():
+        pending_jobs: List[int] = []
+        documents = []
+        ids: List[str] = []
+        
+        async def flush():
+            errors = await loop.run_in_executor(
+                executor, rag_service.write_index_batch, documents, ids, pending_jobs,
+            )
+            results["failed" if errors else "success"] += len(pending_jobs)
+            results["errors"].extend(errors)
+            pending_jobs.clear()
+            documents.clear()
+            ids.clear()
+        
+        finished_workers = 0
+        while finished_workers < workers:
+            item = await doc_queue.get()
+            if item is None:
+                finished_workers += 1
+                continue
+            job_id, chunks, chunk_ids = item
+            pending_jobs.append(job_id)
+            documents.extend(chunks)
+            ids.extend(chunk_ids)
+            if len(documents) >= batch_size:
+                await flush()
+        if documents:
+            await flush()
+    
+    tasks = [
+        asyncio.ensure_future(produce()),
+        *(asyncio.ensure_future(chunk_worker()) for _ in range(workers)),
+        asyncio.ensure_future(writer()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # A failed stage leaves the others blocked on their queues
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    logger.info(
+        f"Indexing complete: {results['success']} succeeded, "
+        f"{results['failed']} failed out of {results['total']}"
+    )
+    return results
+
 
 def index_jobs(limit: int = None, job_ids: list = None):
     """
@@ -36,15 +160,11 @@ def index_jobs(limit: int = None, job_ids: list = None):
         rag_service = JobRAGService(db=db)
         
         if job_ids:
-            # Index specific jobs
-            from app.models import Job
-            jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
-            logger.info(f"Indexing {len(jobs)} specific jobs: {job_ids}")
-            results = rag_service.index_jobs(jobs)
+            logger.info(f"Indexing specific jobs: {job_ids}")
         else:
-            # Index all jobs
             logger.info(f"Indexing all jobs" + (f" (limit: {limit})" if limit else ""))
-            results = rag_service.index_all_jobs(limit=limit)
+        
+        results = asyncio.run(index_jobs_async(rag_service, limit=limit, job_ids=job_ids))
         
         # Print results
         logger.info("=" * 60)
@@ -61,6 +181,10 @@ def index_jobs(limit: int = None, job_ids: list = None):
         
         logger.info("=" * 60)
         
+        # Retrain the compressed ANN index (if enabled) on the freshly loaded corpus
+        if results['success'] and rag_service.vector_store.rebuild_ann_index():
+            logger.info("Rebuilt FAISS ANN index")
+        
         # Get vector store stats
         stats = rag_service.vector_store.get_collection_stats()
         logger.info(f"Vector store now contains {stats.get('document_count', 0)} documents")
@@ -93,4 +217,10 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
+    try:
+        import uvloop  # Optional faster event loop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     index_jobs(limit=args.limit, job_ids=args.job_ids)
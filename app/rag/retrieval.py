@@ -1,13 +1,23 @@
 """Two-stage retrieval system with re-ranker for advanced RAG."""
 
+import itertools
 import logging
+import threading
+from contextlib import nullcontext
 from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
 from langchain_core.documents import Document
 
+from app.config import config
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on (query, document) pairs per cross-encoder forward pass
+MAX_RERANK_BATCH_SIZE = 64
+
 
 @dataclass
 class RetrievalResult:
@@ -18,6 +28,41 @@ class RetrievalResult:
     final_score: Optional[float] = None
 
 
+def _top_k(
+    documents: List[Tuple[Document, float]],
+    scores: np.ndarray,
+    top_k: int,
+    min_score: Optional[float] = None,
+) -> List[Tuple[Document, float]]:
+    """
+    Pick the ``top_k`` highest-scoring documents at or above ``min_score``.
+    
+    Selection runs on the score array (argpartition, then a stable sort of
+    the k survivors), so no per-document Python objects are created.
+    """
+    candidates = np.arange(len(documents)) if min_score is None else np.flatnonzero(scores >= min_score)
+    if len(candidates) > top_k:
+        candidates = np.sort(candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]])
+    top = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(documents[i][0], float(scores[i])) for i in top]
+
+
+def merge_candidates(*candidate_lists: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+    """
+    Merge stage-1 candidate lists from several searches of the same collection.
+    
+    Documents are deduplicated by ID (falling back to their content when the
+    store returned no ID), keeping the smallest distance, and the result is
+    sorted by distance (lower is better).
+    """
+    best: Dict[Any, Tuple[Document, float]] = {}
+    for doc, score in itertools.chain.from_iterable(candidate_lists):
+        key = getattr(doc, "id", None) or doc.page_content
+        if key not in best or score < best[key][1]:
+            best[key] = (doc, score)
+    return sorted(best.values(), key=lambda item: item[1])
+
+
 class Reranker:
     """Base class for re-ranking retrieved documents."""
     
@@ -25,7 +70,8 @@ class Reranker:
         self,
         query: str,
         documents: List[Tuple[Document, float]],
-        top_k: int = 5
+        top_k: int = 5,
+        min_score: Optional[float] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Re-rank documents based on query relevance.
@@ -34,6 +80,7 @@ class Reranker:
             query: Search query
             documents: List of (Document, vector_score) tuples
             top_k: Number of top documents to return
+            min_score: Optional minimum rerank score for a document to be returned
             
         Returns:
             List of (Document, rerank_score) tuples sorted by relevance
@@ -51,6 +98,8 @@ class CrossEncoderReranker(Reranker):
         self,
         model_name: str = "BAAI/bge-reranker-base",
         device: Optional[str] = None,
+        backend: Optional[str] = None,
+        onnx_file_name: Optional[str] = None,
     ):
         """
         Initialize cross-encoder re-ranker.
@@ -58,14 +107,31 @@ class CrossEncoderReranker(Reranker):
         Args:
             model_name: Name of the reranker model
             device: Device to run model on ('cpu', 'cuda', etc.)
+            backend: Inference backend: 'torch', 'onnx' or 'openvino'
+                (defaults to config rag.retrieval.reranker_backend)
+            onnx_file_name: ONNX file within the model repo to load, e.g. an INT8
+                export such as 'onnx/model_qint8_avx512.onnx'
+                (defaults to config rag.retrieval.reranker_onnx_file)
         """
+        retrieval_config = config.yaml_config.get("rag", {}).get("retrieval", {})
         self.model_name = model_name
         self.device = device
+        self._autocast: Optional[Tuple[str, Any]] = None  # (device type, dtype) for predict
+        self._tokenizer = None  # set when the torch model can be called directly
+        self.backend = backend or retrieval_config.get("reranker_backend", "torch")
+        onnx_file_name = onnx_file_name or retrieval_config.get("reranker_onnx_file")
         
         try:
             from sentence_transformers import CrossEncoder
-            self.model = CrossEncoder(model_name, device=device)
-            logger.info(f"Initialized CrossEncoder re-ranker: {model_name}")
+            self.model = self._load_model(CrossEncoder, onnx_file_name)
+            if self.backend == "torch":
+                # Older sentence-transformers only move the weights inside predict(),
+                # which _predict_tokenized bypasses
+                device = getattr(self.model, "device", None) or getattr(self.model, "_target_device", "cpu")
+                self.model.model.to(device).eval()
+                self._configure_precision()
+                self._tokenizer = getattr(self.model, "tokenizer", None)
+            logger.info(f"Initialized CrossEncoder re-ranker: {model_name} ({self.backend})")
         except ImportError:
             logger.warning("sentence-transformers not available, using LLM-based reranking")
             self.model = None
@@ -73,11 +139,117 @@ class CrossEncoderReranker(Reranker):
             logger.error(f"Failed to initialize CrossEncoder: {e}")
             self.model = None
     
+    def _configure_precision(self) -> None:
+        """Run the torch model in reduced precision where the hardware supports it."""
+        import torch
+        
+        device = str(getattr(self.model, "device", None) or getattr(self.model, "_target_device", "cpu"))
+        if device.startswith("cuda"):
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            self.model.model.to(dtype=dtype)
+            self._autocast = ("cuda", dtype)
+            return
+        
+        try:
+            # True on CPUs with native bf16 support (e.g. AVX512-BF16 / AMX)
+            if torch.ops.mkldnn._is_mkldnn_bf16_supported():
+                self._autocast = ("cpu", torch.bfloat16)
+        except Exception:
+            pass
+    
+    def _predict(self, query: str, texts: List[str]) -> np.ndarray:
+        """Score ``query`` against each text, returning a float32 NumPy array."""
+        if self._tokenizer is not None:
+            return self._predict_tokenized(query, texts)
+        
+        pairs = [[query, text] for text in texts]
+        batch_size = min(len(pairs), MAX_RERANK_BATCH_SIZE)
+        if self._autocast is None:
+            return self.model.predict(
+                pairs,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+        
+        import torch
+        
+        device_type, dtype = self._autocast
+        with torch.inference_mode(), torch.autocast(device_type, dtype=dtype):
+            scores = self.model.predict(
+                pairs,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_tensor=True,
+            )
+        # NumPy has no bfloat16, so upcast before converting
+        return scores.float().cpu().numpy()
+    
+    def _predict_tokenized(self, query: str, texts: List[str]) -> np.ndarray:
+        """
+        Score texts by tokenizing each mini-batch in one call and running the model directly.
+        
+        Skips ``CrossEncoder.predict``'s pair collation and DataLoader; the fast
+        tokenizer encodes every (query, text) pair of a batch in a single call.
+        """
+        import torch
+        
+        model = self.model
+        device = getattr(model, "device", None) or getattr(model, "_target_device", "cpu")
+        max_length = getattr(model, "max_length", None) or 512
+        # Same activation predict() applies (sigmoid for single-logit models)
+        activation = getattr(model, "activation_fn", None) or getattr(model, "default_activation_function", None)
+        autocast = torch.autocast(self._autocast[0], dtype=self._autocast[1]) if self._autocast else nullcontext()
+        
+        scores = []
+        with torch.inference_mode(), autocast:
+            for start in range(0, len(texts), MAX_RERANK_BATCH_SIZE):
+                batch = texts[start:start + MAX_RERANK_BATCH_SIZE]
+                features = self._tokenizer(
+                    [query] * len(batch),
+                    batch,
+                    padding=True,
+                    truncation=True,
+                    max_length=max_length,
+                    return_tensors="pt",
+                ).to(device)
+                logits = model.model(**features, return_dict=True).logits
+                if activation is not None:
+                    logits = activation(logits)
+                scores.append(logits[:, 0])
+        # NumPy has no bfloat16, so upcast before converting
+        return torch.cat(scores).float().cpu().numpy()
+    
+    def _load_model(self, cross_encoder_cls, onnx_file_name: Optional[str]):
+        """Load the cross-encoder on the configured backend, falling back to torch."""
+        if self.backend == "torch":
+            return cross_encoder_cls(self.model_name, device=self.device)
+        
+        model_kwargs = {}
+        if self.backend == "onnx":
+            if onnx_file_name:
+                model_kwargs["file_name"] = onnx_file_name
+            if self.device and self.device.startswith("cuda"):
+                model_kwargs["provider"] = "CUDAExecutionProvider"
+        try:
+            return cross_encoder_cls(
+                self.model_name,
+                device=self.device,
+                backend=self.backend,
+                model_kwargs=model_kwargs,
+            )
+        except (ImportError, TypeError) as e:
+            # TypeError: sentence-transformers < 4.1 has no backend argument
+            logger.warning(f"CrossEncoder backend '{self.backend}' unavailable ({e}), using torch")
+            self.backend = "torch"
+            return cross_encoder_cls(self.model_name, device=self.device)
+    
     def rerank(
         self,
         query: str,
         documents: List[Tuple[Document, float]],
-        top_k: int = 5
+        top_k: int = 5,
+        min_score: Optional[float] = None,
     ) -> List[Tuple[Document, float]]:
         """Re-rank using cross-encoder model."""
         if not documents:
@@ -85,71 +257,86 @@ class CrossEncoderReranker(Reranker):
         
         if self.model is None:
             # Fallback to LLM-based reranking
-            return self._llm_rerank(query, documents, top_k)
+            return self._llm_rerank(query, documents, top_k, min_score)
         
         try:
-            # Prepare pairs for cross-encoder
-            pairs = [[query, doc.page_content] for doc, _ in documents]
-            
-            # Compute scores
-            scores = self.model.predict(pairs)
+            # Prepare pairs for cross-encoder, ordered by document length so each
+            # mini-batch pads to a similar length
+            order = sorted(range(len(documents)), key=lambda i: len(documents[i][0].page_content))
+            texts = [documents[i][0].page_content for i in order]
             
-            # Combine documents with scores
-            scored_docs = [
-                RetrievalResult(
-                    document=doc,
-                    vector_score=vec_score,
-                    rerank_score=float(score),
-                    final_score=float(score),  # Use rerank score as final
-                )
-                for (doc, vec_score), score in zip(documents, scores)
-            ]
+            # Compute scores in as few forward passes as possible
+            scores = np.empty(len(documents), dtype=np.float64)
+            scores[order] = self._predict(query, texts)
             
-            # Sort by rerank score (higher is better)
-            scored_docs.sort(key=lambda x: x.rerank_score or 0.0, reverse=True)
-            
-            # Return top k
-            results = [
-                (result.document, result.rerank_score or 0.0)
-                for result in scored_docs[:top_k]
-            ]
+            # Select top k by rerank score (higher is better) without a full sort
+            results = _top_k(documents, scores, top_k, min_score)
             
             logger.debug(f"Re-ranked {len(documents)} documents, returning top {len(results)}")
             return results
             
         except Exception as e:
             logger.error(f"Error in cross-encoder reranking: {e}", exc_info=True)
-            # Fallback: return top k by vector score
-            return sorted(documents, key=lambda x: x[1], reverse=True)[:top_k]
+            # Fallback: return top k by vector score (cosine distance, lower is better);
+            # min_score is on the rerank scale, so it can't be applied to distances
+            return sorted(documents, key=lambda x: x[1])[:top_k]
     
     def _llm_rerank(
         self,
         query: str,
         documents: List[Tuple[Document, float]],
-        top_k: int = 5
+        top_k: int = 5,
+        min_score: Optional[float] = None,
     ) -> List[Tuple[Document, float]]:
         """Fallback LLM-based reranking."""
         # Simple heuristic: combine vector score with keyword match
-        scored_docs = []
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
+        query_hashes = np.unique(np.fromiter(map(hash, query.lower().split()), dtype=np.int64))
+        n_query_words = len(query_hashes)
         
-        for doc, vec_score in documents:
-            doc_lower = doc.page_content.lower()
-            doc_words = set(doc_lower.split())
-            
-            # Keyword overlap score
-            overlap = len(query_words.intersection(doc_words))
-            keyword_score = overlap / len(query_words) if query_words else 0.0
-            
-            # Combined score (weighted average)
-            combined_score = 0.7 * vec_score + 0.3 * keyword_score
-            
-            scored_docs.append((doc, combined_score))
+        # Hash every document's tokens into one flat array, tagged by document index
+        doc_tokens = [doc.page_content.lower().split() for doc, _ in documents]
+        lengths = np.fromiter(map(len, doc_tokens), dtype=np.int64, count=len(documents))
+        token_hashes = np.fromiter(
+            map(hash, itertools.chain.from_iterable(doc_tokens)),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        doc_index = np.repeat(np.arange(len(documents)), lengths)
+        
+        # Keyword overlap score: distinct query words present in each document
+        if n_query_words:
+            matched = np.isin(token_hashes, query_hashes)
+            word_index = np.searchsorted(query_hashes, token_hashes[matched])
+            pairs = np.unique(doc_index[matched] * n_query_words + word_index)
+            overlap = np.bincount(pairs // n_query_words, minlength=len(documents))
+            keyword_scores = overlap / n_query_words
+        else:
+            keyword_scores = np.zeros(len(documents))
         
-        # Sort and return top k
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-        return scored_docs[:top_k]
+        # Combined score (weighted average)
+        vector_scores = np.fromiter((score for _, score in documents), dtype=np.float64, count=len(documents))
+        combined_scores = 0.7 * vector_scores + 0.3 * keyword_scores
+        
+        return _top_k(documents, combined_scores, top_k, min_score)
+
+
+# Shared default reranker so the cross-encoder weights are loaded once per process
+_default_reranker: Optional[CrossEncoderReranker] = None
+_default_reranker_lock = threading.Lock()
+
+
+def get_default_reranker() -> CrossEncoderReranker:
+    """Get or create the shared default CrossEncoderReranker.
+
+    Thread-safe implementation using double-checked locking pattern.
+    """
+    global _default_reranker
+    if _default_reranker is None:
+        with _default_reranker_lock:
+            # Double-check after acquiring lock
+            if _default_reranker is None:
+                _default_reranker = CrossEncoderReranker()
+    return _default_reranker
 
 
 class TwoStageRetriever:
@@ -166,6 +353,7 @@ class TwoStageRetriever:
         stage1_k: int = 50,
         stage2_k: int = 5,
         rerank_threshold: Optional[float] = None,
+        confident_margin: Optional[float] = None,
     ):
         """
         Initialize two-stage retriever.
@@ -176,22 +364,49 @@ class TwoStageRetriever:
             stage1_k: Number of candidates to retrieve in stage 1
             stage2_k: Number of final results to return after reranking
             rerank_threshold: Optional minimum rerank score threshold
+            confident_margin: Re-rank only the top stage-1 candidates when the top
+                candidate's cosine distance beats the k-th candidate's by more than
+                this (defaults to config rag.retrieval.confident_margin; None disables
+                the shortcut)
         """
         self.vector_store = vector_store
-        self.reranker = reranker or CrossEncoderReranker()
+        self.reranker = reranker or get_default_reranker()
         self.stage1_k = stage1_k
         self.stage2_k = stage2_k
         self.rerank_threshold = rerank_threshold
+        if confident_margin is None:
+            confident_margin = config.yaml_config.get("rag", {}).get("retrieval", {}).get("confident_margin")
+        self.confident_margin = confident_margin
         
         logger.info(
             f"Initialized TwoStageRetriever: stage1_k={stage1_k}, stage2_k={stage2_k}"
         )
     
+    def _stage1_is_confident(self, candidates: List[Tuple[Document, float]], final_k: int) -> bool:
+        """
+        Decide whether stage-1 ordering already settles which documents make the top k.
+        
+        Only applies when no rerank threshold has to be enforced. Candidates
+        are sorted by cosine distance (lower is better).
+        """
+        if self.rerank_threshold is not None or self.confident_margin is None:
+            return False
+        if len(candidates) <= final_k:
+            return False
+        distances = np.fromiter((score for _, score in candidates[:final_k]), dtype=np.float64, count=final_k)
+        margin = distances[-1] - distances[0]
+        if margin > self.confident_margin:
+            logger.debug(f"Stage 2 narrowed to top {final_k}: top-1 leads top-{final_k} by {margin:.3f}")
+            return True
+        logger.debug(f"Stage 2 needed: top-1 leads top-{final_k} by {margin:.3f}")
+        return False
+    
     def retrieve(
         self,
         query: str,
         filter: Optional[Dict[str, Any]] = None,
         k: Optional[int] = None,
+        extra_candidates: Optional[List[Tuple[Document, float]]] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Perform two-stage retrieval.
@@ -200,6 +415,9 @@ class TwoStageRetriever:
             query: Search query
             filter: Optional metadata filter for vector search
             k: Optional override for stage2_k
+            extra_candidates: Stage-1 results from another search (e.g. over the
+                raw query when ``query`` is a HyDE document), merged into the
+                candidate pool before re-ranking
             
         Returns:
             List of (Document, score) tuples sorted by relevance
@@ -214,6 +432,8 @@ class TwoStageRetriever:
                 k=self.stage1_k,
                 filter=filter,
             )
+            if extra_candidates:
+                candidates = merge_candidates(candidates, extra_candidates)
             
             if not candidates:
                 logger.warning(f"No candidates retrieved for query: {query}")
@@ -221,21 +441,20 @@ class TwoStageRetriever:
             
             logger.debug(f"Stage 1: Retrieved {len(candidates)} candidates")
             
+            # Even a settled top k goes through the reranker, so results always
+            # carry rerank scores (higher is better) rather than distances
+            if self._stage1_is_confident(candidates, final_k):
+                candidates = candidates[:final_k]
+            
             # Stage 2: Re-rank to narrow down
             logger.debug(f"Stage 2: Re-ranking to top {final_k}")
             reranked = self.reranker.rerank(
                 query=query,
                 documents=candidates,
                 top_k=final_k,
+                min_score=self.rerank_threshold,
             )
             
-            # Apply threshold if specified
-            if self.rerank_threshold is not None:
-                reranked = [
-                    (doc, score) for doc, score in reranked
-                    if score >= self.rerank_threshold
-                ]
-            
             logger.info(
                 f"Retrieval complete: {len(candidates)} candidates -> {len(reranked)} results"
             )
@@ -1,22 +1,28 @@
 """Service layer for RAG operations with job descriptions."""
 
 import logging
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from sqlalchemy.orm import Query, Session
 
 from app.models import Job
 from app.rag import (
     VectorStoreManager,
+    get_vector_store,
     chunk_job_description,
     TwoStageRetriever,
     RAGAgent,
     HyDEQueryTransformer,
 )
-from app.rag.retrieval import CrossEncoderReranker
+from app.rag.retrieval import get_default_reranker
 from langchain_core.documents import Document
 
 logger = logging.getLogger(__name__)
 
+# Chunks pooled across jobs per vector store write in index_jobs
+INDEX_BATCH_SIZE = 512
+# Rows fetched per round trip while streaming jobs in index_all_jobs
+FETCH_BATCH_SIZE = 500
+
 
 class JobRAGService:
     """
@@ -42,14 +48,14 @@ class JobRAGService:
         
         # Initialize vector store if not provided
         if vector_store is None:
-            self.vector_store = VectorStoreManager(collection_name=collection_name)
+            self.vector_store = get_vector_store(collection_name)
         else:
             self.vector_store = vector_store
         
         # Initialize retriever
         self.retriever = TwoStageRetriever(
             vector_store=self.vector_store,
-            reranker=CrossEncoderReranker(),
+            reranker=get_default_reranker(),
             stage1_k=50,
             stage2_k=5,
         )
@@ -58,13 +64,51 @@ class JobRAGService:
         self.rag_agent = RAGAgent(
             vector_store=self.vector_store,
             retriever=self.retriever,
-            hyde_transformer=HyDEQueryTransformer(),
+            hyde_transformer=HyDEQueryTransformer(embeddings=self.vector_store.embeddings),
             max_iterations=3,
             min_relevance_score=0.7,
         )
         
         logger.info("JobRAGService initialized")
     
+    def chunk_job(self, job: Job) -> Tuple[List[Document], List[str]]:
+        """
+        Chunk a job description into vector store documents.
+        
+        Only reads already-loaded column attributes, so it is safe to call from
+        worker threads that do not own the job's session.
+        
+        Args:
+            job: Job model to chunk
+            
+        Returns:
+            Tuple of (chunk documents, chunk IDs); both empty if the job has no description
+        """
+        # Get description text
+        description_text = job.description or job.raw_description or ""
+        
+        if not description_text.strip():
+            logger.warning(f"Job {job.id} has no description to index")
+            return [], []
+        
+        # Chunk the description
+        chunks = chunk_job_description(
+            job_description=description_text,
+            job_id=job.id,
+            job_title=job.title,
+            company=job.company,
+            source=job.source.value if hasattr(job.source, 'value') else str(job.source),
+            posting_date=job.posting_date.isoformat() if job.posting_date else None,
+        )
+        
+        if not chunks:
+            logger.warning(f"No chunks generated for job {job.id}")
+            return [], []
+        
+        # Generate IDs for chunks
+        ids = [f"job_{job.id}_chunk_{i}" for i in range(len(chunks))]
+        return chunks, ids
+    
     def index_job(self, job: Job) -> bool:
         """
         Index a job description in the vector store.
@@ -76,36 +120,12 @@ class JobRAGService:
             True if successful, False otherwise
         """
         try:
-            if not job.description and not job.raw_description:
-                logger.warning(f"Job {job.id} has no description to index")
-                return False
-            
-            # Get description text
-            description_text = job.description or job.raw_description or ""
-            
-            if not description_text.strip():
-                logger.warning(f"Job {job.id} has empty description")
-                return False
-            
-            # Chunk the description
-            chunks = chunk_job_description(
-                job_description=description_text,
-                job_id=job.id,
-                job_title=job.title,
-                company=job.company,
-                source=job.source.value if hasattr(job.source, 'value') else str(job.source),
-                posting_date=job.posting_date.isoformat() if job.posting_date else None,
-            )
-            
+            chunks, ids = self.chunk_job(job)
             if not chunks:
-                logger.warning(f"No chunks generated for job {job.id}")
                 return False
             
-            # Generate IDs for chunks
-            ids = [f"job_{job.id}_chunk_{i}" for i in range(len(chunks))]
-            
-            # Add to vector store
-            self.vector_store.add_documents(
+            # Add to vector store, reusing chunker sentence embeddings when possible
+            self.vector_store.add_documents_with_vectors(
                 documents=chunks,
                 ids=ids,
             )
@@ -117,35 +137,87 @@ class JobRAGService:
             logger.error(f"Error indexing job {job.id}: {e}", exc_info=True)
             return False
     
-    def index_jobs(self, jobs: List[Job]) -> Dict[str, Any]:
+    def write_index_batch(
+        self,
+        chunks: List[Document],
+        ids: List[str],
+        job_ids: List[int],
+    ) -> List[Dict[str, Any]]:
+        """
+        Write the pooled chunks of several jobs with one vector store call.
+        
+        Args:
+            chunks: Chunk documents of all jobs in the batch
+            ids: Chunk IDs (parallel to ``chunks``)
+            job_ids: IDs of the jobs the chunks belong to
+            
+        Returns:
+            One error entry per job if the write failed, otherwise an empty list
+        """
+        try:
+            self.vector_store.add_documents_with_vectors(documents=chunks, ids=ids)
+            return []
+        except Exception as e:
+            logger.error(f"Error indexing batch of {len(job_ids)} jobs: {e}")
+            return [{"job_id": job_id, "error": str(e)} for job_id in job_ids]
+    
+    def index_jobs(self, jobs: Iterable[Job], batch_size: int = INDEX_BATCH_SIZE) -> Dict[str, Any]:
         """
         Index multiple jobs.
         
+        Chunks from consecutive jobs are pooled and written with one vector store
+        call per ``batch_size`` chunks, so embedding runs in large batches
+        instead of once per job. Jobs are never split across writes.
+        
         Args:
-            jobs: List of Job models to index
+            jobs: Job models to index (any iterable, e.g. a streaming query)
+            batch_size: Approximate number of chunks per vector store write
             
         Returns:
             Dictionary with indexing results
         """
         results = {
-            "total": len(jobs),
+            "total": 0,
             "success": 0,
             "failed": 0,
             "errors": [],
         }
         
+        pending_chunks: List[Document] = []
+        pending_ids: List[str] = []
+        pending_jobs: List[int] = []
+        
+        def flush() -> None:
+            if not pending_chunks:
+                return
+            errors = self.write_index_batch(pending_chunks, pending_ids, pending_jobs)
+            results["failed" if errors else "success"] += len(pending_jobs)
+            results["errors"].extend(errors)
+            pending_chunks.clear()
+            pending_ids.clear()
+            pending_jobs.clear()
+        
         for job in jobs:
+            results["total"] += 1
             try:
-                if self.index_job(job):
-                    results["success"] += 1
-                else:
-                    results["failed"] += 1
+                chunks, ids = self.chunk_job(job)
             except Exception as e:
                 results["failed"] += 1
                 results["errors"].append({
                     "job_id": job.id,
                     "error": str(e),
                 })
+                continue
+            if not chunks:
+                results["failed"] += 1
+                continue
+            
+            pending_chunks.extend(chunks)
+            pending_ids.extend(ids)
+            pending_jobs.append(job.id)
+            if len(pending_chunks) >= batch_size:
+                flush()
+        flush()
         
         logger.info(
             f"Indexing complete: {results['success']} succeeded, "
@@ -154,29 +226,45 @@ class JobRAGService:
         
         return results
     
-    def index_all_jobs(self, limit: Optional[int] = None) -> Dict[str, Any]:
+    def jobs_to_index(self, limit: Optional[int] = None, job_ids: Optional[List[int]] = None) -> Query:
         """
-        Index all jobs from the database.
+        Build the query for jobs to index.
         
         Args:
-            limit: Optional limit on number of jobs to index
+            limit: Optional limit on number of jobs (ignored when ``job_ids`` is given)
+            job_ids: Optional list of specific job IDs
             
         Returns:
-            Dictionary with indexing results
+            Query over the selected jobs (all jobs with a description by default)
         """
+        if job_ids:
+            return self.db.query(Job).filter(Job.id.in_(job_ids))
+        
         query = self.db.query(Job).filter(
             (Job.description != None) | (Job.raw_description != None)
         ).filter(
             (Job.description != "") | (Job.raw_description != "")
         )
-        
         if limit:
             query = query.limit(limit)
+        return query
+    
+    def index_all_jobs(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Index all jobs from the database.
         
-        jobs = query.all()
-        logger.info(f"Found {len(jobs)} jobs to index")
+        Args:
+            limit: Optional limit on number of jobs to index
+            
+        Returns:
+            Dictionary with indexing results
+        """
+        query = self.jobs_to_index(limit=limit)
+        
+        logger.info(f"Found {query.count()} jobs to index")
         
-        return self.index_jobs(jobs)
+        # Stream rows rather than loading every job into memory
+        return self.index_jobs(query.yield_per(FETCH_BATCH_SIZE))
     
     def retrieve_similar_jobs(
         self,
@@ -212,21 +300,26 @@ class JobRAGService:
                 k=k,
             )
             
-            # Extract job IDs and fetch from database
+            # Extract job IDs and fetch them from the database in one query
+            job_ids = {doc.metadata.get("job_id") for doc, _ in results} - {None}
+            jobs_by_id = {}
+            if job_ids:
+                jobs_by_id = {
+                    job.id: job
+                    for job in self.db.query(Job).filter(Job.id.in_(job_ids)).all()
+                }
+            
             similar_jobs = []
             for doc, score in results:
                 metadata = doc.metadata
-                job_id_from_doc = metadata.get("job_id")
-                
-                if job_id_from_doc:
-                    job = self.db.query(Job).filter(Job.id == job_id_from_doc).first()
-                    if job:
-                        similar_jobs.append({
-                            "job": job,
-                            "similarity_score": score,
-                            "chunk_content": doc.page_content,
-                            "chunk_metadata": metadata,
-                        })
+                job = jobs_by_id.get(metadata.get("job_id"))
+                if job:
+                    similar_jobs.append({
+                        "job": job,
+                        "similarity_score": score,
+                        "chunk_content": doc.page_content,
+                        "chunk_metadata": metadata,
+                    })
             
             logger.debug(f"Retrieved {len(similar_jobs)} similar jobs")
             return similar_jobs
@@ -263,3 +356,34 @@ class JobRAGService:
                 "documents": [],
                 "query": query,
             }
+    
+    async def aanswer_query(self, query: str, filter_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Async variant of ``answer_query`` for callers running on an event loop.
+        
+        Overlaps the HyDE LLM call with a baseline vector search over the raw query.
+        
+        Args:
+            query: User query
+            filter_metadata: Optional metadata filter for retrieval
+            
+        Returns:
+            Dictionary with answer, context, and metadata
+        """
+        try:
+            result = await self.rag_agent.aquery(
+                query=query,
+                filter_metadata=filter_metadata,
+            )
+            
+            logger.info(f"RAG query answered: {len(result.get('answer', ''))} chars")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error answering query with RAG: {e}", exc_info=True)
+            return {
+                "answer": f"Error processing query: {str(e)}",
+                "context": "",
+                "documents": [],
+                "query": query,
+            }
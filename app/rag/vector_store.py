@@ -1,10 +1,15 @@
 """Vector store management for advanced RAG system."""
 
+import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from langchain_community.embeddings import HuggingFaceEmbeddings
@@ -14,9 +19,88 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.embeddings import OllamaEmbeddings
 
 from app.config import config
+from app.rag.ann_index import ANNIndex
+from app.rag.chunking import CHUNK_VECTOR_KEY, CHUNK_VECTOR_MODEL_KEY
+from app.rag.embedding_cache import CachingEmbeddings
+from app.rag.hyde import SemanticQueryCache
 
 logger = logging.getLogger(__name__)
 
+# Embeddings read per page when rebuilding the ANN index from the collection
+ANN_REBUILD_PAGE_SIZE = 5000
+# Exact (query, filter, k, threshold) search results kept per store
+SEARCH_CACHE_SIZE = 4096
+# Recent query embeddings checked for near-duplicate searches
+SEMANTIC_SEARCH_CACHE_SIZE = 1024
+# Minimum cosine similarity for a near-duplicate query to reuse cached results
+SEMANTIC_SEARCH_THRESHOLD = 0.98
+# Seconds a cached search result is served; bounds staleness from writes by
+# other processes that don't change the document count (e.g. re-indexing)
+SEARCH_CACHE_TTL_SECONDS = 30.0
+# Candidates re-scored at full precision when the ANN index only gives coarse distances
+ANN_REFINE_CANDIDATES = 200
+
+
+def _load_embeddings(embedding_provider: str, embedding_model: str) -> Tuple[Any, str, str]:
+    """Create an embedding model, returning (embeddings, provider, model) actually used."""
+    try:
+        if embedding_provider == "ollama":
+            embeddings = OllamaEmbeddings(
+                model=embedding_model or "llama3.2",
+                base_url=config.get_llm_defaults().get("ollama_base_url", "http://localhost:11434"),
+            )
+            logger.info(f"Using Ollama embeddings: {embedding_model}")
+        elif embedding_provider == "huggingface":
+            embeddings = HuggingFaceEmbeddings(
+                model_name=embedding_model or "sentence-transformers/all-MiniLM-L6-v2",
+            )
+            logger.info(f"Using HuggingFace embeddings: {embedding_model}")
+        else:
+            # Default to OpenAI
+            embeddings = OpenAIEmbeddings(
+                model=embedding_model,
+                api_key=config.llm.api_key if config.llm.api_key else None,
+            )
+            logger.info(f"Using OpenAI embeddings: {embedding_model}")
+        return embeddings, embedding_provider, embedding_model
+    except Exception as e:
+        logger.error(f"Failed to initialize embeddings: {e}")
+        # Fallback to HuggingFace local model
+        embeddings = HuggingFaceEmbeddings(
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+        )
+        logger.warning("Fell back to HuggingFace embeddings")
+        return embeddings, "huggingface", "sentence-transformers/all-MiniLM-L6-v2"
+
+
+# Shared embedding models keyed by (provider, model), so collections using the
+# same model don't each load their own copy of the weights
+_embedding_models: Dict[Tuple[str, str], Tuple[CachingEmbeddings, str, str]] = {}
+_embedding_models_lock = threading.Lock()
+
+
+def get_shared_embeddings(embedding_provider: str, embedding_model: str) -> Tuple[CachingEmbeddings, str, str]:
+    """Get or create the cached embedding model for a provider and model name.
+
+    Thread-safe implementation using double-checked locking pattern.
+
+    Returns:
+        Tuple of (embeddings, provider, model) actually in use (these differ
+        from the request if initialization fell back to the local model)
+    """
+    key = (embedding_provider, embedding_model)
+    entry = _embedding_models.get(key)
+    if entry is None:
+        with _embedding_models_lock:
+            # Double-check after acquiring lock
+            entry = _embedding_models.get(key)
+            if entry is None:
+                embeddings, provider, model = _load_embeddings(embedding_provider, embedding_model)
+                # Unchanged chunks and repeated queries are served from the embedding cache
+                entry = (CachingEmbeddings(embeddings, model=model, provider=provider), provider, model)
+                _embedding_models[key] = entry
+    return entry
+
 
 class VectorStoreManager:
     """Manages vector store operations with support for metadata filtering and semantic search."""
@@ -46,34 +130,9 @@ class VectorStoreManager:
         embedding_config = config.yaml_config.get("rag", {}).get("embeddings", {})
         embedding_provider = embedding_config.get("provider", "openai")
         embedding_model = embedding_model or embedding_config.get("model", "text-embedding-3-small")
-        
-        # Initialize embeddings based on provider
-        try:
-            if embedding_provider == "ollama":
-                self.embeddings = OllamaEmbeddings(
-                    model=embedding_model or "llama3.2",
-                    base_url=config.get_llm_defaults().get("ollama_base_url", "http://localhost:11434"),
-                )
-                logger.info(f"Using Ollama embeddings: {embedding_model}")
-            elif embedding_provider == "huggingface":
-                self.embeddings = HuggingFaceEmbeddings(
-                    model_name=embedding_model or "sentence-transformers/all-MiniLM-L6-v2",
-                )
-                logger.info(f"Using HuggingFace embeddings: {embedding_model}")
-            else:
-                # Default to OpenAI
-                self.embeddings = OpenAIEmbeddings(
-                    model=embedding_model,
-                    api_key=config.llm.api_key if config.llm.api_key else None,
-                )
-                logger.info(f"Using OpenAI embeddings: {embedding_model}")
-        except Exception as e:
-            logger.error(f"Failed to initialize embeddings: {e}")
-            # Fallback to HuggingFace local model
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-            )
-            logger.warning("Fell back to HuggingFace embeddings")
+        self.embeddings, self.embedding_provider, self.embedding_model_name = get_shared_embeddings(
+            embedding_provider, embedding_model
+        )
         
         # Initialize ChromaDB client
         try:
@@ -104,6 +163,71 @@ class VectorStoreManager:
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}", exc_info=True)
             raise
+        
+        self.ann_index = self._init_ann_index()
+        
+        # Search result caches: entries expire after SEARCH_CACHE_TTL_SECONDS and
+        # are cleared when this process writes or the collection's size changes
+        self._search_cache_lock = threading.Lock()
+        self._search_cache: "OrderedDict[tuple, Tuple[float, List[Tuple[Document, float]]]]" = OrderedDict()
+        self._search_cache_count: Optional[int] = None
+        self._semantic_search_cache = SemanticQueryCache(
+            max_entries=SEMANTIC_SEARCH_CACHE_SIZE,
+            threshold=SEMANTIC_SEARCH_THRESHOLD,
+        )
+    
+    def _init_ann_index(self) -> Optional[ANNIndex]:
+        """Load (or build) the optional FAISS index configured under rag.vector_store.ann."""
+        ann_config = config.yaml_config.get("rag", {}).get("vector_store", {}).get("ann", {})
+        if not ann_config.get("enabled", False):
+            return None
+        if not ANNIndex.available():
+            logger.warning("rag.vector_store.ann is enabled but faiss is not installed; using ChromaDB search")
+            return None
+        
+        quantization = ann_config.get("quantization", "bf16")
+        ann_index = ANNIndex(
+            index_path=self.persist_directory / f"{self.collection_name}.{quantization}.faiss",
+            quantization=quantization,
+            nlist=ann_config.get("nlist", 256),
+            m=ann_config.get("m", 32),
+            nbits=ann_config.get("nbits", 8),
+            nprobe=ann_config.get("nprobe", 16),
+        )
+        ann_index.load()
+        if ann_index.ntotal != self.collection.count():
+            self._rebuild_ann_index(ann_index)
+        return ann_index
+    
+    def _rebuild_ann_index(self, ann_index: ANNIndex) -> bool:
+        """Retrain the ANN index on every embedding currently in the collection."""
+        ids: List[str] = []
+        pages: List[np.ndarray] = []
+        offset = 0
+        while True:
+            page = self.collection.get(include=["embeddings"], limit=ANN_REBUILD_PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+        if not ids:
+            return False
+        return ann_index.build(ids, np.vstack(pages))
+    
+    def rebuild_ann_index(self) -> bool:
+        """
+        Retrain the FAISS index from the collection (e.g. after a bulk load).
+        
+        Returns:
+            True if the index was rebuilt
+        """
+        if self.ann_index is None:
+            return False
+        rebuilt = self._rebuild_ann_index(self.ann_index)
+        if rebuilt:
+            self._invalidate_search_cache()
+        return rebuilt
     
     def add_documents(
         self,
@@ -135,12 +259,22 @@ class VectorStoreManager:
                     else:
                         doc.metadata = meta
             
+            # Precomputed chunk vectors are not valid Chroma metadata
+            for doc in documents:
+                doc.metadata.pop(CHUNK_VECTOR_KEY, None)
+                doc.metadata.pop(CHUNK_VECTOR_MODEL_KEY, None)
+            
             # Add to vector store
             result_ids = self.vector_store.add_documents(
                 documents=documents,
                 ids=ids,
             )
             
+            if self.ann_index is not None and result_ids:
+                # LangChain embedded these itself, so read the vectors back
+                added = self.collection.get(ids=result_ids, include=["embeddings"])
+                self.ann_index.add(added["ids"], added["embeddings"])
+            self._invalidate_search_cache()
             logger.info(f"Added {len(documents)} documents to vector store")
             return result_ids
             
@@ -148,6 +282,150 @@ class VectorStoreManager:
             logger.error(f"Error adding documents to vector store: {e}", exc_info=True)
             raise
     
+    def add_documents_with_vectors(
+        self,
+        documents: List[Document],
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Add documents, reusing vectors precomputed by the semantic chunker.
+        
+        Documents whose vector was produced by a different embedding model than
+        this store uses (or that carry no vector) are embedded as usual.
+        
+        Args:
+            documents: List of Document objects
+            ids: Optional list of document IDs
+            
+        Returns:
+            List of document IDs
+        """
+        try:
+            if ids is None:
+                ids = [f"doc_{i}_{datetime.now().timestamp()}" for i in range(len(documents))]
+            
+            texts = []
+            metadatas = []
+            embeddings: List[Optional[List[float]]] = []
+            missing = []
+            for i, doc in enumerate(documents):
+                metadata = dict(doc.metadata or {})
+                vector = metadata.pop(CHUNK_VECTOR_KEY, None)
+                vector_model = metadata.pop(CHUNK_VECTOR_MODEL_KEY, None)
+                if vector is None or vector_model != self.embedding_model_name:
+                    vector = None
+                    missing.append(i)
+                texts.append(doc.page_content)
+                metadatas.append(metadata)
+                embeddings.append(vector)
+            
+            if missing:
+                fresh = self.embeddings.embed_documents([texts[i] for i in missing])
+                for i, vector in zip(missing, fresh):
+                    embeddings[i] = vector
+            
+            self.upsert_embeddings(ids, texts, metadatas, embeddings)
+            
+            logger.info(
+                f"Added {len(documents)} documents to vector store "
+                f"({len(documents) - len(missing)} with precomputed vectors)"
+            )
+            return ids
+            
+        except Exception as e:
+            logger.error(f"Error adding documents with vectors to vector store: {e}", exc_info=True)
+            raise
+    
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+    ) -> None:
+        """
+        Write already-embedded records straight to the collection.
+        
+        Takes parallel column lists so batch callers can skip building
+        Document objects. Metadata values must be scalars.
+        
+        Args:
+            ids: Document IDs
+            texts: Document texts
+            metadatas: Metadata dict per document
+            embeddings: Embedding vector per document
+        """
+        self.collection.upsert(
+            ids=ids,
+            documents=texts,
+            metadatas=metadatas,
+            embeddings=embeddings,
+        )
+        if self.ann_index is not None:
+            self.ann_index.add(ids, embeddings)
+        self._invalidate_search_cache()
+    
+    def _invalidate_search_cache(self) -> None:
+        """Drop cached search results after the collection changed."""
+        with self._search_cache_lock:
+            self._clear_search_cache_locked()
+    
+    def _clear_search_cache_locked(self) -> None:
+        """Drop cached search results; caller must hold _search_cache_lock."""
+        self._search_cache.clear()
+        self._semantic_search_cache = SemanticQueryCache(
+            max_entries=SEMANTIC_SEARCH_CACHE_SIZE,
+            threshold=SEMANTIC_SEARCH_THRESHOLD,
+        )
+    
+    def _cached_search(self, key: tuple) -> Tuple[Optional[List[Tuple[Document, float]]], Optional[List[float]]]:
+        """
+        Return cached results for an identical or near-duplicate search.
+        
+        Returns:
+            Tuple of (cached results or None, query embedding if one was computed)
+        """
+        query, params = key[0], key[1:]
+        # Other processes (e.g. index_jobs) write to the same collection
+        count = self.collection.count()
+        now = time.monotonic()
+        with self._search_cache_lock:
+            if count != self._search_cache_count:
+                self._search_cache_count = count
+                self._clear_search_cache_locked()
+            entry = self._search_cache.get(key)
+            if entry is not None and now - entry[0] <= SEARCH_CACHE_TTL_SECONDS:
+                self._search_cache.move_to_end(key)
+                return list(entry[1]), None
+        
+        try:
+            query_embedding = self.embeddings.embed_query(query)
+        except Exception:
+            return None, None
+        with self._search_cache_lock:
+            hit = self._semantic_search_cache.get(query_embedding)
+        if hit is not None and hit[0] == params and now - hit[1] <= SEARCH_CACHE_TTL_SECONDS:
+            logger.debug("Similarity search semantic cache hit")
+            return list(hit[2]), query_embedding
+        return None, query_embedding
+    
+    def _store_search(
+        self,
+        key: tuple,
+        results: List[Tuple[Document, float]],
+        query_embedding: Optional[List[float]],
+    ) -> None:
+        """Remember search results under their exact key and query embedding."""
+        params = key[1:]
+        now = time.monotonic()
+        with self._search_cache_lock:
+            self._search_cache[key] = (now, list(results))
+            self._search_cache.move_to_end(key)
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+            if query_embedding is not None:
+                self._semantic_search_cache.put(query_embedding, (params, now, list(results)))
+    
     def similarity_search(
         self,
         query: str,
@@ -179,6 +457,22 @@ class VectorStoreManager:
                     logger.warning(f"Filter format may not be compatible with ChromaDB: {filter}")
                     chroma_filter = filter
             
+            # Identical or near-identical searches are answered from the cache
+            cache_key = (query, json.dumps(chroma_filter, sort_keys=True, default=str), k, score_threshold)
+            cached, query_embedding = self._cached_search(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Unfiltered searches scan the compressed FAISS index when one is built;
+            # metadata filters still need ChromaDB's where clause support
+            if not chroma_filter and self.ann_index is not None and self.ann_index.ntotal:
+                results = self._ann_search(query, k)
+                if score_threshold is not None:
+                    results = [(doc, score) for doc, score in results if score <= score_threshold]
+                logger.debug(f"Retrieved {len(results)} documents from FAISS index")
+                self._store_search(cache_key, results, query_embedding)
+                return results
+            
             # Use similarity_search_with_score to get scores
             # Note: ChromaDB returns distance (lower is better), not similarity
             # LangChain's Chroma wrapper uses 'filter' parameter
@@ -202,6 +496,7 @@ class VectorStoreManager:
                 results = [(doc, score) for doc, score in results if score <= score_threshold]
             
             logger.debug(f"Retrieved {len(results)} documents from vector store")
+            self._store_search(cache_key, results, query_embedding)
             return results
             
         except Exception as e:
@@ -215,10 +510,45 @@ class VectorStoreManager:
                 logger.error(f"Fallback search also failed: {e2}")
                 return []
     
+    def _ann_search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Search the FAISS index and load the hits' documents from ChromaDB.
+        
+        With binary codes, the top candidates by Hamming distance are re-scored
+        with their full-precision vectors before the best ``k`` are kept.
+        """
+        query_embedding = self.embeddings.embed_query(query)
+        refine = self.ann_index.approximate_scores
+        hits = self.ann_index.search(query_embedding, max(k, ANN_REFINE_CANDIDATES) if refine else k)
+        if not hits:
+            return []
+        
+        include = ["documents", "metadatas", "embeddings"] if refine else ["documents", "metadatas"]
+        records = self.collection.get(ids=[doc_id for doc_id, _ in hits], include=include)
+        documents = {
+            doc_id: Document(page_content=text or "", metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(records["ids"], records["documents"], records["metadatas"])
+        }
+        
+        if refine and records["ids"]:
+            vectors = np.asarray(records["embeddings"], dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            q = np.asarray(query_embedding, dtype=np.float32)
+            q /= max(float(np.linalg.norm(q)), 1e-12)
+            distances = 1.0 - vectors @ q
+            order = np.argsort(distances)[:k]
+            return [(documents[records["ids"][i]], float(distances[i])) for i in order]
+        
+        # IDs deleted from the collection since the index was built are dropped
+        return [(documents[doc_id], distance) for doc_id, distance in hits if doc_id in documents]
+    
     def delete_documents(self, ids: List[str]) -> bool:
         """Delete documents by IDs."""
         try:
             self.vector_store.delete(ids=ids)
+            if self.ann_index is not None:
+                self.ann_index.remove(ids)
+            self._invalidate_search_cache()
             logger.info(f"Deleted {len(ids)} documents from vector store")
             return True
         except Exception as e:
@@ -237,3 +567,25 @@ class VectorStoreManager:
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}", exc_info=True)
             return {}
+
+
+# Shared vector stores, one per collection, so the embedding model and ChromaDB
+# client are loaded once per process rather than once per service instance.
+_vector_stores: Dict[str, VectorStoreManager] = {}
+_vector_stores_lock = threading.Lock()
+
+
+def get_vector_store(collection_name: str = "job_descriptions") -> VectorStoreManager:
+    """Get or create the shared VectorStoreManager for a collection.
+
+    Thread-safe implementation using double-checked locking pattern.
+    """
+    store = _vector_stores.get(collection_name)
+    if store is None:
+        with _vector_stores_lock:
+            # Double-check after acquiring lock
+            store = _vector_stores.get(collection_name)
+            if store is None:
+                store = VectorStoreManager(collection_name=collection_name)
+                _vector_stores[collection_name] = store
+    return store
@@ -3,12 +3,36 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
 
+from app.config import config
 from app.models import Run, RunStatus
 
 logger = logging.getLogger(__name__)
 
+# Intermediate states a run can get stuck in
+STUCK_STATUSES = (
+    RunStatus.SEARCHING,
+    RunStatus.SCORING,
+    RunStatus.CONTENT_GENERATING,
+    RunStatus.APPLYING,
+)
+# Minutes before a run counts as stuck when config doesn't say
+DEFAULT_TIMEOUT_MINUTES = 120
+# Rows fetched per round trip when logging stuck runs
+LOG_BATCH_SIZE = 1000
+
+
+def _recovery_timeout_default() -> int:
+    """Read pipeline.recovery.timeout_minutes from the already-parsed YAML config."""
+    try:
+        recovery_config = config.yaml_config.get("pipeline", {}).get("recovery", {})
+        return recovery_config.get("timeout_minutes", DEFAULT_TIMEOUT_MINUTES)
+    except Exception as e:
+        logger.warning(f"Error loading recovery config, using default timeout: {e}")
+        return DEFAULT_TIMEOUT_MINUTES
+
 
 def recover_stuck_runs(
     db: Session,
@@ -30,49 +54,52 @@ def recover_stuck_runs(
         Number of runs recovered
     """
     if timeout_minutes is None:
-        try:
-            from app.config import config
-            import yaml
-            with open("config.yaml", "r") as f:
-                yaml_config = yaml.safe_load(f) or {}
-            recovery_config = yaml_config.get("pipeline", {}).get("recovery", {})
-            timeout_minutes = recovery_config.get("timeout_minutes", 120)
-        except Exception as e:
-            logger.warning(f"Error loading recovery config, using default timeout: {e}")
-            timeout_minutes = 120
+        timeout_minutes = _recovery_timeout_default()
 
     timeout = datetime.utcnow() - timedelta(minutes=timeout_minutes)
 
-    stuck_runs = db.query(Run).filter(
-        Run.status.in_([
-            RunStatus.SEARCHING,
-            RunStatus.SCORING,
-            RunStatus.CONTENT_GENERATING,
-            RunStatus.APPLYING
-        ]),
+    stuck_filter = (
+        Run.status.in_(STUCK_STATUSES),
         Run.started_at < timeout,
-        Run.completed_at.is_(None)
-    ).all()
-
-    recovered_count = 0
-    for run in stuck_runs:
-        stuck_duration_minutes = (datetime.utcnow() - run.started_at).total_seconds() / 60
+        Run.completed_at.is_(None),
+    )
+
+    # Log pass only reads the columns it needs, streamed in chunks
+    now = datetime.utcnow()
+    for run_id, status, started_at in (
+        db.query(Run.id, Run.status, Run.started_at)
+        .filter(*stuck_filter)
+        .yield_per(LOG_BATCH_SIZE)
+    ):
+        stuck_duration_minutes = (now - started_at).total_seconds() / 60
         logger.warning(
-            f"Recovering stuck run {run.id}: "
-            f"status={run.status.value}, started={run.started_at}, "
+            f"Recovering stuck run {run_id}: "
+            f"status={status.value}, started={started_at}, "
             f"stuck for {stuck_duration_minutes:.1f} minutes"
         )
 
-        run.status = RunStatus.COMPLETED
-        run.completed_at = datetime.utcnow()
-
-        # Note in error_message that this was recovered
-        if run.error_message:
-            run.error_message = f"{run.error_message}; Recovered from stuck state"
-        else:
-            run.error_message = f"Recovered from stuck {run.status.value} state"
-
-        recovered_count += 1
+    # Note in error_message that this was recovered (and from which state)
+    recovered_message = case(
+        *(
+            (Run.status == status, f"Recovered from stuck {status.value} state")
+            for status in STUCK_STATUSES
+        ),
+        else_="Recovered from stuck state",
+    )
+    result = db.execute(
+        update(Run)
+        .where(*stuck_filter)
+        .values(
+            status=RunStatus.COMPLETED,
+            completed_at=now,
+            error_message=func.coalesce(
+                Run.error_message + "; Recovered from stuck state",
+                recovered_message,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    recovered_count = result.rowcount or 0
 
     if recovered_count > 0:
         db.commit()
@@ -1,19 +1,27 @@
 """Scheduler for automated pipeline runs."""
 
+import asyncio
 import schedule
-import time
 import logging
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-from app.db import get_db_context
-from app.orchestrator import PipelineOrchestrator
+from sqlalchemy.orm import scoped_session
+
+from app.db import SessionLocal
 from app.config import config
-from app.services.auto_apply_service import AutoApplyService
 
 logger = logging.getLogger(__name__)
 
+# Longest the scheduler thread sleeps without re-checking the schedule
+MAX_IDLE_SECONDS = 3600
+# Wait used when no jobs are scheduled
+NO_JOBS_WAIT_SECONDS = 60
+# How long stop() waits for the scheduler thread to exit
+STOP_JOIN_TIMEOUT_SECONDS = 5
+
 
 class PipelineScheduler:
     """Scheduler for running the pipeline at regular intervals."""
@@ -28,7 +36,15 @@ class PipelineScheduler:
         self.run_config = run_config or {}
         self.running = False
         self.thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None  # used instead of a thread inside an event loop
         self._lock = threading.Lock()  # Lock for thread-safe start/stop
+        self._wake = threading.Event()  # Set by stop() to interrupt the idle wait
+        # One session registry for the scheduler thread, reused across runs
+        self._session_factory = scoped_session(SessionLocal)
+        # Pipeline runs execute here so the scheduler thread is never blocked;
+        # created in start() because stop() shuts it down
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._current_future: Optional[Future] = None
 
         # Get scheduler config
         scheduler_config = config.get_scheduler_config()
@@ -62,49 +78,72 @@ class PipelineScheduler:
     
     def _run_scheduled_job(self):
         """Execute a scheduled pipeline run."""
+        # Imported here so importing the scheduler doesn't load the whole pipeline
+        from app.orchestrator import PipelineOrchestrator
+
         logger.info("Starting scheduled pipeline run")
         
+        db = self._session_factory()
         try:
-            with get_db_context() as db:
-                run_config = self.run_config or self._create_default_config()
-                
-                orchestrator = PipelineOrchestrator(db)
-                
-                # Create run
-                run = orchestrator.create_run(
-                    search_config=run_config.get("search", {}),
-                    scoring_config=run_config.get("scoring_weights", {}),
-                    llm_config=run_config.get("llm_config", {}),
-                )
-                
-                # Run pipeline
-                result = orchestrator.run_full_pipeline(
-                    run_id=run.id,
-                    titles=run_config["search"]["titles"],
-                    locations=run_config["search"].get("locations"),
-                    remote=run_config["search"].get("remote", False),
-                    keywords=run_config["search"].get("keywords"),
-                    sources=run_config["search"].get("sources"),
-                    max_results=run_config["search"].get("max_results", 50),
-                    target_companies=run_config.get("target_companies"),
-                    must_have_keywords=run_config.get("must_have_keywords"),
-                    nice_to_have_keywords=run_config.get("nice_to_have_keywords"),
-                    remote_preference=run_config.get("remote_preference", "any"),
-                    salary_min=run_config.get("salary_min"),
-                    generate_content=run_config.get("generate_content", True),
-                    auto_apply=run_config.get("auto_apply", False),
-                )
-                
-                logger.info(f"Scheduled run {run.id} completed: {result}")
-
-                # Process auto-apply if enabled
-                self._process_auto_apply(db, run.id)
+            run_config = self.run_config or self._create_default_config()
+            
+            orchestrator = PipelineOrchestrator(db)
+            
+            # Create run
+            run = orchestrator.create_run(
+                search_config=run_config.get("search", {}),
+                scoring_config=run_config.get("scoring_weights", {}),
+                llm_config=run_config.get("llm_config", {}),
+            )
+            
+            # Run pipeline
+            result = orchestrator.run_full_pipeline(
+                run_id=run.id,
+                titles=run_config["search"]["titles"],
+                locations=run_config["search"].get("locations"),
+                remote=run_config["search"].get("remote", False),
+                keywords=run_config["search"].get("keywords"),
+                sources=run_config["search"].get("sources"),
+                max_results=run_config["search"].get("max_results", 50),
+                target_companies=run_config.get("target_companies"),
+                must_have_keywords=run_config.get("must_have_keywords"),
+                nice_to_have_keywords=run_config.get("nice_to_have_keywords"),
+                remote_preference=run_config.get("remote_preference", "any"),
+                salary_min=run_config.get("salary_min"),
+                generate_content=run_config.get("generate_content", True),
+                auto_apply=run_config.get("auto_apply", False),
+            )
+            
+            logger.info(f"Scheduled run {run.id} completed: {result}")
+
+            # Process auto-apply if enabled
+            self._process_auto_apply(db, run.id)
 
         except Exception as e:
+            db.rollback()
             logger.error(f"Error in scheduled run: {e}", exc_info=True)
+        finally:
+            # Closes the session and returns its connection to the engine pool
+            self._session_factory.remove()
+
+    def _submit_scheduled_job(self):
+        """Hand a scheduled run to the job executor unless one is still active."""
+        if self._current_future is not None and not self._current_future.done():
+            logger.warning("Skipping scheduled pipeline run, previous run still active")
+            return
+        executor = self._executor
+        if executor is None:
+            return
+        try:
+            self._current_future = executor.submit(self._run_scheduled_job)
+        except RuntimeError:
+            # stop() shut the executor down between the check and the submit
+            logger.debug("Scheduler stopped, not submitting pipeline run")
 
     def _process_auto_apply(self, db, run_id: int):
         """Process auto-apply for approved jobs from a run."""
+        from app.services.auto_apply_service import AutoApplyService
+
         try:
             feature_flags = config.get_feature_flags()
             if not feature_flags.get("enable_auto_apply", False):
@@ -153,26 +192,57 @@ class PipelineScheduler:
                 logger.warning("Scheduler is already running")
                 return
 
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-job")
+
             # Schedule job
-            schedule.every(self.frequency_hours).hours.do(self._run_scheduled_job)
+            schedule.every(self.frequency_hours).hours.do(self._submit_scheduled_job)
 
             # Also schedule at specific time if configured
             if self.run_at_time:
-                schedule.every().day.at(self.run_at_time).do(self._run_scheduled_job)
+                schedule.every().day.at(self.run_at_time).do(self._submit_scheduled_job)
 
             self.running = True
-
-            def run_scheduler():
-                """Run the scheduler loop."""
-                logger.info(f"Scheduler started (frequency: {self.frequency_hours} hours, time: {self.run_at_time})")
-                while self.running:
-                    schedule.run_pending()
-                    time.sleep(60)  # Check every minute
-
-            self.thread = threading.Thread(target=run_scheduler, daemon=True)
-            self.thread.start()
-
-            logger.info("Scheduler thread started")
+            self._wake.clear()
+
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+            if loop is not None:
+                # Inside the API's event loop: a task is enough, since jobs only
+                # get submitted to the executor from here
+                self._task = loop.create_task(self._run_async())
+                logger.info("Scheduler task started")
+            else:
+                self.thread = threading.Thread(target=self._run_threaded, daemon=True)
+                self.thread.start()
+                logger.info("Scheduler thread started")
+
+    @staticmethod
+    def _next_wait() -> float:
+        """Seconds until the next scheduled job is due, capped at MAX_IDLE_SECONDS."""
+        idle = schedule.idle_seconds()
+        if idle is None:
+            return NO_JOBS_WAIT_SECONDS
+        return min(max(idle, 0), MAX_IDLE_SECONDS)
+
+    def _run_threaded(self):
+        """Run the scheduler loop on a dedicated thread, sleeping until the next job is due."""
+        logger.info(f"Scheduler started (frequency: {self.frequency_hours} hours, time: {self.run_at_time})")
+        while self.running:
+            schedule.run_pending()
+            timeout = self._next_wait()
+            if timeout > 0 and self._wake.wait(timeout=timeout):
+                self._wake.clear()
+
+    async def _run_async(self):
+        """Run the scheduler loop as an event-loop task, sleeping until the next job is due."""
+        logger.info(f"Scheduler started (frequency: {self.frequency_hours} hours, time: {self.run_at_time})")
+        while self.running:
+            # Only submits due jobs to the executor, so it doesn't block the loop
+            schedule.run_pending()
+            await asyncio.sleep(self._next_wait())
 
     def stop(self):
         """Stop the scheduler. Thread-safe."""
@@ -182,7 +252,22 @@ class PipelineScheduler:
 
             self.running = False
             schedule.clear()
-            logger.info("Scheduler stopped")
+            self._wake.set()
+            thread, self.thread = self.thread, None
+            task, self._task = self._task, None
+            executor, self._executor = self._executor, None
+
+        if task is not None and not task.done():
+            # Task.cancel isn't thread-safe; stop() may be called off the loop thread
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+        if executor is not None:
+            # A run already in progress finishes in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=STOP_JOIN_TIMEOUT_SECONDS)
+        logger.info("Scheduler stopped")
 
 
 # Global scheduler instance with thread-safe initialization
@@ -9,6 +9,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from app.db import get_db_context
 from app.rag.company_service import CompanyRAGService
 
+# Companies per embedding request; several requests run concurrently
+EMBED_BATCH_SIZE = 64
+EMBED_MAX_WORKERS = 8
+
 
 def index_companies():
     """Index all companies in the RAG vector store."""
@@ -19,8 +23,11 @@ def index_companies():
         # Initialize RAG service
         rag_service = CompanyRAGService(db=db)
 
-        # Index all companies
-        results = rag_service.index_all_companies()
+        # Index all companies, overlapping the embedding requests
+        results = rag_service.index_all_companies(
+            batch_size=EMBED_BATCH_SIZE,
+            max_workers=EMBED_MAX_WORKERS,
+        )
 
         print(f"\n✓ Indexing completed")
         print(f"  - Total: {results['total']} companies")
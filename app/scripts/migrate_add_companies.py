@@ -1,15 +1,46 @@
 """Migration script to add companies table and new profile preference fields."""
 
-import sqlite3
 import sys
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# The shared migration runner lives with the other migration scripts
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "scripts"))
 
 from app.config import config
 from app.db import init_db, engine
 from app.models import Base, Company
+from migrate_all import run_standalone
+
+# JSON preference columns added to user_profiles
+NEW_PROFILE_COLUMNS = (
+    "preferred_industries",
+    "preferred_company_sizes",
+    "preferred_company_stages",
+    "preferred_tech_stack",
+)
+
+
+def apply(cursor, columns, indexes):
+    """Add the profile preference columns inside the caller's transaction.
+
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    if not columns("companies"):
+        print("✓ Companies table doesn't exist yet, will be created by init_db()")
+    else:
+        print("✓ Companies table already exists")
+
+    profile_columns = columns("user_profiles")
+    for col_name in NEW_PROFILE_COLUMNS:
+        if col_name in profile_columns:
+            print(f"✓ Column {col_name} already exists")
+        else:
+            print(f"Adding column {col_name} to user_profiles...")
+            cursor.execute(f"ALTER TABLE user_profiles ADD COLUMN {col_name} JSON")
+            profile_columns.add(col_name)
 
 
 def run_migration():
@@ -25,58 +56,15 @@ def run_migration():
 
     print(f"Running migration on database: {db_path}")
 
-    # Connect to database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    try:
-        # Check if companies table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='companies'")
-        companies_exists = cursor.fetchone() is not None
-
-        if not companies_exists:
-            print("✓ Companies table doesn't exist yet, will be created by init_db()")
-        else:
-            print("✓ Companies table already exists")
-
-        # Check if new columns exist in user_profiles
-        cursor.execute("PRAGMA table_info(user_profiles)")
-        columns = [row[1] for row in cursor.fetchall()]
-
-        new_columns = [
-            "preferred_industries",
-            "preferred_company_sizes",
-            "preferred_company_stages",
-            "preferred_tech_stack"
-        ]
-
-        for col_name in new_columns:
-            if col_name not in columns:
-                print(f"Adding column {col_name} to user_profiles...")
-                cursor.execute(f"ALTER TABLE user_profiles ADD COLUMN {col_name} JSON")
-                print(f"✓ Added {col_name}")
-            else:
-                print(f"✓ Column {col_name} already exists")
-
-        conn.commit()
-        print("\n✓ Migration completed successfully")
-
-        # Now create any missing tables (like companies)
-        print("\nCreating any missing tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✓ All tables created/verified")
-
-        return True
-
-    except Exception as e:
-        conn.rollback()
-        print(f"\n✗ Migration failed: {e}")
-        import traceback
-        traceback.print_exc()
+    if not run_standalone(apply, db_path):
         return False
 
-    finally:
-        conn.close()
+    # Now create any missing tables (like companies)
+    print("\nCreating any missing tables...")
+    Base.metadata.create_all(bind=engine)
+    print("✓ All tables created/verified")
+
+    return True
 
 
 if __name__ == "__main__":
@@ -1,14 +1,158 @@
 """Seed companies from companies.yaml into the database."""
 
+import contextlib
+import functools
 import sys
 import yaml
+from itertools import islice
 from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import bindparam, insert, text, update
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.db import get_db_context
-from app.models import Company, normalize_text
+from app.models import Company, normalize_text_batch
+
+# libyaml's C parser when PyYAML was built with it, else the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Names per existing-company lookup (keeps IN lists under SQLite's variable limit)
+LOOKUP_BATCH_SIZE = 500
+# Files larger than this are parsed document by document instead of cached whole
+STREAM_THRESHOLD_BYTES = 1024 * 1024
+# SQLite page cache (KiB) used while seeding from a large file
+LARGE_SEED_CACHE_KIB = 256 * 1024
+
+_companies = Company.__table__
+# Executed with a list of rows: SET columns come from each row's keys
+_update_company_stmt = update(_companies).where(_companies.c.id == bindparam('_company_id'))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML file; the stat fields only key the cache so edits are re-read."""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_YAML_LOADER) or {}
+
+
+def _iter_companies(yaml_path: Path) -> Iterator[dict]:
+    """
+    Yield company entries from the YAML file.
+
+    Small files are parsed once and cached. Large files are read with
+    ``yaml.load_all``, so a file split into ``---`` documents (each either a
+    single company or a ``companies:`` list) is parsed one document at a time
+    and earlier documents can be freed while later ones are read.
+    """
+    stat = yaml_path.stat()
+    if stat.st_size <= STREAM_THRESHOLD_BYTES:
+        yield from _load_yaml(str(yaml_path), stat.st_mtime_ns, stat.st_size).get('companies', [])
+        return
+
+    with open(yaml_path, 'r') as f:
+        for document in yaml.load_all(f, Loader=_YAML_LOADER):
+            if not document:
+                continue
+            if 'companies' in document:
+                yield from document['companies'] or []
+            else:
+                yield document
+
+
+def _is_large(yaml_path: Path) -> bool:
+    """Whether the YAML file exceeds the streaming threshold (False if missing)."""
+    try:
+        return yaml_path.stat().st_size > STREAM_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+def _restore_cache_size(db, cache_size) -> None:
+    """
+    Put back the page cache size changed for a large seed.
+
+    cache_size is per connection, so it is reset inside the seed's transaction
+    while the session still holds the connection it was raised on.
+    """
+    if cache_size is not None:
+        db.execute(text(f"PRAGMA cache_size={int(cache_size)}"))
+
+
+def _build_rows(companies_data: List[dict], errors: List[str]) -> Dict[str, dict]:
+    """Turn YAML company entries into table rows keyed by normalized name."""
+    named = []
+    for company_data in companies_data:
+        if 'name' in company_data:
+            named.append(company_data)
+        else:
+            error_msg = f"Missing required field 'name' for company: {company_data.get('name', 'unknown')}"
+            errors.append(error_msg)
+            print(f"  ✗ Error: {error_msg}")
+
+    # Normalize the whole chunk's names in one pass
+    normalized_names = normalize_text_batch([company_data['name'] for company_data in named])
+
+    rows = {}
+    for company_data, normalized in zip(named, normalized_names):
+        try:
+            # Later entries for the same company win, as a second update would
+            rows[normalized] = {
+                'name': company_data['name'],
+                'normalized_name': normalized,
+                'industries': company_data.get('industries'),
+                'verticals': company_data.get('verticals'),
+                'size': company_data.get('size'),
+                'stage': company_data.get('stage'),
+                'tech_stack': company_data.get('tech_stack'),
+                'description': company_data.get('description', '').strip(),
+                'headquarters': company_data.get('headquarters'),
+                'greenhouse_token': company_data.get('greenhouse_token'),
+                'workday_slug': company_data.get('workday_slug'),
+                'website': company_data.get('website'),
+            }
+        except Exception as e:
+            error_msg = f"Error processing {company_data.get('name', 'unknown')}: {e}"
+            errors.append(error_msg)
+            print(f"  ✗ Error: {error_msg}")
+    return rows
+
+
+def _write_rows(db, rows: Dict[str, dict]) -> Tuple[int, int]:
+    """
+    Upsert one chunk of rows: one lookup, one executemany UPDATE, one executemany INSERT.
+
+    Returns:
+        Tuple of (added, updated) counts
+    """
+    # One lookup per chunk of names instead of one query per company
+    existing_ids = {}
+    for company_id, normalized in (
+        db.query(Company.id, Company.normalized_name)
+        .filter(Company.normalized_name.in_(list(rows)))
+        .order_by(Company.id)
+    ):
+        existing_ids.setdefault(normalized, company_id)
+
+    updates = []
+    inserts = []
+    # Progress lines are written once per chunk rather than one print per company
+    log_lines = []
+    for normalized, row in rows.items():
+        if normalized in existing_ids:
+            updates.append({'_company_id': existing_ids[normalized], **row})
+            log_lines.append(f"  ✓ Updated: {row['name']}")
+        else:
+            inserts.append(row)
+            log_lines.append(f"  ✓ Added: {row['name']}")
+    sys.stdout.write("\n".join(log_lines) + "\n")
+
+    if updates:
+        db.execute(_update_company_stmt, updates)
+    if inserts:
+        db.execute(insert(_companies), inserts)
+    return len(inserts), len(updates)
 
 
 def seed_companies():
@@ -18,77 +162,46 @@ def seed_companies():
     yaml_path = Path(__file__).parent.parent / "data" / "companies.yaml"
     print(f"Loading companies from: {yaml_path}")
 
-    try:
-        with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
-    except FileNotFoundError:
-        print(f"Error: {yaml_path} not found")
-        return False
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML: {e}")
-        return False
-
-    companies_data = data.get('companies', [])
-    print(f"Found {len(companies_data)} companies in YAML")
+    found = 0
+    added = 0
+    updated = 0
+    errors = []
 
     with get_db_context() as db:
-        added = 0
-        updated = 0
-        errors = []
-
-        for company_data in companies_data:
-            try:
-                name = company_data['name']
-                normalized = normalize_text(name)
-
-                # Check if company already exists
-                existing = db.query(Company).filter(Company.normalized_name == normalized).first()
-
-                if existing:
-                    # Update existing company
-                    existing.name = company_data['name']
-                    existing.industries = company_data.get('industries')
-                    existing.verticals = company_data.get('verticals')
-                    existing.size = company_data.get('size')
-                    existing.stage = company_data.get('stage')
-                    existing.tech_stack = company_data.get('tech_stack')
-                    existing.description = company_data.get('description', '').strip()
-                    existing.headquarters = company_data.get('headquarters')
-                    existing.greenhouse_token = company_data.get('greenhouse_token')
-                    existing.workday_slug = company_data.get('workday_slug')
-                    existing.website = company_data.get('website')
-                    updated += 1
-                    print(f"  ✓ Updated: {name}")
-                else:
-                    # Create new company
-                    company = Company(
-                        name=company_data['name'],
-                        normalized_name=normalized,
-                        industries=company_data.get('industries'),
-                        verticals=company_data.get('verticals'),
-                        size=company_data.get('size'),
-                        stage=company_data.get('stage'),
-                        tech_stack=company_data.get('tech_stack'),
-                        description=company_data.get('description', '').strip(),
-                        headquarters=company_data.get('headquarters'),
-                        greenhouse_token=company_data.get('greenhouse_token'),
-                        workday_slug=company_data.get('workday_slug'),
-                        website=company_data.get('website')
-                    )
-                    db.add(company)
-                    added += 1
-                    print(f"  ✓ Added: {name}")
-
-            except KeyError as e:
-                error_msg = f"Missing required field {e} for company: {company_data.get('name', 'unknown')}"
-                errors.append(error_msg)
-                print(f"  ✗ Error: {error_msg}")
-            except Exception as e:
-                error_msg = f"Error processing {company_data.get('name', 'unknown')}: {e}"
-                errors.append(error_msg)
-                print(f"  ✗ Error: {error_msg}")
-
+        # WAL and synchronous=NORMAL are set for every connection in app.db, and
+        # the whole seed is one transaction, so it costs a single commit. Large
+        # seeds also get a bigger page cache for the lookups on the indexed name.
+        previous_cache_size = None
+        if db.get_bind().dialect.name == "sqlite" and _is_large(yaml_path):
+            previous_cache_size = db.execute(text("PRAGMA cache_size")).scalar()
+            db.execute(text(f"PRAGMA cache_size=-{LARGE_SEED_CACHE_KIB}"))
+
+        companies = _iter_companies(yaml_path)
         try:
+            # Entries are parsed, converted and written a chunk at a time
+            while True:
+                try:
+                    chunk = list(islice(companies, LOOKUP_BATCH_SIZE))
+                except FileNotFoundError:
+                    print(f"Error: {yaml_path} not found")
+                    return False
+                except yaml.YAMLError as e:
+                    _restore_cache_size(db, previous_cache_size)
+                    db.rollback()
+                    print(f"Error parsing YAML: {e}")
+                    return False
+                if not chunk:
+                    break
+                found += len(chunk)
+
+                rows = _build_rows(chunk, errors)
+                if rows:
+                    chunk_added, chunk_updated = _write_rows(db, rows)
+                    added += chunk_added
+                    updated += chunk_updated
+
+            print(f"Found {found} companies in YAML")
+            _restore_cache_size(db, previous_cache_size)
             db.commit()
             print(f"\n✓ Seeding completed successfully")
             print(f"  - Added: {added} companies")
@@ -99,6 +212,8 @@ def seed_companies():
                     print(f"    {error}")
             return True
         except Exception as e:
+            with contextlib.suppress(Exception):
+                _restore_cache_size(db, previous_cache_size)
             db.rollback()
             print(f"\n✗ Failed to commit changes: {e}")
             return False
@@ -1,13 +1,24 @@
 import os
+import base64
 import logging
+import struct
 import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Union, Generator
+from typing import BinaryIO, Optional, Tuple, Union, Generator
 from contextlib import contextmanager
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes, hmac, padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 logger = logging.getLogger(__name__)
 
+# Plaintext bytes read per step when encrypting files (a multiple of 3 and 16)
+ENCRYPT_CHUNK_SIZE = 48 * 1024
+# First byte of every Fernet token
+_FERNET_VERSION = b"\x80"
+
 def get_encryption_key() -> bytes:
     """
     Get encryption key from environment or generate a temporary one.
@@ -33,27 +44,91 @@ def get_encryption_key() -> bytes:
     return key.encode() if isinstance(key, str) else key
 
 _FERNET: Optional[Fernet] = None
+_FERNET_KEYS: Optional[Tuple[bytes, bytes]] = None  # (signing key, encryption key)
+_FERNET_LOCK = threading.Lock()
 
 def get_fernet() -> Fernet:
-    global _FERNET
+    """
+    Get the process-wide Fernet instance.
+
+    The key is read (or generated) once; Fernet splits it into its signing and
+    encryption halves at construction, so every later call reuses them.
+    Thread-safe via double-checked locking, so concurrent first calls can't
+    generate two different temporary keys.
+    """
+    global _FERNET, _FERNET_KEYS
     if _FERNET is None:
-        key = get_encryption_key()
-        _FERNET = Fernet(key)
+        with _FERNET_LOCK:
+            if _FERNET is None:
+                key = get_encryption_key()
+                fernet = Fernet(key)  # validates the key
+                raw_key = base64.urlsafe_b64decode(key)
+                _FERNET_KEYS = (raw_key[:16], raw_key[16:])
+                _FERNET = fernet
     return _FERNET
 
+def _encrypt_stream(src: BinaryIO, dst: BinaryIO) -> None:
+    """
+    Write a Fernet token for everything in ``src`` to ``dst``, chunk by chunk.
+
+    Produces exactly the token ``Fernet.encrypt`` would (version, timestamp,
+    IV, AES-128-CBC ciphertext, HMAC-SHA256, base64url-encoded), so it decrypts
+    with ``decrypt_bytes``; only one chunk is held in memory at a time.
+    """
+    get_fernet()
+    signing_key, encryption_key = _FERNET_KEYS
+    iv = os.urandom(16)
+    padder = padding.PKCS7(algorithms.AES.block_size).padder()
+    encryptor = Cipher(algorithms.AES(encryption_key), modes.CBC(iv)).encryptor()
+    mac = hmac.HMAC(signing_key, hashes.SHA256())
+    pending = b""  # signed bytes not yet base64-encoded (fewer than 3 after each write)
+
+    def emit(raw: bytes) -> None:
+        nonlocal pending
+        mac.update(raw)
+        pending += raw
+        cut = len(pending) - len(pending) % 3
+        dst.write(base64.urlsafe_b64encode(pending[:cut]))
+        pending = pending[cut:]
+
+    emit(_FERNET_VERSION + struct.pack(">Q", int(time.time())) + iv)
+    for chunk in iter(lambda: src.read(ENCRYPT_CHUNK_SIZE), b""):
+        emit(encryptor.update(padder.update(chunk)))
+    emit(encryptor.update(padder.finalize()) + encryptor.finalize())
+    dst.write(base64.urlsafe_b64encode(pending + mac.finalize()))
+
+def encrypt_bytes(data: bytes) -> bytes:
+    """Encrypt bytes into a Fernet token with the shared key."""
+    return get_fernet().encrypt(data)
+
+def decrypt_bytes(token: bytes) -> bytes:
+    """Decrypt a Fernet token produced by ``encrypt_bytes`` (raises InvalidToken on failure)."""
+    return get_fernet().decrypt(token)
+
 def encrypt_file(file_path: Union[str, Path]) -> None:
-    """Encrypt a file in place."""
+    """
+    Encrypt a file in place.
+
+    The token is streamed to a temporary file in the same directory which then
+    replaces the original atomically, so memory use doesn't grow with file size
+    and a failure never leaves a half-written file behind.
+    """
     path = Path(file_path)
     if not path.exists():
         return
         
+    tmp_path = None
     try:
-        data = path.read_bytes()
-        fernet = get_fernet()
-        encrypted_data = fernet.encrypt(data)
-        path.write_bytes(encrypted_data)
+        with open(path, "rb") as src, tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+        ) as dst:
+            tmp_path = dst.name
+            _encrypt_stream(src, dst)
+        os.replace(tmp_path, path)
         logger.info(f"Encrypted file: {path}")
     except Exception as e:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
         logger.error(f"Failed to encrypt file {path}: {e}")
         raise
 
@@ -62,18 +137,29 @@ def decrypt_file_content(file_path: Union[str, Path]) -> bytes:
     path = Path(file_path)
     data = path.read_bytes()
     try:
-        fernet = get_fernet()
-        return fernet.decrypt(data)
+        return decrypt_bytes(data)
     except Exception:
         # Fallback: maybe it's not encrypted?
         logger.warning(f"Decryption failed for {path}, assuming plain text.")
         return data
 
+def _memory_temp_dir() -> Optional[str]:
+    """Return a RAM-backed directory (tmpfs) for plaintext temp files, if one exists."""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return None
+
 @contextmanager
 def decrypted_file_context(file_path: Union[str, Path]) -> Generator[str, None, None]:
     """
     Context manager that provides a path to a decrypted temporary file.
     Cleans up the temp file on exit.
+
+    The plaintext never touches persistent storage where avoidable: on Linux it
+    lives in an anonymous memfd exposed as ``/proc/<pid>/fd/<n>`` (no file
+    extension; readable by this process and its children), otherwise in a
+    ``/dev/shm`` temp file, and only as a last resort in the regular temp dir.
     
     Usage:
         with decrypted_file_context(encrypted_path) as temp_path:
@@ -85,10 +171,26 @@ def decrypted_file_context(file_path: Union[str, Path]) -> Generator[str, None,
         return
 
     decrypted_data = decrypt_file_content(path)
+
+    if hasattr(os, "memfd_create"):
+        try:
+            fd = os.memfd_create(path.name, os.MFD_CLOEXEC)
+        except OSError as e:
+            logger.debug(f"memfd_create unavailable, using a temp file: {e}")
+        else:
+            try:
+                view = memoryview(decrypted_data)
+                while view:
+                    view = view[os.write(fd, view):]
+                # Closing the fd frees the pages; there is nothing to unlink
+                yield f"/proc/{os.getpid()}/fd/{fd}"
+            finally:
+                os.close(fd)
+            return
     
     # Create temp file with same extension
     suffix = path.suffix
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=_memory_temp_dir()) as tmp:
         tmp.write(decrypted_data)
         tmp_path = tmp.name
     
@@ -1,10 +1,36 @@
 """Services package for the job search pipeline."""
 
-from app.services.auto_apply_service import AutoApplyService
-from app.services.rate_limiter import RateLimiter, rate_limit_dependency
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.services.auto_apply_service import AutoApplyService
+    from app.services.rate_limiter import RateLimiter, rate_limit_dependency
+
+# Submodules are imported on first attribute access (PEP 562), so importing
+# one service doesn't load the others' dependencies
+_LAZY = {
+    "AutoApplyService": "app.services.auto_apply_service",
+    "RateLimiter": "app.services.rate_limiter",
+    "rate_limit_dependency": "app.services.rate_limiter",
+}
 
 __all__ = [
     "AutoApplyService",
     "RateLimiter",
     "rate_limit_dependency",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a re-exported service on first access and cache it on the package."""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include the lazily imported names in ``dir()``."""
+    return sorted(set(globals()) | set(__all__))
@@ -2,19 +2,35 @@
 
 import logging
 import threading
-from typing import Dict, Any, Optional, List, Callable
+import time
+from collections import deque
+from typing import Dict, Any, Optional, List, Callable, Union
 from datetime import datetime
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 
 from app.models import Job, JobStatus, Run
 from app.config import config
 from app.agents.apply_agent import ApplyAgent
-from app.agents.application_queue import ApplicationQueueManager, ApplicationPriority
+from app.agents.application_queue import (
+    ApplicationQueueManager,
+    ApplicationPriority,
+    QUEUE_COLUMNS,
+    QUEUE_FETCH_BATCH,
+)
 from app.agents.application_templates import ApplicationTemplateManager
 from app.agents.log_agent import LogAgent
 
 logger = logging.getLogger(__name__)
 
+# Status events buffered for callbacks; the oldest are dropped past this
+STATUS_BACKLOG = 1000
+# Jobs in these states are never queued again
+FINISHED_APPLICATION_STATUSES = (
+    JobStatus.APPLICATION_COMPLETED,
+    JobStatus.APPLICATION_FAILED,
+)
+
 
 class AutoApplyService:
     """
@@ -31,6 +47,16 @@ class AutoApplyService:
     _instance = None
     _lock = threading.Lock()
 
+    # Application payload key -> template field value it is filled from
+    _PAYLOAD_FIELDS = (
+        ("name", "full_name"),
+        ("email", "email"),
+        ("phone", "phone"),
+        ("linkedin_url", "linkedin_url"),
+        ("portfolio_url", "portfolio_url"),
+        ("resume_points", "resume_bullets"),
+    )
+
     def __new__(cls, *args, **kwargs):
         """Singleton pattern for service."""
         if cls._instance is None:
@@ -44,7 +70,7 @@ class AutoApplyService:
         db: Session,
         log_agent: Optional[LogAgent] = None,
         rate_limit_delay: float = 30.0,
-        max_applications_per_hour: int = 20,
+        max_applications_per_hour: Union[int, Dict[ApplicationPriority, int]] = 20,
     ):
         """
         Initialize the auto-apply service.
@@ -53,7 +79,8 @@ class AutoApplyService:
             db: Database session
             log_agent: Optional log agent for structured logging
             rate_limit_delay: Seconds between applications
-            max_applications_per_hour: Maximum applications per hour
+            max_applications_per_hour: Maximum applications per hour, shared or
+                per priority tier (see ``ApplicationQueueManager``)
         """
         # Check if this is first initialization
         first_init = not hasattr(self, '_initialized') or not self._initialized
@@ -72,6 +99,9 @@ class AutoApplyService:
             # State (only set once)
             self._processing_thread: Optional[threading.Thread] = None
             self._status_callbacks: List[Callable] = []
+            self._status_events: deque = deque(maxlen=STATUS_BACKLOG)
+            self._status_cond = threading.Condition()
+            self._status_thread: Optional[threading.Thread] = None
             self._rate_limit_delay = rate_limit_delay
             self._max_applications_per_hour = max_applications_per_hour
 
@@ -82,27 +112,40 @@ class AutoApplyService:
                 max_applications_per_hour=max_applications_per_hour,
             )
 
+            # Set up queue callbacks (bound methods of the singleton never change)
+            self.queue_manager.on_application_start = self._on_application_start
+            self.queue_manager.on_application_success = self._on_application_success
+            self.queue_manager.on_application_failure = self._on_application_failure
+            self.queue_manager.on_queue_empty = self._on_queue_empty
+
+            self.db = None
+            self.log_agent = None
             self._initialized = True
             logger.info("AutoApplyService initialized")
 
-        # Always update database session and session-dependent components
-        # This ensures we don't use stale/expired sessions
-        self.db = db
-        self.log_agent = log_agent
-
-        # Recreate components with fresh database session (but NOT queue_manager)
-        self.apply_agent = ApplyAgent(db, log_agent)
-        self.template_manager = ApplicationTemplateManager(db)
-
-        # Update queue manager's database session without recreating it
-        if hasattr(self, 'queue_manager'):
+        # Switch to the caller's session so we don't use stale/expired ones.
+        # Session-bound components are rebuilt lazily on next use, so callers
+        # that only read status never construct them.
+        if db is not self.db or log_agent is not self.log_agent:
+            self.db = db
+            self.log_agent = log_agent
+            self._apply_agent: Optional[ApplyAgent] = None
+            self._template_manager: Optional[ApplicationTemplateManager] = None
             self.queue_manager.db = db
 
-        # Set up queue callbacks (always refresh these)
-        self.queue_manager.on_application_start = self._on_application_start
-        self.queue_manager.on_application_success = self._on_application_success
-        self.queue_manager.on_application_failure = self._on_application_failure
-        self.queue_manager.on_queue_empty = self._on_queue_empty
+    @property
+    def apply_agent(self) -> ApplyAgent:
+        """Apply agent bound to the current session (built on first use)."""
+        if self._apply_agent is None:
+            self._apply_agent = ApplyAgent(self.db, self.log_agent)
+        return self._apply_agent
+
+    @property
+    def template_manager(self) -> ApplicationTemplateManager:
+        """Template manager bound to the current session (built on first use)."""
+        if self._template_manager is None:
+            self._template_manager = ApplicationTemplateManager(self.db)
+        return self._template_manager
 
     def enable(self):
         """Enable auto-apply feature."""
@@ -119,23 +162,61 @@ class AutoApplyService:
         """Add a callback for status updates."""
         self._status_callbacks.append(callback)
 
-    def _notify_status(self, status: Dict[str, Any]):
-        """Notify all status callbacks."""
-        for callback in self._status_callbacks:
-            try:
-                callback(status)
-            except Exception as e:
-                logger.error(f"Error in status callback: {e}")
+    def _notify_status(self, event: str, **fields: Any):
+        """
+        Queue a status update for the callbacks without waiting on them.
+
+        Callbacks run in order on a dispatcher thread, so a slow one (e.g. a
+        webhook) never stalls the apply loop. If they fall more than
+        ``STATUS_BACKLOG`` events behind, the oldest pending events are dropped.
+        The status dict (with its ISO ``timestamp``) is built on that thread,
+        and not at all when nobody is listening.
+
+        Args:
+            event: Event name
+            **fields: Event-specific status fields
+        """
+        if not self._status_callbacks:
+            return
+        with self._status_cond:
+            if len(self._status_events) == self._status_events.maxlen:
+                logger.debug("Status callbacks are falling behind, dropping oldest event")
+            self._status_events.append((time.time(), event, fields))
+            if self._status_thread is None:
+                self._status_thread = threading.Thread(
+                    target=self._dispatch_status,
+                    daemon=True,
+                    name="AutoApplyStatus"
+                )
+                self._status_thread.start()
+            self._status_cond.notify()
+
+    def _dispatch_status(self):
+        """Deliver queued status updates to every callback, forever."""
+        while True:
+            with self._status_cond:
+                while not self._status_events:
+                    self._status_cond.wait()
+                timestamp, event, fields = self._status_events.popleft()
+            status = {
+                "event": event,
+                **fields,
+                "timestamp": datetime.utcfromtimestamp(timestamp).isoformat(),
+            }
+            for callback in list(self._status_callbacks):
+                try:
+                    callback(status)
+                except Exception as e:
+                    logger.error(f"Error in status callback: {e}")
 
     def _on_application_start(self, job: Job):
         """Called when application starts."""
-        self._notify_status({
-            "event": "application_start",
-            "job_id": job.id,
-            "title": job.title,
-            "company": job.company,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
+        self._notify_status(
+            "application_start",
+            job_id=job.id,
+            title=job.title,
+            company=job.company,
+        )
 
         if self.log_agent:
             self.log_agent.log(
@@ -148,13 +229,12 @@ class AutoApplyService:
 
     def _on_application_success(self, job: Job):
         """Called when application succeeds."""
-        self._notify_status({
-            "event": "application_success",
-            "job_id": job.id,
-            "title": job.title,
-            "company": job.company,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
+        self._notify_status(
+            "application_success",
+            job_id=job.id,
+            title=job.title,
+            company=job.company,
+        )
 
         if self.log_agent:
             self.log_agent.log(
@@ -167,14 +247,13 @@ class AutoApplyService:
 
     def _on_application_failure(self, job: Job, error: str):
         """Called when application fails."""
-        self._notify_status({
-            "event": "application_failure",
-            "job_id": job.id,
-            "title": job.title,
-            "company": job.company,
-            "error": error,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
+        self._notify_status(
+            "application_failure",
+            job_id=job.id,
+            title=job.title,
+            company=job.company,
+            error=error,
+        )
 
         if self.log_agent:
             self.log_agent.log_error(
@@ -186,10 +265,7 @@ class AutoApplyService:
 
     def _on_queue_empty(self):
         """Called when queue is empty."""
-        self._notify_status({
-            "event": "queue_empty",
-            "timestamp": datetime.utcnow().isoformat(),
-        })
+        self._notify_status("queue_empty")
 
     def _apply_with_templates(self, job: Job) -> bool:
         """
@@ -205,15 +281,8 @@ class AutoApplyService:
         field_values = self.template_manager.get_field_values(job=job)
 
         # Build application payload
-        payload = {
-            "name": field_values.get("full_name", ""),
-            "email": field_values.get("email", ""),
-            "phone": field_values.get("phone", ""),
-            "linkedin_url": field_values.get("linkedin_url", ""),
-            "portfolio_url": field_values.get("portfolio_url", ""),
-            "cover_letter": job.cover_letter_draft or "",
-            "resume_points": field_values.get("resume_bullets", ""),
-        }
+        payload = {key: field_values.get(field, "") for key, field in self._PAYLOAD_FIELDS}
+        payload["cover_letter"] = job.cover_letter_draft or ""
 
         # Use apply agent
         return self.apply_agent.apply_to_job(
@@ -232,18 +301,19 @@ class AutoApplyService:
         Returns:
             Number of jobs queued
         """
-        query = self.db.query(Job).filter(
-            Job.approved == True,
-            Job.status.notin_([
-                JobStatus.APPLICATION_COMPLETED,
-                JobStatus.APPLICATION_FAILED,
-            ])
+        # lambda_stmt caches the compiled SQL for each shape (with/without run_id);
+        # only the columns add_job needs are streamed, in QUEUE_FETCH_BATCH chunks
+        stmt = lambda_stmt(
+            lambda: select(*QUEUE_COLUMNS).where(
+                Job.approved == True,
+                Job.status.notin_(FINISHED_APPLICATION_STATUSES),
+            )
         )
 
         if run_id:
-            query = query.filter(Job.run_id == run_id)
+            stmt += lambda s: s.where(Job.run_id == run_id)
 
-        jobs = query.all()
+        jobs = self.db.execute(stmt, execution_options={"yield_per": QUEUE_FETCH_BATCH})
         added = self.queue_manager.add_jobs(jobs)
 
         logger.info(f"Queued {added} jobs for application")
@@ -261,16 +331,17 @@ class AutoApplyService:
         """
         threshold = min_score or self.auto_apply_threshold
 
-        jobs = self.db.query(Job).filter(
-            Job.approved == True,
-            Job.relevance_score >= threshold,
-            Job.status.notin_([
-                JobStatus.APPLICATION_COMPLETED,
-                JobStatus.APPLICATION_FAILED,
-            ])
-        ).all()
+        stmt = lambda_stmt(
+            lambda: select(*QUEUE_COLUMNS).where(
+                Job.approved == True,
+                Job.relevance_score >= threshold,
+                Job.status.notin_(FINISHED_APPLICATION_STATUSES),
+            )
+        )
+        jobs = self.db.execute(stmt, execution_options={"yield_per": QUEUE_FETCH_BATCH})
 
-        added = self.queue_manager.add_jobs(jobs)
+        # Above the auto-apply threshold is high priority whatever the score tier
+        added = self.queue_manager.add_jobs(jobs, priority=ApplicationPriority.HIGH)
         logger.info(f"Queued {added} high-score jobs (>= {threshold})")
         return added
 
@@ -309,11 +380,7 @@ class AutoApplyService:
                 apply_func=self._apply_with_templates
             )
             logger.info(f"Background processing complete: {summary}")
-            self._notify_status({
-                "event": "processing_complete",
-                "summary": summary,
-                "timestamp": datetime.utcnow().isoformat(),
-            })
+            self._notify_status("processing_complete", summary=summary)
 
         self._processing_thread = threading.Thread(
             target=process_loop,
@@ -1,31 +1,326 @@
-"""SQLite-backed rate limiter for API endpoints.
+"""Token-bucket rate limiter for API endpoints.
 
-This provides persistent rate limiting that survives server restarts
-and works correctly across multiple threads.
+Buckets live in process memory and are authoritative per process; the
+database copy only lets limits survive restarts. With several server
+workers, each enforces its own limits and their background flushes
+overwrite one another (last writer wins), so exact limits need a single
+worker process.
 """
 
+import atexit
+import functools
+import hashlib
 import logging
+import math
 import threading
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Tuple
+import time
+from typing import Any, Optional, Dict, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, delete
+from sqlalchemy import delete, lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from app.models import RateLimitRecord
+from app.db import engine
+from app.models import RateLimitBucket
 
 logger = logging.getLogger(__name__)
 
+# Locks striped over bucket keys so unrelated clients don't contend
+BUCKET_LOCK_STRIPES = 64
+# Seconds between background writes of changed buckets
+BUCKET_FLUSH_INTERVAL = 1.0
+# Changed buckets that trigger a write before the interval is up
+BUCKET_FLUSH_BATCH = 50
+
+BucketKey = Tuple[str, str]  # (client_id, endpoint)
+
+
+@functools.lru_cache(maxsize=2048)
+def _api_key_client_id(api_key: str) -> str:
+    """Client ID for an API key: a 64-bit BLAKE2b digest, so the key itself is never stored."""
+    return f"key:{hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()}"
+
+
+class BucketStore:
+    """
+    Process-wide token buckets kept in memory and persisted in the background.
+
+    Requests only touch a dict under a striped lock. Buckets are read from
+    ``rate_limit_buckets`` the first time a key is seen (so limits survive
+    restarts), and changed buckets are upserted in one executemany every
+    ``flush_interval`` seconds, as soon as ``flush_batch`` of them are
+    pending, and at interpreter exit. Refill arithmetic uses
+    the monotonic clock; wall-clock time is only used for the persisted rows.
+
+    Persistence is best-effort: a crash loses up to one flush interval of
+    spending, and other processes' buckets are neither read after first use
+    nor merged on write.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = BUCKET_FLUSH_INTERVAL,
+        flush_batch: int = BUCKET_FLUSH_BATCH,
+    ):
+        """
+        Initialize the store (the flush thread starts on the first write).
+
+        Args:
+            flush_interval: Seconds between background flushes
+            flush_batch: Pending buckets that wake the flush thread early
+        """
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # key -> [tokens, monotonic time of last refill, capacity, refill rate]
+        self._buckets: Dict[BucketKey, List[float]] = {}
+        self._locks = [threading.Lock() for _ in range(BUCKET_LOCK_STRIPES)]
+        # key -> (tokens, wall-clock last refill) waiting to be written
+        self._dirty: Dict[BucketKey, Tuple[float, float]] = {}
+        self._dirty_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._table = RateLimitBucket.__table__
+
+    def _lock_for(self, key: BucketKey) -> threading.Lock:
+        return self._locks[hash(key) % BUCKET_LOCK_STRIPES]
+
+    def _load(self, key: BucketKey, now: float, max_requests: int, rate: float) -> List[float]:
+        """Read a bucket from the database, or start a full one."""
+        client_id, endpoint = key
+        try:
+            with engine.connect() as conn:
+                # lambda_stmt caches the compiled SELECT; only the key is re-bound
+                row = conn.execute(
+                    lambda_stmt(
+                        lambda: select(RateLimitBucket.tokens, RateLimitBucket.last_refill).where(
+                            RateLimitBucket.client_id == client_id,
+                            RateLimitBucket.endpoint == endpoint,
+                        )
+                    )
+                ).first()
+        except Exception as e:
+            logger.warning(f"Could not load rate limit bucket {key}: {e}")
+            row = None
+        return self._from_row(row, now, max_requests, rate)
+
+    def _load_client(self, client_id: str) -> Dict[str, Any]:
+        """Read all of a client's persisted buckets in one query, keyed by endpoint."""
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    lambda_stmt(
+                        lambda: select(
+                            RateLimitBucket.endpoint, RateLimitBucket.tokens, RateLimitBucket.last_refill,
+                        ).where(RateLimitBucket.client_id == client_id)
+                    )
+                ).all()
+        except Exception as e:
+            logger.warning(f"Could not load rate limit buckets for {client_id}: {e}")
+            return {}
+        return {row.endpoint: row for row in rows}
+
+    @staticmethod
+    def _from_row(row, now: float, max_requests: int, rate: float) -> List[float]:
+        """Build an in-memory bucket from a persisted row (a full bucket if None)."""
+        if row is None:
+            return [float(max_requests), now, max_requests, rate]
+        elapsed = max(0.0, time.time() - row.last_refill)
+        return [row.tokens, now - elapsed, max_requests, rate]
+
+    @staticmethod
+    def _refill(bucket: List[float], now: float, max_requests: int, rate: float) -> float:
+        """Tokens in a bucket at monotonic time ``now`` under the given limit."""
+        bucket[2], bucket[3] = max_requests, rate
+        return min(float(max_requests), bucket[0] + (now - bucket[1]) * rate)
+
+    def try_acquire(self, key: BucketKey, max_requests: int, rate: float) -> Tuple[bool, float]:
+        """
+        Spend a token from a bucket if one is available.
+
+        Args:
+            key: (client_id, endpoint)
+            max_requests: Bucket capacity
+            rate: Tokens added per second
+
+        Returns:
+            Tuple of (allowed, tokens left in the bucket)
+        """
+        now = time.monotonic()
+        with self._lock_for(key):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = self._load(key, now, max_requests, rate)
+            tokens = self._refill(bucket, now, max_requests, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            bucket[0], bucket[1] = tokens, now
+
+        if allowed:
+            with self._dirty_lock:
+                self._dirty[key] = (tokens, time.time())
+                pending = len(self._dirty)
+            self._ensure_flusher()
+            if pending >= self.flush_batch:
+                self._wake.set()
+        return allowed, tokens
+
+    def peek(self, key: BucketKey, max_requests: int, rate: float) -> float:
+        """Tokens currently available in a bucket, without spending any."""
+        now = time.monotonic()
+        with self._lock_for(key):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = self._load(key, now, max_requests, rate)
+            return self._refill(bucket, now, max_requests, rate)
+
+    def peek_client(self, client_id: str, limits: Dict[str, Tuple[int, float]]) -> Dict[str, float]:
+        """
+        Tokens currently available in several of a client's buckets.
+
+        Buckets not yet in memory are read together in a single query rather
+        than one ``peek`` round trip each.
+
+        Args:
+            client_id: Client identifier
+            limits: Endpoint -> (max_requests, refill rate per second)
+
+        Returns:
+            Dict mapping endpoint to available tokens
+        """
+        rows = {}
+        if any((client_id, endpoint) not in self._buckets for endpoint in limits):
+            rows = self._load_client(client_id)
+
+        now = time.monotonic()
+        tokens: Dict[str, float] = {}
+        for endpoint, (max_requests, rate) in limits.items():
+            key = (client_id, endpoint)
+            with self._lock_for(key):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = self._from_row(rows.get(endpoint), now, max_requests, rate)
+                tokens[endpoint] = self._refill(bucket, now, max_requests, rate)
+        return tokens
+
+    def reset(self, client_id: str, endpoint: Optional[str] = None) -> int:
+        """
+        Forget a client's buckets in memory and in the database.
+
+        Returns:
+            Number of persisted buckets deleted
+        """
+        for key in [k for k in list(self._buckets) if k[0] == client_id and (not endpoint or k[1] == endpoint)]:
+            with self._lock_for(key):
+                self._buckets.pop(key, None)
+            with self._dirty_lock:
+                self._dirty.pop(key, None)
+
+        stmt = delete(self._table).where(self._table.c.client_id == client_id)
+        if endpoint:
+            stmt = stmt.where(self._table.c.endpoint == endpoint)
+        with engine.begin() as conn:
+            return conn.execute(stmt).rowcount
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flush thread if it isn't running."""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._flush_loop, name="RateLimitFlush", daemon=True,
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+            self._prune()
+
+    def flush(self) -> None:
+        """Write every changed bucket to the database in one executemany upsert."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+
+        rows = [
+            {"client_id": client_id, "endpoint": endpoint, "tokens": tokens, "last_refill": last_refill}
+            for (client_id, endpoint), (tokens, last_refill) in dirty.items()
+        ]
+        insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(self._table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self._table.c.client_id, self._table.c.endpoint],
+            set_={"tokens": stmt.excluded.tokens, "last_refill": stmt.excluded.last_refill},
+        )
+        try:
+            with engine.begin() as conn:
+                conn.execute(stmt, rows)
+        except Exception as e:
+            logger.warning(f"Failed to persist {len(rows)} rate limit buckets: {e}")
+            # Retry next time unless a newer state was recorded meanwhile
+            with self._dirty_lock:
+                for key, value in dirty.items():
+                    self._dirty.setdefault(key, value)
+
+    def _prune(self) -> None:
+        """Drop in-memory buckets that have refilled completely (the database has them)."""
+        now = time.monotonic()
+        for key in list(self._buckets):
+            with self._lock_for(key):
+                bucket = self._buckets.get(key)
+                if bucket is not None and bucket[0] + (now - bucket[1]) * bucket[3] >= bucket[2]:
+                    with self._dirty_lock:
+                        if key in self._dirty:
+                            continue
+                    del self._buckets[key]
+
+    def close(self) -> None:
+        """Stop the flush thread and write any pending buckets."""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+
+# Global bucket store with thread-safe initialization
+_bucket_store: Optional[BucketStore] = None
+_bucket_store_lock = threading.Lock()
+
+
+def get_bucket_store() -> BucketStore:
+    """Get or create the process-wide bucket store.
+
+    Thread-safe implementation using double-checked locking pattern.
+    """
+    global _bucket_store
+    if _bucket_store is None:
+        with _bucket_store_lock:
+            if _bucket_store is None:
+                _bucket_store = BucketStore()
+    return _bucket_store
+
 
 class RateLimiter:
     """
-    SQLite-backed rate limiter with configurable limits per endpoint.
+    Per-process rate limiter with configurable limits per endpoint.
 
     Features:
-    - Persistent across restarts (SQLite-backed)
+    - Limits enforced per process; run one server worker for exact limits
+    - Best-effort persistence across restarts (written in the background)
     - Thread-safe operations
     - Configurable per-endpoint limits
-    - Automatic cleanup of old records
-    - Sliding window rate limiting
+    - Token-bucket rate limiting: each (client, endpoint) bucket holds up to
+      max_requests tokens and refills at max_requests / window_seconds per second
+    - Allowed requests only touch process memory (see ``BucketStore``)
     """
 
     # Default rate limits: (max_requests, window_seconds)
@@ -50,28 +345,26 @@ class RateLimiter:
         "update_config": (5, 60),
     }
 
-    # Cleanup old records every N requests
-    CLEANUP_INTERVAL = 100
-
     def __init__(
         self,
-        db: Session,
+        db: Optional[Session] = None,
         custom_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        store: Optional[BucketStore] = None,
     ):
         """
         Initialize the rate limiter.
 
         Args:
-            db: Database session
+            db: Database session (optional; bucket state lives in the shared store,
+                which uses its own connections)
             custom_limits: Optional custom limits to override defaults
+            store: Bucket store (defaults to the process-wide one)
         """
         self.db = db
         self.limits = {**self.DEFAULT_LIMITS}
         if custom_limits:
             self.limits.update(custom_limits)
-
-        self._request_count = 0
-        self._lock = threading.Lock()
+        self.store = store or get_bucket_store()
 
     def _get_limit(self, endpoint: str) -> Tuple[int, int]:
         """Get rate limit for an endpoint."""
@@ -87,9 +380,7 @@ class RateLimiter:
         # Check for API key first (more reliable identifier)
         api_key = request.headers.get("X-API-Key")
         if api_key:
-            # Use hash of API key to avoid storing it
-            import hashlib
-            return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+            return _api_key_client_id(api_key)
 
         # Check X-Forwarded-For for clients behind proxy
         forwarded_for = request.headers.get("X-Forwarded-For")
@@ -109,7 +400,7 @@ class RateLimiter:
         endpoint: str,
     ) -> Tuple[bool, Dict[str, int]]:
         """
-        Check if a request is within rate limits.
+        Check if a request is within rate limits, spending a token if it is.
 
         Args:
             client_id: Client identifier
@@ -120,83 +411,25 @@ class RateLimiter:
             rate_limit_info contains: limit, remaining, reset_seconds
         """
         max_requests, window_seconds = self._get_limit(endpoint)
-        window_start = datetime.utcnow() - timedelta(seconds=window_seconds)
-
-        with self._lock:
-            # Count requests in current window
-            request_count = self.db.query(RateLimitRecord).filter(
-                and_(
-                    RateLimitRecord.client_id == client_id,
-                    RateLimitRecord.endpoint == endpoint,
-                    RateLimitRecord.timestamp >= window_start,
-                )
-            ).count()
-
-            # Calculate remaining requests
-            remaining = max(0, max_requests - request_count)
-
-            # Calculate reset time (when oldest request in window expires)
-            oldest_request = self.db.query(RateLimitRecord).filter(
-                and_(
-                    RateLimitRecord.client_id == client_id,
-                    RateLimitRecord.endpoint == endpoint,
-                    RateLimitRecord.timestamp >= window_start,
-                )
-            ).order_by(RateLimitRecord.timestamp.asc()).first()
-
-            if oldest_request:
-                reset_time = oldest_request.timestamp + timedelta(seconds=window_seconds)
-                reset_seconds = max(0, int((reset_time - datetime.utcnow()).total_seconds()))
-            else:
-                reset_seconds = window_seconds
-
-            rate_limit_info = {
-                "limit": max_requests,
-                "remaining": remaining,
-                "reset_seconds": reset_seconds,
-                "window_seconds": window_seconds,
-            }
-
-            is_allowed = request_count < max_requests
-
-            if is_allowed:
-                # Record this request
-                record = RateLimitRecord(
-                    client_id=client_id,
-                    endpoint=endpoint,
-                    timestamp=datetime.utcnow(),
-                )
-                self.db.add(record)
-                self.db.commit()
-
-                # Periodic cleanup
-                self._request_count += 1
-                if self._request_count >= self.CLEANUP_INTERVAL:
-                    self._cleanup_old_records()
-                    self._request_count = 0
-
-            return is_allowed, rate_limit_info
-
-    def _cleanup_old_records(self):
-        """Remove expired rate limit records."""
-        try:
-            # Find the longest window we track
-            max_window = max(limit[1] for limit in self.limits.values())
-            cutoff = datetime.utcnow() - timedelta(seconds=max_window * 2)
-
-            # Delete old records
-            deleted = self.db.query(RateLimitRecord).filter(
-                RateLimitRecord.timestamp < cutoff
-            ).delete(synchronize_session=False)
-
-            self.db.commit()
-
-            if deleted > 0:
-                logger.debug(f"Cleaned up {deleted} old rate limit records")
-
-        except Exception as e:
-            logger.error(f"Error cleaning up rate limit records: {e}")
-            self.db.rollback()
+        rate = max_requests / window_seconds
+        is_allowed, tokens = self.store.try_acquire((client_id, endpoint), max_requests, rate)
+
+        if is_allowed:
+            remaining = int(tokens)
+            # Seconds until the bucket is full again
+            reset_seconds = math.ceil((max_requests - tokens) / rate)
+        else:
+            remaining = 0
+            # Seconds until one whole token is available
+            reset_seconds = max(1, math.ceil((1 - tokens) / rate))
+
+        rate_limit_info = {
+            "limit": max_requests,
+            "remaining": remaining,
+            "reset_seconds": reset_seconds,
+            "window_seconds": window_seconds,
+        }
+        return is_allowed, rate_limit_info
 
     def reset_limit(self, client_id: str, endpoint: Optional[str] = None):
         """
@@ -206,21 +439,11 @@ class RateLimiter:
             client_id: Client identifier
             endpoint: Optional specific endpoint (resets all if None)
         """
-        with self._lock:
-            try:
-                query = self.db.query(RateLimitRecord).filter(
-                    RateLimitRecord.client_id == client_id
-                )
-                if endpoint:
-                    query = query.filter(RateLimitRecord.endpoint == endpoint)
-
-                deleted = query.delete(synchronize_session=False)
-                self.db.commit()
-                logger.info(f"Reset rate limit for {client_id}: deleted {deleted} records")
-
-            except Exception as e:
-                logger.error(f"Error resetting rate limit: {e}")
-                self.db.rollback()
+        try:
+            deleted = self.store.reset(client_id, endpoint)
+            logger.info(f"Reset rate limit for {client_id}: deleted {deleted} buckets")
+        except Exception as e:
+            logger.error(f"Error resetting rate limit: {e}")
 
     def get_status(self, client_id: str) -> Dict[str, Dict[str, int]]:
         """
@@ -232,29 +455,43 @@ class RateLimiter:
         Returns:
             Dict mapping endpoint to rate limit info
         """
-        status = {}
+        tokens = self.store.peek_client(client_id, {
+            endpoint: (max_requests, max_requests / window_seconds)
+            for endpoint, (max_requests, window_seconds) in self.limits.items()
+        })
 
+        status = {}
         for endpoint, (max_requests, window_seconds) in self.limits.items():
-            window_start = datetime.utcnow() - timedelta(seconds=window_seconds)
-
-            request_count = self.db.query(RateLimitRecord).filter(
-                and_(
-                    RateLimitRecord.client_id == client_id,
-                    RateLimitRecord.endpoint == endpoint,
-                    RateLimitRecord.timestamp >= window_start,
-                )
-            ).count()
+            remaining = int(tokens[endpoint])
 
             status[endpoint] = {
                 "limit": max_requests,
-                "used": request_count,
-                "remaining": max(0, max_requests - request_count),
+                "used": max_requests - remaining,
+                "remaining": remaining,
                 "window_seconds": window_seconds,
             }
 
         return status
 
 
+# Global rate limiter with thread-safe initialization
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the shared rate limiter (default limits, process-wide buckets).
+
+    Thread-safe implementation using double-checked locking pattern.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
 def rate_limit_dependency(endpoint: str):
     """
     FastAPI dependency for rate limiting.
@@ -267,14 +504,10 @@ def rate_limit_dependency(endpoint: str):
         ):
             ...
     """
-    from fastapi import Request, HTTPException, Depends
-    from app.db import get_db
-
-    async def check_rate_limit(
-        request: Request,
-        db: Session = Depends(get_db),
-    ) -> bool:
-        limiter = RateLimiter(db)
+    from fastapi import Request, HTTPException
+
+    async def check_rate_limit(request: Request) -> bool:
+        limiter = get_rate_limiter()
         client_id = limiter._get_client_id(request)
 
         is_allowed, info = limiter.check_rate_limit(client_id, endpoint)
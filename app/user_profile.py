@@ -1,14 +1,29 @@
 """User profile management for content generation."""
 
-from typing import Optional, Dict, List
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Optional, Dict, List, Mapping, Tuple
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.models import UserProfile
 from app.db import get_db_context
 
+# Seconds a cached profile dict is served before the database is read again
+PROFILE_CACHE_TTL_SECONDS = 60.0
+
+# profile_id -> (monotonic fetch time, read-only profile dict)
+_profile_cache: Dict[int, Tuple[float, Mapping[str, Any]]] = {}
+_profile_cache_lock = threading.Lock()
+# Bumped on every invalidation so a fetch racing with an update isn't cached
+_profile_cache_generation = 0
+
 
 def get_user_profile(db: Session, profile_id: int = 1) -> Optional[UserProfile]:
     """Get the user profile (defaults to ID 1)."""
-    return db.query(UserProfile).filter(UserProfile.id == profile_id).first()
+    # Called for every generated document; lambda_stmt reuses the compiled SELECT
+    stmt = lambda_stmt(lambda: select(UserProfile).where(UserProfile.id == profile_id))
+    return db.execute(stmt).scalars().first()
 
 
 def create_default_profile(
@@ -38,11 +53,49 @@ def create_default_profile(
         db.add(profile)
         db.commit()
         db.refresh(profile)
+        invalidate_profile_cache(profile.id)
         return profile
 
 
-def get_profile_dict(profile_id: int = 1) -> Dict:
-    """Get user profile as a dictionary for LLM prompts."""
+def invalidate_profile_cache(profile_id: Optional[int] = None) -> None:
+    """
+    Drop cached profile dicts after a profile changes.
+
+    Args:
+        profile_id: Profile to drop (all profiles if None)
+    """
+    global _profile_cache_generation
+    with _profile_cache_lock:
+        _profile_cache_generation += 1
+        if profile_id is None:
+            _profile_cache.clear()
+        else:
+            _profile_cache.pop(profile_id, None)
+
+
+def get_profile_dict(profile_id: int = 1) -> Mapping[str, Any]:
+    """
+    Get user profile as a read-only dictionary for LLM prompts.
+
+    Results are cached for ``PROFILE_CACHE_TTL_SECONDS``; code that modifies
+    a profile must call ``invalidate_profile_cache``.
+    """
+    now = time.monotonic()
+    with _profile_cache_lock:
+        cached = _profile_cache.get(profile_id)
+        if cached is not None and now - cached[0] < PROFILE_CACHE_TTL_SECONDS:
+            return cached[1]
+        generation = _profile_cache_generation
+
+    profile_dict = MappingProxyType(_load_profile_dict(profile_id))
+    with _profile_cache_lock:
+        if generation == _profile_cache_generation:
+            _profile_cache[profile_id] = (now, profile_dict)
+    return profile_dict
+
+
+def _load_profile_dict(profile_id: int) -> Dict[str, Any]:
+    """Read a profile from the database and flatten it for prompts."""
     with get_db_context() as db:
         profile = get_user_profile(db, profile_id)
         if not profile:
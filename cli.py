@@ -2,20 +2,25 @@
 
 import argparse
 import logging
+import signal
 import sys
+import threading
 from pathlib import Path
 
-from app.db import init_db, get_db_context
-from app.orchestrator import PipelineOrchestrator
-from app.scheduling import get_scheduler
-from app.config import config
+# app.* modules pull in SQLAlchemy, scrapers and LLM clients, so each command
+# imports what it needs; parsing arguments and --help load none of them
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Accepted --remote-pref values, in the order shown by --help
+REMOTE_PREFS = ("remote", "hybrid", "on-site", "any")
+
 
 def run_search(args):
     """Run a search-only pipeline."""
+    from app.db import get_db_context
+    from app.orchestrator import PipelineOrchestrator
+
     logger.info("Running search pipeline...")
     
     with get_db_context() as db:
@@ -42,6 +47,9 @@ def run_search(args):
 
 def run_full(args):
     """Run the full pipeline."""
+    from app.db import get_db_context
+    from app.orchestrator import PipelineOrchestrator
+
     logger.info("Running full pipeline...")
     
     with get_db_context() as db:
@@ -75,67 +83,97 @@ def run_full(args):
 
 def start_scheduler(args):
     """Start the scheduler."""
+    from app.scheduling import get_scheduler
+
     logger.info("Starting scheduler...")
     
     scheduler = get_scheduler()
     scheduler.start()
     
-    try:
-        # Keep main thread alive
-        import time
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        logger.info("Stopping scheduler...")
-        scheduler.stop()
+    # Keep main thread blocked (no periodic wakeups) until Ctrl-C or SIGTERM
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    stop_event.wait()
+
+    logger.info("Stopping scheduler...")
+    scheduler.stop()
 
 
 def init_database(args):
     """Initialize the database."""
+    from app.db import init_db
+
     logger.info("Initializing database...")
     init_db()
     logger.info("Database initialized")
 
 
+def _add_search_arguments(parser):
+    """Arguments shared by the search and run commands."""
+    parser.add_argument("--titles", nargs="+", required=True, help="Job titles to search")
+    parser.add_argument("--locations", nargs="+", help="Location filters")
+    parser.add_argument("--remote", action="store_true", help="Remote filter")
+    parser.add_argument("--keywords", nargs="+", help="Keywords")
+    parser.add_argument("--sources", nargs="+", help="Job sources")
+    parser.add_argument("--max-results", type=int, default=50, help="Max results per source")
+
+
+def _add_run_arguments(parser):
+    """Arguments for the run command."""
+    _add_search_arguments(parser)
+    parser.add_argument("--companies", nargs="+", help="Target companies")
+    parser.add_argument("--must-have", nargs="+", help="Must-have keywords")
+    parser.add_argument("--nice-to-have", nargs="+", help="Nice-to-have keywords")
+    parser.add_argument("--remote-pref", choices=REMOTE_PREFS, help="Remote preference")
+    parser.add_argument("--salary-min", type=int, help="Minimum salary")
+    parser.add_argument("--no-content", action="store_true", help="Skip content generation")
+    parser.add_argument("--auto-apply", action="store_true", help="Auto-apply to approved jobs")
+
+
+# command -> (help text, argument builder or None, handler)
+COMMANDS = {
+    "search": ("Run search only", _add_search_arguments, run_search),
+    "run": ("Run full pipeline", _add_run_arguments, run_full),
+    "schedule": ("Start scheduler", None, start_scheduler),
+    "init": ("Initialize database", None, init_database),
+}
+
+# Top-level help built from COMMANDS once, so --help doesn't construct argparse
+STATIC_HELP_TEXT = "\n".join(
+    [
+        f"usage: cli.py [-h] {{{','.join(COMMANDS)}}} ...",
+        "",
+        "Agentic Job Search Pipeline CLI",
+        "",
+        "commands:",
+        *(f"  {name:<22}{help_text}" for name, (help_text, _, _) in COMMANDS.items()),
+        "",
+        "options:",
+        f"  {'-h, --help':<22}show this help message and exit",
+    ]
+)
+
+
 def main():
     """Main CLI entrypoint."""
+    # Bare and top-level --help invocations are answered without argparse
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(STATIC_HELP_TEXT)
+        sys.exit(0 if len(sys.argv) > 1 else 1)
+    
     parser = argparse.ArgumentParser(description="Agentic Job Search Pipeline CLI")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
-    # Search command
-    search_parser = subparsers.add_parser("search", help="Run search only")
-    search_parser.add_argument("--titles", nargs="+", required=True, help="Job titles to search")
-    search_parser.add_argument("--locations", nargs="+", help="Location filters")
-    search_parser.add_argument("--remote", action="store_true", help="Remote filter")
-    search_parser.add_argument("--keywords", nargs="+", help="Keywords")
-    search_parser.add_argument("--sources", nargs="+", help="Job sources")
-    search_parser.add_argument("--max-results", type=int, default=50, help="Max results per source")
-    search_parser.set_defaults(func=run_search)
-    
-    # Full pipeline command
-    full_parser = subparsers.add_parser("run", help="Run full pipeline")
-    full_parser.add_argument("--titles", nargs="+", required=True, help="Job titles to search")
-    full_parser.add_argument("--locations", nargs="+", help="Location filters")
-    full_parser.add_argument("--remote", action="store_true", help="Remote filter")
-    full_parser.add_argument("--keywords", nargs="+", help="Keywords")
-    full_parser.add_argument("--sources", nargs="+", help="Job sources")
-    full_parser.add_argument("--max-results", type=int, default=50, help="Max results per source")
-    full_parser.add_argument("--companies", nargs="+", help="Target companies")
-    full_parser.add_argument("--must-have", nargs="+", help="Must-have keywords")
-    full_parser.add_argument("--nice-to-have", nargs="+", help="Nice-to-have keywords")
-    full_parser.add_argument("--remote-pref", choices=["remote", "hybrid", "on-site", "any"], help="Remote preference")
-    full_parser.add_argument("--salary-min", type=int, help="Minimum salary")
-    full_parser.add_argument("--no-content", action="store_true", help="Skip content generation")
-    full_parser.add_argument("--auto-apply", action="store_true", help="Auto-apply to approved jobs")
-    full_parser.set_defaults(func=run_full)
-    
-    # Scheduler command
-    scheduler_parser = subparsers.add_parser("schedule", help="Start scheduler")
-    scheduler_parser.set_defaults(func=start_scheduler)
-    
-    # Init command
-    init_parser = subparsers.add_parser("init", help="Initialize database")
-    init_parser.set_defaults(func=init_database)
+    # A known command only needs its own subparser; typos get all of them
+    command = sys.argv[1]
+    names = [command] if command in COMMANDS else list(COMMANDS)
+    for name in names:
+        help_text, add_arguments, handler = COMMANDS[name]
+        command_parser = subparsers.add_parser(name, help=help_text)
+        if add_arguments:
+            add_arguments(command_parser)
+        command_parser.set_defaults(func=handler)
     
     args = parser.parse_args()
     
@@ -151,4 +189,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     main()
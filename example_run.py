@@ -7,18 +7,17 @@ This script shows a complete example of running a search for
 """
 
 import logging
-from app.db import get_db_context
-from app.orchestrator import PipelineOrchestrator
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
 def main():
     """Run an example pipeline execution."""
+    # Imported here so loading the script doesn't pull in the ORM and scrapers
+    from app.db import get_db_context
+    from app.models import Job
+    from app.orchestrator import PipelineOrchestrator
+
     logger.info("Starting example job search pipeline run")
     
     with get_db_context() as db:
@@ -64,33 +63,41 @@ def main():
             auto_apply=False,  # Always requires manual approval
         )
         
-        logger.info("=" * 60)
-        logger.info("Pipeline Run Complete!")
-        logger.info("=" * 60)
-        logger.info(f"Run ID: {result['run_id']}")
-        logger.info(f"Jobs Found: {result['jobs_found']}")
-        logger.info(f"Jobs Scored: {result['jobs_scored']}")
-        logger.info(f"Jobs Above Threshold: {result['jobs_above_threshold']}")
-        logger.info(f"Jobs Applied: {result['jobs_applied']}")
-        logger.info(f"Jobs Failed: {result['jobs_failed']}")
-        logger.info("=" * 60)
+        logger.info("\n".join([
+            "=" * 60,
+            "Pipeline Run Complete!",
+            "=" * 60,
+            f"Run ID: {result['run_id']}",
+            f"Jobs Found: {result['jobs_found']}",
+            f"Jobs Scored: {result['jobs_scored']}",
+            f"Jobs Above Threshold: {result['jobs_above_threshold']}",
+            f"Jobs Applied: {result['jobs_applied']}",
+            f"Jobs Failed: {result['jobs_failed']}",
+            "=" * 60,
+        ]))
         
-        # Show some example jobs
-        from app.models import Job
-        jobs = db.query(Job).filter(
+        # Show some example jobs (only the displayed columns, not the full description)
+        jobs = db.query(
+            Job.title, Job.company, Job.location, Job.relevance_score, Job.source_url
+        ).filter(
             Job.run_id == run.id
         ).order_by(Job.relevance_score.desc().nullslast()).limit(5).all()
         
         if jobs:
-            logger.info("\nTop 5 Jobs Found:")
+            lines = ["\nTop 5 Jobs Found:"]
             for i, job in enumerate(jobs, 1):
-                logger.info(f"\n{i}. {job.title} at {job.company}")
-                logger.info(f"   Location: {job.location}")
-                logger.info(f"   Score: {job.relevance_score:.2f}" if job.relevance_score else "   Score: N/A")
-                logger.info(f"   URL: {job.source_url}")
+                lines.append(f"\n{i}. {job.title} at {job.company}")
+                lines.append(f"   Location: {job.location}")
+                lines.append(f"   Score: {job.relevance_score:.2f}" if job.relevance_score else "   Score: N/A")
+                lines.append(f"   URL: {job.source_url}")
+            logger.info("\n".join(lines))
         
         logger.info("\nExample run complete! Check the database or API for full results.")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     main()
@@ -0,0 +1,37 @@
+import sys
+
+import migrate_all
+
+DB_PATH = "job_pipeline.db"
+
+
+def apply(cursor, columns, indexes):
+    """Add the company index bookkeeping columns inside the caller's transaction.
+
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    # Check if columns exist
+    company_columns = columns("companies")
+
+    if "indexed_text_hash" in company_columns:
+        print("Column 'indexed_text_hash' already exists.")
+    else:
+        print("Adding 'indexed_text_hash' column to companies table...")
+        cursor.execute("ALTER TABLE companies ADD COLUMN indexed_text_hash VARCHAR(64)")
+        company_columns.add("indexed_text_hash")
+
+    if "indexed_at" in company_columns:
+        print("Column 'indexed_at' already exists.")
+    else:
+        print("Adding 'indexed_at' column to companies table...")
+        cursor.execute("ALTER TABLE companies ADD COLUMN indexed_at DATETIME")
+        company_columns.add("indexed_at")
+
+
+def migrate():
+    return migrate_all.run_standalone(apply, DB_PATH)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate() else 1)
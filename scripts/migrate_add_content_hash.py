@@ -1,37 +1,34 @@
-import sqlite3
-import os
+import sys
+
+import migrate_all
 
 DB_PATH = "job_pipeline.db"
 
+
+def apply(cursor, columns, indexes):
+    """Add jobs.content_hash and its index inside the caller's transaction.
+
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    # Check if column exists
+    jobs_columns = columns("jobs")
+
+    if "content_hash" in jobs_columns:
+        print("Column 'content_hash' already exists. No migration needed.")
+    else:
+        print("Adding 'content_hash' column to jobs table...")
+        cursor.execute("ALTER TABLE jobs ADD COLUMN content_hash VARCHAR(32)")
+        jobs_columns.add("content_hash")
+        # Create index as per model definition
+        print("Creating index for 'content_hash'...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_jobs_content_hash ON jobs (content_hash)")
+        indexes("jobs").add("ix_jobs_content_hash")
+
+
 def migrate():
-    if not os.path.exists(DB_PATH):
-        print(f"Database {DB_PATH} not found. Skipping migration.")
-        return
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    try:
-        # Check if column exists
-        cursor.execute("PRAGMA table_info(jobs)")
-        columns = [info[1] for info in cursor.fetchall()]
-        
-        if "content_hash" in columns:
-            print("Column 'content_hash' already exists. No migration needed.")
-        else:
-            print("Adding 'content_hash' column to jobs table...")
-            cursor.execute("ALTER TABLE jobs ADD COLUMN content_hash VARCHAR(32)")
-            # Create index as per model definition
-            print("Creating index for 'content_hash'...")
-            cursor.execute("CREATE INDEX IF NOT EXISTS ix_jobs_content_hash ON jobs (content_hash)")
-            print("Migration successful.")
-            
-        conn.commit()
-    except Exception as e:
-        print(f"Migration failed: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+    return migrate_all.run_standalone(apply, DB_PATH)
+
 
 if __name__ == "__main__":
-    migrate()
+    sys.exit(0 if migrate() else 1)
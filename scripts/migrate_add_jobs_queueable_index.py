@@ -0,0 +1,40 @@
+import sys
+
+import migrate_all
+
+DB_PATH = "job_pipeline.db"
+
+
+def apply(cursor, columns, indexes):
+    """Replace the single-column approved index with ix_jobs_queueable inside the caller's transaction.
+
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    if not columns("jobs"):
+        print("Table 'jobs' not found. It will be created with the index on first run.")
+        return
+
+    jobs_indexes = indexes("jobs")
+    if "ix_jobs_queueable" in jobs_indexes and "ix_jobs_approved" not in jobs_indexes:
+        print("Index 'ix_jobs_queueable' already exists. No migration needed.")
+        return
+
+    # create_all only adds indexes to new tables, so existing databases need it here
+    if "ix_jobs_queueable" not in jobs_indexes:
+        print("Adding index 'ix_jobs_queueable' on jobs (approved, relevance_score, status)...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_jobs_queueable ON jobs (approved, relevance_score, status)")
+        jobs_indexes.add("ix_jobs_queueable")
+    # Its leading column makes the old approved-only index redundant
+    if "ix_jobs_approved" in jobs_indexes:
+        print("Dropping redundant index 'ix_jobs_approved'...")
+        cursor.execute("DROP INDEX IF EXISTS ix_jobs_approved")
+        jobs_indexes.discard("ix_jobs_approved")
+
+
+def migrate():
+    return migrate_all.run_standalone(apply, DB_PATH)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate() else 1)
@@ -1,36 +1,37 @@
-import sqlite3
-import os
+import sys
+
+import migrate_all
 
 DB_PATH = "job_pipeline.db"
 
+
+def apply(cursor, columns, indexes):
+    """Add the LinkedIn credential columns inside the caller's transaction.
+
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    # Check if columns exist
+    profile_columns = columns("user_profiles")
+
+    if "linkedin_user" in profile_columns:
+        print("Column 'linkedin_user' already exists.")
+    else:
+        print("Adding 'linkedin_user' column...")
+        cursor.execute("ALTER TABLE user_profiles ADD COLUMN linkedin_user VARCHAR(200)")
+        profile_columns.add("linkedin_user")
+
+    if "linkedin_password" in profile_columns:
+        print("Column 'linkedin_password' already exists.")
+    else:
+        print("Adding 'linkedin_password' column...")
+        cursor.execute("ALTER TABLE user_profiles ADD COLUMN linkedin_password TEXT")
+        profile_columns.add("linkedin_password")
+
+
 def migrate():
-    if not os.path.exists(DB_PATH):
-        print(f"Database {DB_PATH} not found. Skipping migration.")
-        return
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    try:
-        # Check if columns exist
-        cursor.execute("PRAGMA table_info(user_profiles)")
-        columns = [info[1] for info in cursor.fetchall()]
-        
-        if "linkedin_user" not in columns:
-            print("Adding 'linkedin_user' column...")
-            cursor.execute("ALTER TABLE user_profiles ADD COLUMN linkedin_user VARCHAR(200)")
-            
-        if "linkedin_password" not in columns:
-            print("Adding 'linkedin_password' column...")
-            cursor.execute("ALTER TABLE user_profiles ADD COLUMN linkedin_password TEXT")
-            
-        print("Migration successful.")
-        conn.commit()
-    except Exception as e:
-        print(f"Migration failed: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+    return migrate_all.run_standalone(apply, DB_PATH)
+
 
 if __name__ == "__main__":
-    migrate()
+    sys.exit(0 if migrate() else 1)
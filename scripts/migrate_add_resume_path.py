@@ -6,66 +6,62 @@ Run this script if you're upgrading from a previous version:
     python scripts/migrate_add_resume_path.py
 """
 
-import sqlite3
+import os
 import sys
 from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import migrate_all
 
-def migrate():
-    """Add resume_file_path column to user_profiles table if it doesn't exist."""
-    db_path = Path("job_pipeline.db")
+DB_PATH = "job_pipeline.db"
 
-    if not db_path.exists():
-        print("Database not found. It will be created with the new schema on first run.")
-        return
+def apply(cursor, columns, indexes):
+    """
+    Add resume_file_path inside the caller's transaction and link an existing resume.
 
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
+    ``columns(table)`` and ``indexes(table)`` return the (mutable) sets of a
+    table's column and index names.
+    """
+    # Check if column already exists
+    profile_columns = columns("user_profiles")
 
-    try:
-        # Check if column already exists
-        cursor.execute("PRAGMA table_info(user_profiles)")
-        columns = [col[1] for col in cursor.fetchall()]
+    if "resume_file_path" in profile_columns:
+        print("Column 'resume_file_path' already exists. No migration needed.")
+        return
 
-        if "resume_file_path" in columns:
-            print("Column 'resume_file_path' already exists. No migration needed.")
-            return
+    # Add the new column
+    print("Adding 'resume_file_path' column to user_profiles table...")
+    cursor.execute("""
+        ALTER TABLE user_profiles
+        ADD COLUMN resume_file_path VARCHAR(500)
+    """)
+    profile_columns.add("resume_file_path")
 
-        # Add the new column
-        print("Adding 'resume_file_path' column to user_profiles table...")
-        cursor.execute("""
-            ALTER TABLE user_profiles
-            ADD COLUMN resume_file_path VARCHAR(500)
-        """)
-        conn.commit()
-        print("Migration successful!")
+    # Check if there are existing resume files to link
+    resume_dir = Path("resumes")
+    if resume_dir.exists():
+        # One pass over the directory, one stat per candidate, keeping the newest
+        with os.scandir(resume_dir) as entries:
+            newest = max(
+                (entry for entry in entries if entry.name.startswith("resume_")),
+                key=lambda entry: entry.stat().st_mtime,
+                default=None,
+            )
+        if newest is not None:
+            latest_resume = str(resume_dir / newest.name)
+            print(f"Linking existing resume to user profile: {latest_resume}")
 
-        # Check if there are existing resume files to link
-        resume_dir = Path("resumes")
-        if resume_dir.exists():
-            resume_files = sorted(resume_dir.glob("resume_*"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if resume_files:
-                latest_resume = str(resume_files[0])
-                print(f"Found existing resume: {latest_resume}")
+            # Update user profile with the resume path
+            cursor.execute("""
+                UPDATE user_profiles
+                SET resume_file_path = ?
+                WHERE id = 1
+            """, (latest_resume,))
 
-                # Update user profile with the resume path
-                cursor.execute("""
-                    UPDATE user_profiles
-                    SET resume_file_path = ?
-                    WHERE id = 1
-                """, (latest_resume,))
-                conn.commit()
-                print(f"Updated user profile with resume path: {latest_resume}")
 
-    except sqlite3.Error as e:
-        print(f"Migration error: {e}")
-        conn.rollback()
-        sys.exit(1)
-    finally:
-        conn.close()
+def migrate():
+    """Add resume_file_path column to user_profiles table if it doesn't exist."""
+    return migrate_all.run_standalone(apply, DB_PATH)
 
 
 if __name__ == "__main__":
-    migrate()
+    sys.exit(0 if migrate() else 1)
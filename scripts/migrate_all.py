@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Run every schema migration in this directory in one transaction.
+
+Each table's ``PRAGMA table_info`` and index list are read once and shared
+between the migrations that touch them. The migrations' ``apply`` functions
+only report and record the statements they need; the schema changes then go
+to SQLite in one ``executescript`` call inside a single
+``BEGIN IMMEDIATE``/``COMMIT``, and the outcome is printed here. Either all
+migrations land or none do.
+
+    python scripts/migrate_all.py
+
+The individual scripts run their single migration through ``run_standalone``.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import migrate_add_company_index_hash
+import migrate_add_content_hash
+import migrate_add_is_onboarded
+import migrate_add_jobs_queueable_index
+import migrate_add_linkedin_creds
+import migrate_add_resume_path
+
+DB_PATH = "job_pipeline.db"
+
+# Applied in this order
+MIGRATIONS = (
+    migrate_add_content_hash,
+    migrate_add_is_onboarded,
+    migrate_add_linkedin_creds,
+    migrate_add_resume_path,
+    migrate_add_company_index_hash,
+    migrate_add_jobs_queueable_index,
+)
+
+
+class _StatementBuffer:
+    """Cursor stand-in for ``apply``: records statements instead of running them."""
+
+    def __init__(self):
+        self.script = []
+        self.parameterized = []
+
+    def execute(self, sql, parameters=()):
+        # Bound parameters can't go through executescript, so those run separately
+        if parameters:
+            self.parameterized.append((sql, parameters))
+        else:
+            self.script.append(sql.strip().rstrip(";") + ";")
+
+
+def _apply_migrations(db_path, migrations):
+    """
+    Apply ``(name, apply)`` pairs to a SQLite database in one transaction.
+
+    Args:
+        db_path: Path to the database file
+        migrations: Sequence of ``(name, apply)``; a name is printed before its migration
+
+    Returns:
+        True if the migrations were committed (or there was nothing to migrate)
+    """
+    if not Path(db_path).exists():
+        print(f"Database {db_path} not found. It will be created with the current schema on first run.")
+        return True
+
+    # Autocommit mode so the explicit transaction below is the only one
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    table_columns = {}
+    table_indexes = {}
+
+    def columns(table):
+        if table not in table_columns:
+            cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+            table_columns[table] = {name for (name,) in cursor.fetchall()}
+        return table_columns[table]
+
+    def indexes(table):
+        if table not in table_indexes:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))
+            table_indexes[table] = {name for (name,) in cursor.fetchall()}
+        return table_indexes[table]
+
+    try:
+        # Same journaling as the app: WAL keeps readers unblocked, NORMAL skips per-commit fsync
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        statements = _StatementBuffer()
+        for name, apply in migrations:
+            if name:
+                print(f"== {name}")
+            apply(statements, columns, indexes)
+        if not statements.script and not statements.parameterized:
+            print("Schema is up to date.")
+            return True
+
+        # executescript commits any open transaction first, so the script opens
+        # its own; a column added concurrently since the check fails the ALTER
+        # and the whole transaction is rolled back below
+        cursor.executescript("\n".join(["BEGIN IMMEDIATE;", *statements.script]))
+        for sql, parameters in statements.parameterized:
+            cursor.execute(sql, parameters)
+        cursor.execute("COMMIT")
+        print("Schema changes committed.")
+        return True
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.rollback()
+        print(f"Migration failed, nothing was changed: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def run_all_migrations(db_path: str = DB_PATH) -> bool:
+    """
+    Apply all migrations to a SQLite database.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        True if the migrations were committed (or there was nothing to migrate)
+    """
+    return _apply_migrations(db_path, [(migration.__name__, migration.apply) for migration in MIGRATIONS])
+
+
+def run_standalone(apply, db_path: str = DB_PATH) -> bool:
+    """
+    Apply a single migration the same way run_all_migrations does.
+
+    Used by each migration script's own ``migrate()``.
+
+    Args:
+        apply: The migration's ``apply(cursor, columns, indexes)`` function
+        db_path: Path to the database file
+
+    Returns:
+        True if the migration was committed (or there was nothing to migrate)
+    """
+    return _apply_migrations(db_path, [(None, apply)])
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_migrations() else 1)
@@ -14,7 +14,6 @@ sys.path.append(str(Path(__file__).parent))
 
 from app.rag.hyde import QueryExpansion, HyDEQueryTransformer
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def test_query_expansion():
@@ -30,9 +29,9 @@ def test_query_expansion():
         "remote product manager positions"
     ]
 
-    for query in test_queries:
+    # One batched/concurrent round of LLM calls instead of one call per query
+    for query, expanded in zip(test_queries, expander.expand_queries(test_queries)):
         logger.info(f"\nOriginal query: {query}")
-        expanded = expander.expand_query(query)
         logger.info(f"Expanded query: {expanded}")
         logger.info(f"Length increase: {len(query)} -> {len(expanded)} chars")
 
@@ -50,6 +49,8 @@ def test_hyde():
     logger.info(transformed)
 
 if __name__ == "__main__":
+    # Timestamps add nothing to a one-off manual run
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
     print("=" * 60)
     print("Testing Query Expansion and HyDE Implementation")
     print("=" * 60)
@@ -1,7 +1,9 @@
 
+import asyncio
 import logging
 import sys
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to path
@@ -10,7 +12,6 @@ sys.path.append(str(Path(__file__).parent))
 from app.jobsources import LinkedInAdapter, IndeedAdapter
 from app.config import config
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def test_indeed():
@@ -31,44 +32,61 @@ def test_indeed():
     except Exception as e:
         logger.error(f"Indeed failed: {e}")
 
+@lru_cache(maxsize=1)
+def _decrypt_linkedin_password(encrypted_password: str) -> str:
+    """Decrypt the stored password once per distinct ciphertext when looping the test."""
+    from app.security import get_fernet
+
+    return get_fernet().decrypt(encrypted_password.encode()).decode()
+
 def test_linkedin():
     logger.info("Testing LinkedIn Scraping...")
     from app.db import get_db_context
     from app.user_profile import get_user_profile
-    from app.security import get_fernet
     
+    linkedin_config = config.get_job_sources_config().get("linkedin", {}).copy()
+
+    # Only the credentials come from the database; release the session before
+    # the (slow) scrape instead of holding a connection for its whole duration
     with get_db_context() as db:
         profile = get_user_profile(db)
-        linkedin_config = config.get_job_sources_config().get("linkedin", {}).copy()
-        
-        if profile and profile.linkedin_user:
-            linkedin_config["linkedin_email"] = profile.linkedin_user
-            logger.info(f"Using LinkedIn email: {profile.linkedin_user}")
-        if profile and profile.linkedin_password:
-            try:
-                fernet = get_fernet()
-                profile_li_pass = fernet.decrypt(profile.linkedin_password.encode()).decode()
-                linkedin_config["linkedin_password"] = profile_li_pass
-                logger.info("Using LinkedIn password from database")
-            except Exception as e:
-                logger.error(f"Failed to decrypt LinkedIn password: {e}")
-        
-        adapter = LinkedInAdapter(config=linkedin_config)
-        
+        linkedin_user = profile.linkedin_user if profile else None
+        encrypted_password = profile.linkedin_password if profile else None
+
+    if linkedin_user:
+        linkedin_config["linkedin_email"] = linkedin_user
+        logger.info(f"Using LinkedIn email: {linkedin_user}")
+    if encrypted_password:
         try:
-            jobs = adapter.search("Product Manager", location="Remote", max_results=5)
-            logger.info(f"LinkedIn found {len(jobs)} jobs")
-            for job in jobs:
-                logger.info(f"  - {job.title} @ {job.company}")
+            profile_li_pass = _decrypt_linkedin_password(encrypted_password)
+            linkedin_config["linkedin_password"] = profile_li_pass
+            logger.info("Using LinkedIn password from database")
         except Exception as e:
-            logger.error(f"LinkedIn failed: {e}")
+            logger.error(f"Failed to decrypt LinkedIn password: {e}")
+
+    adapter = LinkedInAdapter(config=linkedin_config)
+
+    try:
+        jobs = adapter.search("Product Manager", location="Remote", max_results=5)
+        logger.info(f"LinkedIn found {len(jobs)} jobs")
+        for job in jobs:
+            logger.info(f"  - {job.title} @ {job.company}")
+    except Exception as e:
+        logger.error(f"LinkedIn failed: {e}")
+
+async def test_all():
+    """Run both scrapers at once; each is network-bound, so they overlap in threads."""
+    await asyncio.gather(
+        asyncio.to_thread(test_indeed),
+        asyncio.to_thread(test_linkedin),
+    )
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
     if len(sys.argv) > 1:
         if sys.argv[1] == "indeed":
             test_indeed()
         elif sys.argv[1] == "linkedin":
             test_linkedin()
     else:
-        test_indeed()
-        test_linkedin()
+        asyncio.run(test_all())
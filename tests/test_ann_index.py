@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.rag.ann_index import QUANTIZATIONS, ANNIndex
+
+N_VECTORS = 600
+DIM = 64
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((N_VECTORS, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def ids():
+    return [f"doc{i}" for i in range(N_VECTORS)]
+
+
+@pytest.fixture(params=QUANTIZATIONS)
+def index(request, tmp_path, vectors, ids):
+    index = ANNIndex(tmp_path / "jobs.faiss", quantization=request.param, nlist=8, m=8, nprobe=8)
+    assert index.build(ids, vectors.copy())
+    return index
+
+
+def _hit_ids(index, vector, k):
+    return [doc_id for doc_id, _ in index.search(vector.tolist(), k)]
+
+
+def test_build_and_search(index, vectors):
+    assert index.ntotal == N_VECTORS
+    assert _hit_ids(index, vectors[5], 3)[0] == "doc5"
+
+
+def test_add_replaces_existing_id(index, vectors):
+    index.add(["doc5"], [vectors[7].tolist()])
+
+    assert index.ntotal == N_VECTORS
+    # PQ codes are lossy, so look a little further down the list
+    hits = _hit_ids(index, vectors[7], 5)
+    assert {"doc5", "doc7"} <= set(hits)
+    assert hits.count("doc5") == 1
+    # The in-memory index no longer matches the files on disk
+    assert not index.ids_path.exists()
+
+
+def test_add_keeps_last_duplicate(index, vectors):
+    index.add(["new", "new"], [vectors[1].tolist(), vectors[2].tolist()])
+
+    assert index.ntotal == N_VECTORS + 1
+    assert "new" in _hit_ids(index, vectors[2], 5)
+
+
+def test_remove_drops_ids(index, vectors):
+    index.remove(["doc5", "doc7", "missing"])
+
+    assert index.ntotal == N_VECTORS - 2
+    hits = _hit_ids(index, vectors[7], 10) + _hit_ids(index, vectors[5], 10)
+    assert "doc5" not in hits and "doc7" not in hits
+
+
+def test_load_round_trip(index, vectors):
+    loaded = ANNIndex(index.index_path, quantization=index.quantization, nlist=8, m=8, nprobe=8)
+
+    assert loaded.load()
+    assert loaded.ntotal == N_VECTORS
+    assert _hit_ids(loaded, vectors[9], 1) == ["doc9"]
+
+
+def test_load_skips_unpersisted_changes(index, vectors):
+    index.add(["doc5"], [vectors[7].tolist()])
+
+    assert not ANNIndex(index.index_path, quantization=index.quantization).load()
+
+
+def test_unknown_quantization(tmp_path):
+    with pytest.raises(ValueError):
+        ANNIndex(tmp_path / "jobs.faiss", quantization="int4")
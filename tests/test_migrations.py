@@ -0,0 +1,106 @@
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# The migration scripts import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import migrate_all
+
+
+@pytest.fixture
+def old_db(tmp_path, monkeypatch):
+    # migrate_add_resume_path looks for ./resumes
+    monkeypatch.chdir(tmp_path)
+    db_path = tmp_path / "job_pipeline.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE jobs (id INTEGER PRIMARY KEY, approved BOOLEAN, relevance_score FLOAT, status VARCHAR(50));
+        CREATE INDEX ix_jobs_approved ON jobs (approved);
+        CREATE TABLE user_profiles (id INTEGER PRIMARY KEY);
+        CREATE TABLE companies (id INTEGER PRIMARY KEY);
+        INSERT INTO user_profiles (id) VALUES (1);
+    """)
+    conn.close()
+    return str(db_path)
+
+
+def _schema(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {
+            table: {name for (name,) in conn.execute("SELECT name FROM pragma_table_info(?)", (table,))}
+            for table in ("jobs", "user_profiles", "companies")
+        }
+        indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        return columns, indexes
+    finally:
+        conn.close()
+
+
+def test_run_all_migrations_upgrades_old_schema(old_db, tmp_path):
+    (tmp_path / "resumes").mkdir()
+    (tmp_path / "resumes" / "resume_1.pdf").write_bytes(b"%PDF")
+
+    assert migrate_all.run_all_migrations(old_db)
+
+    columns, indexes = _schema(old_db)
+    assert {"content_hash"} <= columns["jobs"]
+    assert {"is_onboarded", "linkedin_user", "linkedin_password", "resume_file_path"} <= columns["user_profiles"]
+    assert {"indexed_text_hash", "indexed_at"} <= columns["companies"]
+    assert {"ix_jobs_content_hash", "ix_jobs_queueable"} <= indexes
+    assert "ix_jobs_approved" not in indexes
+
+    conn = sqlite3.connect(old_db)
+    assert conn.execute("SELECT resume_file_path FROM user_profiles WHERE id = 1").fetchone() == (
+        str(Path("resumes") / "resume_1.pdf"),
+    )
+    conn.close()
+
+
+def test_run_all_migrations_is_idempotent(old_db, capsys):
+    assert migrate_all.run_all_migrations(old_db)
+    capsys.readouterr()
+
+    assert migrate_all.run_all_migrations(old_db)
+
+    assert "Schema is up to date." in capsys.readouterr().out
+
+
+def test_failed_migration_changes_nothing(old_db, monkeypatch, capsys):
+    def broken(cursor, columns, indexes):
+        cursor.execute("ALTER TABLE missing_table ADD COLUMN x TEXT")
+
+    before = _schema(old_db)
+    monkeypatch.setattr(
+        migrate_all,
+        "MIGRATIONS",
+        migrate_all.MIGRATIONS + (SimpleNamespace(__name__="broken_migration", apply=broken),),
+    )
+
+    assert not migrate_all.run_all_migrations(old_db)
+
+    assert _schema(old_db) == before
+    assert "nothing was changed" in capsys.readouterr().out
+
+
+def test_run_standalone_applies_one_migration(old_db):
+    import migrate_add_jobs_queueable_index
+
+    assert migrate_all.run_standalone(migrate_add_jobs_queueable_index.apply, old_db)
+
+    columns, indexes = _schema(old_db)
+    assert "ix_jobs_queueable" in indexes
+    assert "ix_jobs_approved" not in indexes
+    assert "content_hash" not in columns["jobs"]
+
+
+def test_missing_database_is_not_created(tmp_path):
+    db_path = tmp_path / "absent.db"
+
+    assert migrate_all.run_all_migrations(str(db_path))
+
+    assert not db_path.exists()
@@ -0,0 +1,114 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.models import RateLimitBucket
+from app.services import rate_limiter
+from app.services.rate_limiter import BucketStore, RateLimiter
+
+
+@pytest.fixture
+def db_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rate_limits.db'}", connect_args={"check_same_thread": False})
+    RateLimitBucket.__table__.create(engine)
+    monkeypatch.setattr(rate_limiter, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Frozen clock: tokens only refill when a test advances it
+    now = [1000.0]
+    monkeypatch.setattr(
+        rate_limiter,
+        "time",
+        SimpleNamespace(monotonic=lambda: now[0], time=lambda: 1_700_000_000.0 + now[0]),
+    )
+    return now
+
+
+@pytest.fixture
+def store(db_engine, clock):
+    # Flushes only happen when a test asks for one
+    store = BucketStore(flush_interval=3600, flush_batch=10**6)
+    yield store
+    store.close()
+
+
+def test_denies_at_limit(store):
+    limiter = RateLimiter(custom_limits={"test": (3, 60)}, store=store)
+
+    results = [limiter.check_rate_limit("ip:1", "test")[0] for _ in range(4)]
+
+    assert results == [True, True, True, False]
+    allowed, info = limiter.check_rate_limit("ip:1", "test")
+    assert not allowed
+    assert info["remaining"] == 0
+    assert info["reset_seconds"] >= 1
+    # Other clients have their own bucket
+    assert limiter.check_rate_limit("ip:2", "test")[0]
+
+
+def test_refills_over_time(store, clock):
+    limiter = RateLimiter(custom_limits={"test": (2, 10)}, store=store)
+    assert [limiter.check_rate_limit("ip:1", "test")[0] for _ in range(3)] == [True, True, False]
+
+    # One token per 5 seconds
+    clock[0] += 5
+    assert [limiter.check_rate_limit("ip:1", "test")[0] for _ in range(2)] == [True, False]
+
+    # Never refills past capacity
+    clock[0] += 1000
+    assert [limiter.check_rate_limit("ip:1", "test")[0] for _ in range(3)] == [True, True, False]
+
+
+def test_fresh_store_reloads_persisted_buckets(store, db_engine, clock):
+    limiter = RateLimiter(custom_limits={"test": (5, 60)}, store=store)
+    for _ in range(3):
+        assert limiter.check_rate_limit("ip:1", "test")[0]
+    store.flush()
+
+    fresh = BucketStore(flush_interval=3600, flush_batch=10**6)
+    try:
+        assert fresh.peek(("ip:1", "test"), 5, 5 / 60) == pytest.approx(2.0)
+        status = RateLimiter(custom_limits={"test": (5, 60)}, store=fresh).get_status("ip:1")
+        assert status["test"]["remaining"] == 2
+        assert status["default"]["remaining"] == 100
+    finally:
+        fresh.close()
+
+
+def test_reset_forgets_persisted_buckets(store):
+    limiter = RateLimiter(custom_limits={"test": (1, 60)}, store=store)
+    assert limiter.check_rate_limit("ip:1", "test")[0]
+    store.flush()
+
+    limiter.reset_limit("ip:1", "test")
+
+    assert limiter.check_rate_limit("ip:1", "test")[0]
+
+
+def test_concurrent_requests_never_exceed_limit(store):
+    limiter = RateLimiter(custom_limits={"test": (100, 60)}, store=store)
+    allowed = []
+    allowed_lock = threading.Lock()
+    barrier = threading.Barrier(8)
+
+    def client():
+        barrier.wait()
+        for _ in range(50):
+            ok, _ = limiter.check_rate_limit("ip:1", "test")
+            with allowed_lock:
+                allowed.append(ok)
+
+    threads = [threading.Thread(target=client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(allowed) == 400
+    assert sum(allowed) == 100
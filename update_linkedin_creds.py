@@ -15,26 +15,34 @@ from pathlib import Path
 # Add project root to path
 sys.path.append(str(Path(__file__).parent))
 
+from sqlalchemy import bindparam, select, update
+
 from app.db import get_db_context
 from app.models import UserProfile
 from app.security import get_fernet
 
+# Core statements built once, so repeated updates skip ORM loading and flushes
+PROFILE_NAME_STMT = select(UserProfile.name).where(UserProfile.id == 1)
+UPDATE_CREDS_STMT = (
+    update(UserProfile)
+    .where(UserProfile.id == 1)
+    .values(linkedin_user=bindparam("email"), linkedin_password=bindparam("pwd"))
+)
+
 def update_linkedin_creds(email, password):
     with get_db_context() as db:
-        profile = db.query(UserProfile).filter(UserProfile.id == 1).first()
-        if not profile:
+        profile_name = db.execute(PROFILE_NAME_STMT).first()
+        if not profile_name:
             print("Error: User profile not found")
             return
 
-        print(f"Updating credentials for profile: {profile.name}")
+        print(f"Updating credentials for profile: {profile_name[0]}")
         
         # Encrypt password
         fernet = get_fernet()
         encrypted_password = fernet.encrypt(password.encode()).decode()
         
-        profile.linkedin_user = email
-        profile.linkedin_password = encrypted_password
-        
+        db.execute(UPDATE_CREDS_STMT, {"email": email, "pwd": encrypted_password})
         db.commit()
         print("✓ LinkedIn credentials updated successfully in the database")
 